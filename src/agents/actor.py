@@ -1,9 +1,65 @@
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
 from abc import ABCMeta
 from enum import Enum
+from logging import Logger
+from typing import Any, Callable, Iterator
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, BaseMessageChunk, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_ollama import ChatOllama
 
+from src import metrics
+from src.agents.scheduler import CallScheduler, CallPriority, SchedulerAbortedError
+from src.agents.singleflight import SingleFlight, SingleFlightAbortedError
+from src.degeneration import DegenerationGuard
 from src.prompt_manager import PromptManager
+from src.prompt_packing import PackingDecision, PromptPacker
+from src.utils import estimate_tokens
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+# output budget for a requested number of words: ~1.3 tokens per English word plus headroom so the model can finish
+# its last sentence
+TOKENS_PER_WORD: float = 1.3
+OUTPUT_HEADROOM: float = 1.25
+MIN_OUTPUT_TOKENS: int = 64
+# output budget assumed when packing the prompt of a call that isn't sized from a requested length
+DEFAULT_OUTPUT_TOKENS: int = 1024
+# continuation calls made for a response cut off by the output limit
+MAX_CONTINUATIONS: int = 2
+# finish reasons meaning the output limit was hit (Ollama/OpenAI: length, Anthropic/Bedrock: max_tokens)
+TRUNCATED_FINISH_REASONS: tuple = ("length", "max_tokens")
+CONTINUE_PROMPT: str = ("Your previous response was cut off. Continue it exactly where it stopped, without repeating "
+                        "anything or adding any commentary.")
+# ChatOllama replaces all options when any are passed per call
+_OLLAMA_OPTIONS: tuple = ("mirostat", "mirostat_eta", "mirostat_tau", "num_ctx", "num_gpu", "num_thread",
+                          "num_predict", "repeat_last_n", "repeat_penalty", "temperature", "seed", "stop", "tfs_z",
+                          "top_k", "top_p")
+# model settings that (with the model class and the prompt) make two calls identical for coalescing
+_MODEL_PARAMS: tuple = ("model", "model_id", "model_kwargs", "max_tokens") + _OLLAMA_OPTIONS
+
+
+def max_tokens_for_words(num_words: int) -> int:
+    return max(MIN_OUTPUT_TOKENS, int(num_words * TOKENS_PER_WORD * OUTPUT_HEADROOM))
+
+
+def finish_reason(message: BaseMessage) -> str | None:
+    metadata: dict = getattr(message, "response_metadata", None) or {}
+    return metadata.get("stop_reason") or metadata.get("done_reason") or metadata.get("finish_reason")
+
+
+def _join_continuation(text: str, continuation: str) -> str:
+    if text and continuation and not text[-1].isspace() and not continuation[0].isspace() \
+            and continuation[0].isalnum():
+        return text + " " + continuation
+    return text + continuation
 
 
 class CreativeMode(Enum):
@@ -11,23 +67,321 @@ class CreativeMode(Enum):
     PODCAST_MODE = "PODCAST"
 
 
+class ActorStoppedError(Exception):
+    """
+    Raised from an actor call that was aborted because the actor was stopped.
+    """
+    pass
+
+
 class Actor(metaclass=ABCMeta):
 
     def __init__(self, prompt_manager: PromptManager, creative_mode: CreativeMode):
         super().__init__()
         self.prompt_manager: PromptManager = prompt_manager
         self.creative_mode: str = creative_mode.value
+        self._stop_event: threading.Event = threading.Event()
+        self._forks: weakref.WeakSet = weakref.WeakSet()
+        self._forks_lock: threading.Lock = threading.Lock()
+
+    def start(self):
+        """
+        (Re)arms the actor after a stop so it can be used for the next operation.
+        """
+        self._stop_event.clear()
 
     def stop(self):
         """
-        Placeholder for subclasses that implement threading
+        Cooperatively cancels the actor: calls that haven't started yet (or are waiting for a scheduler slot)
+        raise ActorStoppedError and streaming calls are aborted at the next chunk.
         """
-        pass
+        self._stop_event.set()
+        with self._forks_lock:
+            forks: list[Actor] = list(self._forks)
+        for fork in forks:
+            fork.stop()
+
+    def fork(self) -> "Actor":
+        """
+        A copy of the actor (same model and settings) with its own stop, so one of several concurrent calls can be
+        cancelled without the others. Stopping the actor also stops its forks.
+        """
+        forked: Actor = copy.copy(self)
+        forked._stop_event = threading.Event()
+        forked._forks = weakref.WeakSet()
+        forked._forks_lock = threading.Lock()
+        with self._forks_lock:
+            self._forks.add(forked)
+        if self.stopped:
+            forked.stop()
+        return forked
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def _check_stopped(self):
+        if self._stop_event.is_set():
+            raise ActorStoppedError(f"{self.__class__.__name__} was stopped")
 
 class LLMActor(Actor):
 
-    def __init__(self, llm: BaseChatModel, prompt_manager: PromptManager, creative_mode: CreativeMode, identity_prompt_preamble: str = "You are a helpful bot."):
+    def __init__(self, llm: BaseChatModel, prompt_manager: PromptManager, creative_mode: CreativeMode,
+                 identity_prompt_preamble: str = "You are a helpful bot.", scheduler: CallScheduler = None,
+                 project: str = "default", streaming: bool = False, prompt_caching: bool = False,
+                 prompt_packing: bool = True, single_flight: SingleFlight = None, coalesce_sampled: bool = False):
         super().__init__(prompt_manager, creative_mode)
         self.llm: BaseChatModel = llm
         self.identity_prompt_preamble: str = identity_prompt_preamble
+        self.scheduler: CallScheduler | None = scheduler
+        self.project: str = project
+        self.streaming: bool = streaming
+        self.prompt_caching: bool = prompt_caching
+        # fits prompts into the model's context window (None if it's unknown or packing is off)
+        self.prompt_packing: bool = prompt_packing
+        self.packer: PromptPacker | None = PromptPacker.for_model(llm) if prompt_packing else None
+        # identical calls in flight at the same time share one result; only deterministic (temperature 0) calls
+        # unless coalesce_sampled, since sampled calls would otherwise give different responses
+        self.single_flight: SingleFlight | None = single_flight
+        self.coalesce_sampled: bool = coalesce_sampled
 
+    def use_llm(self, llm: BaseChatModel):
+        """
+        Switches the model used for subsequent calls (e.g. to a faster one); calls in flight are unaffected.
+        """
+        self.llm = llm
+        self.packer = PromptPacker.for_model(llm) if self.prompt_packing else None
+
+    def _format(self, tplt: ChatPromptTemplate, max_words: int = None, **values) -> str:
+        """
+        Formats a template with its values packed into the model's context window (see _pack).
+        """
+        return tplt.format(**self._pack(tplt.format, values, max_words))
+
+    def _pack(self, render: Callable[..., Any], values: dict, max_words: int = None) -> dict:
+        """
+        Shrinks the lower priority values of a prompt (see PromptPacker) if the rendered prompt plus the output
+        budget for the call wouldn't fit the context window, logging what was shrunk.
+        """
+        if self.packer is None:
+            return values
+        skeleton: str = self._prompt_text(render(**{name: "" if isinstance(value, str) else value
+                                                    for name, value in values.items()}))
+        if max_words:
+            output_tokens: int = max_tokens_for_words(max_words)
+        else:
+            num_predict: Any = getattr(self.llm, "num_predict", None)
+            output_tokens = num_predict if isinstance(num_predict, int) else DEFAULT_OUTPUT_TOKENS
+        packed, decisions = self.packer.pack(values, self.packer.budget(skeleton, output_tokens))
+        decision: PackingDecision
+        for decision in decisions:
+            logger.info(f"{self.__class__.__name__} prompt {decision.action} {decision.slot} from {decision.tokens} "
+                        f"to {decision.packed_tokens} tokens to fit the {self.packer.context_window} token window")
+            metrics.PROMPT_SLOTS_PACKED.inc(slot=decision.slot, action=decision.action)
+        return packed
+
+    def _prefixed_prompt(self, prefix: str, suffix: str, max_words: int = None, **values) -> list[BaseMessage]:
+        """
+        Builds a prompt from a stable prefix (identity preamble plus everything that is the same across a series of
+        calls) sent as the system message and a variable suffix sent as the human message. Keeping the prefix
+        byte-identical lets providers reuse it from their prompt cache; with prompt_caching it's also marked with
+        an explicit (Anthropic style) cache_control breakpoint. The values are packed into the context window.
+        """
+        tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
+            [
+                ("system", self.identity_prompt_preamble + "\n" + prefix),
+                ("human", suffix),
+            ]
+        )
+        messages: list[BaseMessage] = tplt.format_messages(**self._pack(tplt.format_messages, values, max_words))
+        if self.prompt_caching:
+            messages[0] = SystemMessage(content=[{"type": "text", "text": messages[0].content,
+                                                  "cache_control": {"type": "ephemeral"}}])
+        return messages
+
+    def _invoke(self, prompt, priority: CallPriority = CallPriority.DRAFT,
+                on_chunk: Callable[[str], None] = None, max_words: int = None, guard: bool = False) -> BaseMessage:
+        """
+        All LLM calls go through here so they can be admitted by the (optional) shared scheduler and aborted
+        when the actor is stopped. on_chunk receives the response text as it arrives.
+
+        max_words sizes the output limit for the requested length. A response cut off by the output limit is
+        completed with (up to MAX_CONTINUATIONS) continuation calls that append to it instead of starting over.
+        With guard, the output is watched for degeneration (see DegenerationGuard): a degenerating generation is
+        stopped, cut back to its last good sentence and continued from there (or retried if nothing was good).
+        """
+        actor: str = self.__class__.__name__
+        max_tokens: int | None = max_tokens_for_words(max_words) if max_words else None
+        text: str = ""
+        result: BaseMessage | None = None
+        for attempt in range(MAX_CONTINUATIONS + 1):
+            call_prompt = prompt if not text else \
+                self._as_messages(prompt) + [AIMessage(content=text), HumanMessage(content=CONTINUE_PROMPT)]
+            degeneration: DegenerationGuard | None = DegenerationGuard() if guard else None
+            result = self._coalesced_call(call_prompt, priority, on_chunk, max_tokens, degeneration)
+            text = _join_continuation(text, result.content if degeneration is None else degeneration.good_text())
+            if degeneration is not None and degeneration.reason is not None:
+                logger.warning(f"{actor} output degenerated ({degeneration.reason}); kept {len(text.split())} words")
+                metrics.LLM_RETRIES.inc(actor=actor, reason="degeneration")
+            elif finish_reason(result) in TRUNCATED_FINISH_REASONS:
+                logger.info(f"{actor} output cut off at {len(text.split())} words; continuing")
+                metrics.LLM_RETRIES.inc(actor=actor, reason="continuation")
+            else:
+                break
+            if max_words:
+                # the rest of the requested words (at least enough to finish the thought)
+                max_tokens = max_tokens_for_words(max(max_words - len(text.split()), max_words // 4))
+        if text == result.content:
+            return result
+        return AIMessage(content=text, response_metadata=result.response_metadata)
+
+    def _coalesced_call(self, prompt, priority: CallPriority, on_chunk: Callable[[str], None] = None,
+                        max_tokens: int = None, guard: DegenerationGuard = None) -> BaseMessage:
+        """
+        Shares the result of an identical call already in flight (see SingleFlight) instead of making another.
+        Guarded calls aren't coalesced, as each guard has to see its own generation.
+        """
+        key: str | None = self._flight_key(prompt, max_tokens) if guard is None else None
+        if key is None:
+            return self._admitted_call(prompt, priority, on_chunk, max_tokens, guard)
+        try:
+            result, shared = self.single_flight.do(
+                key, lambda: self._admitted_call(prompt, priority, on_chunk, max_tokens), abort=self._stop_event)
+        except SingleFlightAbortedError as e:
+            raise ActorStoppedError(str(e)) from e
+        except ActorStoppedError:
+            if self.stopped:
+                raise
+            # the call we were waiting for was stopped by its own actor
+            return self._admitted_call(prompt, priority, on_chunk, max_tokens)
+        if shared:
+            metrics.LLM_CACHE_HITS.inc(actor=self.__class__.__name__, cache="singleflight")
+            if on_chunk is not None:
+                on_chunk(result.content)
+        return result
+
+    def _flight_key(self, prompt, max_tokens: int | None) -> str | None:
+        if self.single_flight is None:
+            return None
+        temperature: Any = getattr(self.llm, "temperature", None)
+        if temperature is None:
+            temperature = (getattr(self.llm, "model_kwargs", None) or {}).get("temperature")
+        if not self.coalesce_sampled and temperature != 0:
+            return None
+        call: list = [
+            self.llm.__class__.__name__,
+            {name: getattr(self.llm, name, None) for name in _MODEL_PARAMS},
+            [(message.type, message.content) for message in self._as_messages(prompt)],
+            max_tokens,
+        ]
+        return hashlib.sha256(json.dumps(call, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _admitted_call(self, prompt, priority: CallPriority, on_chunk: Callable[[str], None] = None,
+                       max_tokens: int = None, guard: DegenerationGuard = None) -> BaseMessage:
+        self._check_stopped()
+        if self.scheduler is None:
+            return self._measured_call(prompt, priority, on_chunk, max_tokens, guard)
+        queued: float = time.monotonic()
+        try:
+            with self.scheduler.slot(priority, self.project, abort=self._stop_event):
+                metrics.LLM_QUEUE_WAIT.observe(time.monotonic() - queued, priority=priority.name)
+                return self._measured_call(prompt, priority, on_chunk, max_tokens, guard)
+        except SchedulerAbortedError as e:
+            metrics.LLM_CALLS.inc(actor=self.__class__.__name__, priority=priority.name, outcome="stopped")
+            raise ActorStoppedError(str(e)) from e
+
+    @staticmethod
+    def _as_messages(prompt) -> list[BaseMessage]:
+        if isinstance(prompt, list):
+            return list(prompt)
+        return [HumanMessage(content=prompt.to_string() if hasattr(prompt, "to_string") else str(prompt))]
+
+    def _limit_kwargs(self, max_tokens: int | None) -> dict:
+        """
+        Per call output limit in the model's own terms.
+        """
+        if max_tokens is None:
+            return {}
+        if isinstance(self.llm, ChatOllama):
+            options: dict = {name: getattr(self.llm, name, None) for name in _OLLAMA_OPTIONS}
+            options["num_predict"] = max_tokens
+            return {"options": options}
+        return {"max_tokens": max_tokens}
+
+    def _measured_call(self, prompt, priority: CallPriority, on_chunk: Callable[[str], None] = None,
+                       max_tokens: int = None, guard: DegenerationGuard = None) -> BaseMessage:
+        """
+        Calls the LLM and records the call's outcome, latency and token usage.
+        """
+        actor: str = self.__class__.__name__
+        start: float = time.monotonic()
+        outcome: str = "error"
+        try:
+            result: BaseMessage = self._call(prompt, on_chunk, max_tokens, guard)
+            outcome = "ok"
+        except ActorStoppedError:
+            outcome = "stopped"
+            raise
+        finally:
+            metrics.LLM_LATENCY.observe(time.monotonic() - start, actor=actor, priority=priority.name)
+            metrics.LLM_CALLS.inc(actor=actor, priority=priority.name, outcome=outcome)
+        self._record_usage(prompt, result)
+        return result
+
+    def _record_usage(self, prompt, result: BaseMessage):
+        # use the provider's token counts where available, otherwise estimate
+        actor: str = self.__class__.__name__
+        usage: dict | None = getattr(result, "usage_metadata", None)
+        if usage:
+            metrics.LLM_TOKENS.inc(usage.get("input_tokens", 0), actor=actor, direction="input")
+            metrics.LLM_TOKENS.inc(usage.get("output_tokens", 0), actor=actor, direction="output")
+            cache_read: int = (usage.get("input_token_details") or {}).get("cache_read") or 0
+            if cache_read:
+                metrics.LLM_TOKENS.inc(cache_read, actor=actor, direction="cache_read")
+                metrics.LLM_CACHE_HITS.inc(actor=actor, cache="prompt")
+            return
+        metrics.LLM_TOKENS.inc(estimate_tokens(self._prompt_text(prompt)), actor=actor, direction="input")
+        metrics.LLM_TOKENS.inc(estimate_tokens(str(result.content)), actor=actor, direction="output")
+
+    @staticmethod
+    def _prompt_text(prompt) -> str:
+        if isinstance(prompt, list):
+            return "".join(m.content if isinstance(m.content, str) else
+                           "".join(b.get("text", "") for b in m.content if isinstance(b, dict))
+                           for m in prompt)
+        return prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+
+    def _call(self, prompt, on_chunk: Callable[[str], None] = None, max_tokens: int = None,
+              guard: DegenerationGuard = None) -> BaseMessage:
+        kwargs: dict = self._limit_kwargs(max_tokens)
+        if not self.streaming:
+            message: BaseMessage = self.llm.invoke(prompt, **kwargs)
+            if on_chunk is not None:
+                on_chunk(message.content)
+            if guard is not None:
+                guard.feed(message.content)
+            return message
+        message: BaseMessageChunk | None = None
+        for chunk in self._stream(prompt, **kwargs):
+            if on_chunk is not None:
+                on_chunk(chunk.content)
+            message = chunk if message is None else message + chunk
+            if guard is not None and guard.feed(chunk.content):
+                # stop paying for a generation that has degenerated (leaving the loop closes the stream)
+                break
+        return message if message is not None else AIMessage(content="")
+
+    def _stream(self, prompt, **kwargs) -> Iterator[BaseMessageChunk]:
+        """
+        Streams the response, checking for a stop between chunks so a cancelled call stops paying for output.
+        """
+        stream: Iterator[BaseMessageChunk] = self.llm.stream(prompt, **kwargs)
+        try:
+            for chunk in stream:
+                self._check_stopped()
+                yield chunk
+        finally:
+            # closing the generator closes the underlying connection
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
@@ -1,23 +1,41 @@
-import json
-from typing import List
+import logging
+from logging import Logger
+from typing import Callable, List
 
 from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from src import metrics
 from src.agents.actor import LLMActor
+from src.agents.scheduler import CallPriority
+from src.json_stream import JsonListStreamParser, parse_list
 from src.logutils import logio
+from src.revision import RevisionError, number_paragraphs, revise, split_paragraphs
 from src.utils import StoryContext
 
+logger: Logger = logging.getLogger("scrAIbe")
+
+# calls made by ideate_many to collect the requested number of items
+MAX_LIST_ATTEMPTS: int = 3
+
+# story elements that revise_field can edit, and the prompts with their context
+REVISABLE_FIELDS: dict[str, str] = {
+    "plot": "DEVELOP_PLOT",
+    "characters": "DEVELOP_CHARACTERS",
+    "world": "DEVELOP_WORLD",
+    "storyline": "DEVELOP_STORYLINE",
+}
+
 
 class Author(LLMActor):
     class JsonListOutputParser(JsonOutputParser):
         def parse(self, text: str) -> List[str]:
-            json_object = json.loads(text)
-            if isinstance(json_object, list):
-                return json_object
-            else:
-                raise ValueError("Parsed JSON is not a list")
+            # tolerant of prose around the list and the usual JSON defects; see JsonListStreamParser
+            items: List = parse_list(text)
+            if not items:
+                raise ValueError("No list found in the output")
+            return items
 
         def get_format_instructions(self) -> str:
             return """Your response should be a JSON list of strings. For example:
@@ -29,6 +47,18 @@ class Author(LLMActor):
             Respond only with valid JSON and no extra characters.
             """
 
+    class JsonEditsOutputParser(JsonOutputParser):
+        def get_format_instructions(self) -> str:
+            return """Your response should be a JSON list of edits. Each edit is one of:
+
+            {"op": "replace", "paragraph": 2, "text": "the new paragraph"}
+            {"op": "insert_after", "paragraph": 3, "text": "a new paragraph (paragraph 0 inserts at the start)"}
+            {"op": "delete", "paragraph": 4}
+
+            Respond with [] if no changes are needed.
+            Respond only with valid JSON and no extra characters.
+            """
+
     @logio()
     def ideate(self, genre: str, starter_idea: str) -> str:
         output_parser = Author.JsonListOutputParser()
@@ -40,14 +70,90 @@ class Author(LLMActor):
                  ),
             ]
         )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             genre=genre,
             starter=starter_idea,
             format_instructions=output_parser.get_format_instructions()
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.INTERACTIVE)
         return res.content
 
+    @logio()
+    def ideate_many(self, genre: str, starter_idea: str, count: int, exclude: List[str] = None,
+                    on_item: Callable[[str], None] = None) -> List[str]:
+        """
+        Generates up to count ideas in one structured call. Ideas are parsed (and passed to on_item) as they
+        stream; if the output was cut off or malformed, only the missing ideas are requested again.
+        """
+        output_parser = Author.JsonListOutputParser()
+        tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
+            [
+                ("system",
+                 self.identity_prompt_preamble + "\n" +
+                 self.prompt_manager.get_prompt([self.creative_mode, "IDEATE", "LIST"])
+                 ),
+            ]
+        )
+        ideas: List[str] = []
+        for attempt in range(MAX_LIST_ATTEMPTS):
+            missing: int = count - len(ideas)
+            avoid: List[str] = (exclude or []) + ideas
+            prompt: str = self._format(
+                tplt,
+                genre=genre,
+                starter=starter_idea,
+                count=missing,
+                exclude="".join(f"- {idea}\n" for idea in avoid) if avoid else "(none)",
+                format_instructions=output_parser.get_format_instructions()
+            )
+            parser: JsonListStreamParser = JsonListStreamParser()
+
+            def collect(items: list):
+                for item in items:
+                    if isinstance(item, str) and item.strip() and len(ideas) < count:
+                        ideas.append(item.strip())
+                        if on_item is not None:
+                            on_item(ideas[-1])
+
+            self._invoke(prompt, CallPriority.INTERACTIVE, on_chunk=lambda text: collect(parser.feed(text)))
+            collect(parser.close())
+            if len(ideas) >= count or attempt == MAX_LIST_ATTEMPTS - 1:
+                break
+            logger.info(f"got {len(ideas)}/{count} ideas; requesting the missing {count - len(ideas)}")
+            metrics.LLM_RETRIES.inc(actor=self.__class__.__name__, reason="missing_items")
+        return ideas
+
+    @logio()
+    def plan_segments(self, context: StoryContext, count: int) -> List[str]:
+        """
+        Splits the storyline into (up to) count segment descriptions, in order, so segments can be written
+        independently.
+        """
+        output_parser = Author.JsonListOutputParser()
+        tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
+            [
+                ("system",
+                 self.identity_prompt_preamble + "\n" +
+                 self.prompt_manager.get_prompt([self.creative_mode, "PLAN", "SEGMENTS"])
+                 ),
+            ]
+        )
+        prompt: str = self._format(
+            tplt,
+            concept=context.concept,
+            plot=context.plot,
+            storyline=context.storyline,
+            count=count,
+            format_instructions=output_parser.get_format_instructions()
+        )
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
+        segments: List[str] = [item.strip() for item in output_parser.parse(res.content)
+                               if isinstance(item, str) and item.strip()]
+        if not segments:
+            raise ValueError("No segments in the plan")
+        return segments[:count]
+
     @logio(truncate_at=-1)
     def develop_plot(self, context: StoryContext, critique: str = None) -> str:
         if critique is None:
@@ -72,12 +178,13 @@ class Author(LLMActor):
                     )
                 ]
             )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot,
             feedback=critique
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
         return res.content
 
     @logio(truncate_at=-1)
@@ -90,11 +197,12 @@ class Author(LLMActor):
                  ),
             ]
         )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
         return res.content
 
     @logio(truncate_at=-1)
@@ -120,14 +228,15 @@ class Author(LLMActor):
                 ]
             )
 
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot,
             themes=context.themes,
             characters=context.characters,
             feedback=critique
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
         return res.content
 
     @logio(truncate_at=-1)
@@ -152,13 +261,14 @@ class Author(LLMActor):
                      ),
                 ]
             )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot,
             world=context.world,
             feedback=critique
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
         return res.content
 
     @logio()
@@ -183,7 +293,8 @@ class Author(LLMActor):
                      ),
                 ]
             )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot,
             themes=context.themes,
@@ -192,9 +303,53 @@ class Author(LLMActor):
             world=context.world,
             feedback=critique
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
         return res.content
 
+    @logio(truncate_at=-1)
+    def revise_field(self, field: str, context: StoryContext, critique: str) -> str:
+        """
+        Revises a story element (plot, characters, world or storyline) based on a critique by asking for edits to
+        its numbered paragraphs instead of the whole text, so the output is a fraction of the size. Falls back to
+        regenerating the element (develop_<field> with the critique) if the edits can't be applied.
+        """
+        current: str = getattr(context, field)
+        paragraphs: list[str] = split_paragraphs(current) if current else []
+        if paragraphs:
+            output_parser = Author.JsonEditsOutputParser()
+            tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
+                [
+                    ("system",
+                     self.identity_prompt_preamble + "\n" +
+                     self.prompt_manager.get_prompt([self.creative_mode, REVISABLE_FIELDS[field], "BASE"]) + "\n" +
+                     self.prompt_manager.get_prompt([self.creative_mode, "REVISE", "EDITS"])
+                     ),
+                ]
+            )
+            prompt: str = self._format(
+                tplt,
+                concept=context.concept,
+                plot=context.plot,
+                themes=context.themes,
+                characters=context.characters,
+                world=context.world,
+                field=field,
+                field_upper=field.upper(),
+                numbered=number_paragraphs(paragraphs),
+                feedback=critique,
+                format_instructions=output_parser.get_format_instructions()
+            )
+            res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
+            try:
+                revised, edits = revise(current, res.content)
+                logger.info(f"revised {field} with {len(edits)} edits "
+                            f"({len(res.content.split())} words generated for {len(revised.split())})")
+                return revised
+            except RevisionError as e:
+                logger.warning(f"failed to apply the edits to the {field} ({e}); regenerating it")
+        metrics.LLM_RETRIES.inc(actor=self.__class__.__name__, reason="revision_fallback")
+        return getattr(self, f"develop_{field}")(context, critique=critique)
+
     @logio()
     def summarize_concept(self, context: StoryContext) -> str:
         tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
@@ -205,7 +360,8 @@ class Author(LLMActor):
                  ),
             ]
         )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot,
             themes=context.themes,
@@ -213,32 +369,86 @@ class Author(LLMActor):
             storyline=context.storyline,
             world=context.world
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.CONCEPT)
         return res.content
 
     @logio()
-    def write_section(self, context: StoryContext, num_words, section_number, total_sections, preceding_sections, extended_context) -> str:
+    def summarize_chapter(self, context: StoryContext, chapter: str, chapter_number: int, num_words: int) -> str:
+        """
+        LLM alternative to the local extractive chapter summary (see src.summarizer).
+        """
         tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
             [
                 ("system",
                  self.identity_prompt_preamble + "\n" +
-                 self.prompt_manager.get_prompt([self.creative_mode, "DRAFT", "SECTION"])
+                 self.prompt_manager.get_prompt([self.creative_mode, "SUMMARIZE_CHAPTER"])
                  ),
             ]
         )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
+            max_words=num_words,
+            concept=context.concept,
+            chapter=chapter,
+            chapter_number=chapter_number,
+            num_words=num_words
+        )
+        res: BaseMessage = self._invoke(prompt, CallPriority.DRAFT, max_words=num_words)
+        return res.content
+
+    @logio()
+    def write_section(self, context: StoryContext, num_words, section_number, total_sections, preceding_sections,
+                      extended_context, bible: str = None) -> str:
+        """
+        Writes the next section. If a bible is provided (the plot/themes/world excerpts relevant to the chapter),
+        it's sent instead of the full plot/themes/world, next to the core (concept/characters/storyline) in the
+        prefix.
+        """
+        prompt_name: str = "SECTION" if bible is None else "SECTION_RETRIEVED"
+        # the story bible and instructions are the same for every page, so they go first as a cacheable prefix
+        prompt: list[BaseMessage] = self._prefixed_prompt(
+            self.prompt_manager.get_prompt([self.creative_mode, "DRAFT", prompt_name, "PREFIX"]),
+            self.prompt_manager.get_prompt([self.creative_mode, "DRAFT", prompt_name, "SUFFIX"]),
+            max_words=num_words,
             concept=context.concept,
             plot=context.plot,
             themes=context.themes,
             characters=context.characters,
             storyline=context.storyline,
             world=context.world,
+            bible=bible,
             extended_context=extended_context,
             preceding_sections=preceding_sections,
             num_words=num_words,
             section_number=section_number,
             total_sections=total_sections
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        res: BaseMessage = self._invoke(prompt, CallPriority.DRAFT, max_words=num_words, guard=True)
         return res.content
 
+    @logio()
+    def write_transition(self, context: StoryContext, ending: str, opening: str, section_number: int,
+                         num_words: int) -> str:
+        """
+        Writes a bridge between the end of a section and the beginning of the next one (written independently).
+        """
+        tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
+            [
+                ("system",
+                 self.identity_prompt_preamble + "\n" +
+                 self.prompt_manager.get_prompt([self.creative_mode, "DRAFT", "TRANSITION"])
+                 ),
+            ]
+        )
+        prompt: str = self._format(
+            tplt,
+            max_words=num_words,
+            concept=context.concept,
+            ending=ending,
+            opening=opening,
+            section_number=section_number,
+            next_section_number=section_number + 1,
+            num_words=num_words
+        )
+        res: BaseMessage = self._invoke(prompt, CallPriority.DRAFT, max_words=num_words)
+        return res.content
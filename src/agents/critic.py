@@ -1,12 +1,27 @@
-from typing import Dict, Any
+import re
+from typing import Dict, List
 
 from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 
 from src.agents.actor import LLMActor
+from src.agents.scheduler import CallPriority
 from src.logutils import logio
 from src.utils import StoryContext
 
+# the concept field each aspect critique is routed to; the themes are served by revising the plot
+ASPECT_FIELDS: Dict[str, str] = {
+    "plot": "plot",
+    "themes": "plot",
+    "characters": "characters",
+    "world": "world",
+    "storyline": "storyline",
+}
+NO_CHANGES: str = "NO CHANGES NEEDED"
+# an approval is the marker on its own (give or take quotes, markdown and punctuation around it), not a critique
+# that happens to contain the phrase
+_APPROVAL: re.Pattern = re.compile(rf"^\W*{NO_CHANGES}\W*$", re.IGNORECASE)
+
 
 class Critic(LLMActor):
     @logio(truncate_at=-1)
@@ -29,27 +44,79 @@ class Critic(LLMActor):
                            "ANSWER: "),
             ]
         )
-        prompt: str = tplt.format(
+        prompt: str = self._format(
+            tplt,
             concept=context.concept,
             plot=context.plot,
             themes=context.themes,
             characters=context.characters,
             world=context.world
         )
-        res: BaseMessage = self.llm.invoke(prompt)
+        # the concept is critiqued while the human develops it
+        res: BaseMessage = self._invoke(prompt, CallPriority.INTERACTIVE)
         return res.content
 
-    def critique_characters(self, concept: str, characters: Dict[str, Any]) -> str:
-        pass
+    @logio(truncate_at=-1)
+    def critique_plot(self, context: StoryContext) -> str:
+        return self._critique("PLOT", context)
+
+    @logio(truncate_at=-1)
+    def critique_themes(self, context: StoryContext) -> str:
+        return self._critique("THEMES", context)
+
+    @logio(truncate_at=-1)
+    def critique_characters(self, context: StoryContext) -> str:
+        return self._critique("CHARACTERS", context)
 
-    def critique_storyline(self, concept: str, characters: Dict[str, Any], storyline: str) -> str:
-        pass
+    @logio(truncate_at=-1)
+    def critique_world(self, context: StoryContext) -> str:
+        return self._critique("WORLD", context)
+
+    @logio(truncate_at=-1)
+    def critique_storyline(self, context: StoryContext) -> str:
+        return self._critique("STORYLINE", context)
+
+    @logio(truncate_at=-1)
+    def critique_writing(self, context: StoryContext, text: str) -> str:
+        return self._critique("WRITING", context, priority=CallPriority.REVIEW, text=text)
 
-    def critique_world(self, concept: str, plot: str, storyline: str, world: str) -> str:
-        pass
+    def _critique(self, aspect: str, context: StoryContext, priority: CallPriority = CallPriority.INTERACTIVE,
+                  **kwargs) -> str:
+        """
+        One aspect critic: a small prompt with only the elements the aspect needs, so aspects can run concurrently.
+        Concept aspects are critiqued while the human develops the concept, so they default to INTERACTIVE;
+        background review (e.g. of drafted writing) passes REVIEW.
+        """
+        tplt: ChatPromptTemplate = ChatPromptTemplate.from_messages(
+            [
+                ("system",
+                 self.identity_prompt_preamble + "\n" +
+                 self.prompt_manager.get_prompt([self.creative_mode, "CRITIQUE", aspect])
+                 ),
+            ]
+        )
+        prompt: str = self._format(
+            tplt,
+            concept=context.concept,
+            plot=context.plot,
+            themes=context.themes,
+            characters=context.characters,
+            world=context.world,
+            storyline=context.storyline,
+            **kwargs
+        )
+        res: BaseMessage = self._invoke(prompt, priority)
+        return res.content
 
-    def critique_themes(self, concept: str, plot: str, ) -> str:
-        pass
 
-    def critique_writing(self, concept: str, text: str) -> str:
-        pass
+def merge_critiques(critiques: Dict[str, str]) -> Dict[str, str]:
+    """
+    Merges aspect critiques (by aspect) into feedback per concept field (see ASPECT_FIELDS). Aspects the critic is
+    happy with are dropped, so fields without feedback are left out.
+    """
+    feedback: Dict[str, List[str]] = {}
+    for aspect, critique in critiques.items():
+        if not critique or _APPROVAL.match(critique.strip()):
+            continue
+        feedback.setdefault(ASPECT_FIELDS[aspect], []).append(f"On the {aspect}:\n{critique.strip()}")
+    return {name: "\n\n".join(parts) for name, parts in feedback.items()}
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from src.utils import estimate_tokens
+
+WORDS: List[str] = """
+the of and a to in was he it with his that her for on had you at as she not but they be by from were this all
+which have one when there their said lighthouse storm harbor key letter night old door road river village lantern
+window shadow voice silence morning captain sister stranger secret map promise tide fire mountain garden
+""".split()
+
+_COUNT: re.Pattern = re.compile(r"(\d+) distinct")
+_WORD_TARGET: re.Pattern = re.compile(r"(\d+)\s*words")
+
+
+def message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(block if isinstance(block, str) else block.get("text", "") for block in message.content)
+
+
+def cacheable_prefix(messages: List[BaseMessage]) -> str:
+    """
+    The prompt up to and including the last content block with a cache marker (Anthropic cache_control
+    semantics); empty if nothing is marked.
+    """
+    parts: List[str] = []
+    prefix: str = ""
+    for message in messages:
+        blocks: list = [message.content] if isinstance(message.content, str) else message.content
+        for block in blocks:
+            parts.append(block if isinstance(block, str) else block.get("text", ""))
+            if isinstance(block, dict) and "cache_control" in block:
+                prefix = "".join(parts)
+    return prefix
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for a hosted model (env 'fake'): produces filler prose of the requested length (or a JSON list
+    when asked for one), simulates latency and bills calls like a provider with prompt prefix caching. A prefix
+    marked with cache_control is written to the cache on first use (at a premium) and read from it at a discount
+    (and without the time to process it) until it expires. A max_tokens call argument cuts the response off with
+    stop_reason "max_tokens".
+    """
+    words_per_response: int = 250
+    seed: int = 0
+    # latency: time to first token grows with the uncached input; output streams at a fixed rate
+    base_latency: float = 0.0
+    seconds_per_input_token: float = 0.0
+    seconds_per_output_token: float = 0.0
+    # pricing per million tokens and cache behavior
+    input_price: float = 0.25
+    output_price: float = 1.25
+    cache_write_multiplier: float = 1.25
+    cache_read_multiplier: float = 0.1
+    cache_ttl: float = 300.0
+    min_cacheable_tokens: int = 1024
+
+    _cache: Dict[str, float] = PrivateAttr(default_factory=dict)
+    _stats: Dict[str, float] = PrivateAttr(default_factory=lambda: {
+        "calls": 0, "input_tokens": 0, "cache_read_tokens": 0, "cache_creation_tokens": 0, "output_tokens": 0,
+        "cost": 0.0})
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text, usage, delay, stop_reason = self._respond(messages, kwargs.get("max_tokens"))
+        time.sleep(delay + self.seconds_per_output_token * usage["output_tokens"])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content=text, usage_metadata=usage, response_metadata={"stop_reason": stop_reason}))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text, usage, delay, stop_reason = self._respond(messages, kwargs.get("max_tokens"))
+        time.sleep(delay)
+        words: List[str] = text.split(" ")
+        for idx, word in enumerate(words):
+            time.sleep(self.seconds_per_output_token * estimate_tokens(word))
+            last: bool = idx == len(words) - 1
+            chunk: AIMessageChunk = AIMessageChunk(content=word if last else word + " ",
+                                                   usage_metadata=usage if last else None,
+                                                   response_metadata={"stop_reason": stop_reason} if last else {})
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+    def _respond(self, messages: List[BaseMessage], max_tokens: int = None) -> (str, dict, float, str):
+        prompt: str = "".join(message_text(m) for m in messages)
+        prefix: str = cacheable_prefix(messages)
+        input_tokens: int = estimate_tokens(prompt)
+        prefix_tokens: int = estimate_tokens(prefix) if prefix else 0
+        cache_read: int = 0
+        cache_creation: int = 0
+        with self._lock:
+            call: int = int(self._stats["calls"])
+            if prefix_tokens >= self.min_cacheable_tokens:
+                key: str = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+                now: float = time.monotonic()
+                if self._cache.get(key, 0.0) > now:
+                    cache_read = prefix_tokens
+                else:
+                    cache_creation = prefix_tokens
+                # each hit refreshes the entry
+                self._cache[key] = now + self.cache_ttl
+
+        text: str = self._text(prompt, call)
+        stop_reason: str = "end_turn"
+        if max_tokens is not None and estimate_tokens(text) > max_tokens:
+            # cut off by the output limit, like a real model (mid-sentence)
+            text = text[:max(1, max_tokens * 4 - 3)].rsplit(" ", 1)[0]
+            stop_reason = "max_tokens"
+        output_tokens: int = estimate_tokens(text)
+        uncached: int = input_tokens - cache_read - cache_creation
+        cost: float = (uncached + cache_creation * self.cache_write_multiplier +
+                       cache_read * self.cache_read_multiplier) * self.input_price / 1e6 + \
+            output_tokens * self.output_price / 1e6
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["input_tokens"] += input_tokens
+            self._stats["cache_read_tokens"] += cache_read
+            self._stats["cache_creation_tokens"] += cache_creation
+            self._stats["output_tokens"] += output_tokens
+            self._stats["cost"] += cost
+        usage: dict = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                       "total_tokens": input_tokens + output_tokens,
+                       "input_token_details": {"cache_read": cache_read, "cache_creation": cache_creation}}
+        delay: float = self.base_latency + self.seconds_per_input_token * (input_tokens - cache_read)
+        return text, usage, delay, stop_reason
+
+    def _text(self, prompt: str, call: int) -> str:
+        rng: random.Random = random.Random(f"{self.seed}:{call}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}")
+
+        def sentence(words: int) -> str:
+            return " ".join(rng.choice(WORDS) for i in range(words)).capitalize() + "."
+
+        if "JSON list" in prompt:
+            match: re.Match | None = _COUNT.search(prompt)
+            return json.dumps([sentence(50) for i in range(int(match.group(1)) if match else 3)])
+        match = _WORD_TARGET.search(prompt)
+        words: int = int(match.group(1)) if match else self.words_per_response
+        return " ".join(sentence(min(12, words - w)) for w in range(0, words, 12))
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from logging import Logger
+from typing import Dict, List, Tuple
+
+from src import metrics
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+ABORT_POLL_INTERVAL: float = 0.1
+
+
+class SchedulerAbortedError(Exception):
+    pass
+
+
+class CallPriority(Enum):
+    """
+    Priority classes for LLM calls, most urgent first.
+    """
+    INTERACTIVE = 0  # a human is waiting on the result
+    CONCEPT = 1  # concept development
+    DRAFT = 2  # bulk narrative drafting
+    REVIEW = 3  # background critique / review
+
+
+@dataclass
+class _Ticket:
+    priority: CallPriority
+    project: str
+    finish_tag: float
+    enqueued: float
+    seq: int
+    granted: bool = field(default=False)
+
+
+class CallScheduler:
+    """
+    Central admission control for LLM calls shared by all LLMActors (and conductors) in a process.
+
+    At most max_concurrency calls run at once. When a slot frees up it goes to the waiting call with:
+    - the most urgent priority class, where a call is promoted one class for every starvation_timeout seconds
+      it has waited (so background work always makes progress)
+    - within a class, the smallest weighted fair queuing finish tag, so one project with hundreds of queued
+      calls can't lock out another project's calls; promoted calls come first, longest waiting first (their
+      finish tags are on another class's virtual clock, so they can't be compared)
+    """
+
+    def __init__(self, max_concurrency: int = 8, starvation_timeout: float = 30.0,
+                 project_weights: Dict[str, float] = None):
+        assert max_concurrency > 0, "max_concurrency must be positive"
+        self.max_concurrency: int = max_concurrency
+        self.starvation_timeout: float = starvation_timeout
+        self.project_weights: Dict[str, float] = project_weights or {}
+        self._cond: threading.Condition = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._active: int = 0
+        self._seq: int = 0
+        self._virtual_time: Dict[CallPriority, float] = {p: 0.0 for p in CallPriority}
+        self._last_finish: Dict[Tuple[CallPriority, str], float] = {}
+        # waiting and active calls per project; an idle project's finish tags are forgotten
+        self._project_calls: Dict[str, int] = {}
+
+    @contextmanager
+    def slot(self, priority: CallPriority = CallPriority.DRAFT, project: str = "default",
+             abort: threading.Event = None):
+        """
+        Blocks until the call is admitted; the slot is released when the block exits.
+        """
+        ticket: _Ticket = self.acquire(priority, project, abort=abort)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def acquire(self, priority: CallPriority = CallPriority.DRAFT, project: str = "default",
+                abort: threading.Event = None) -> _Ticket:
+        """
+        Blocks until the call is admitted. If the abort event is set while waiting, the call gives up its place
+        in line and SchedulerAbortedError is raised.
+        """
+        with self._cond:
+            key: Tuple[CallPriority, str] = (priority, project)
+            start: float = max(self._virtual_time[priority], self._last_finish.get(key, 0.0))
+            finish_tag: float = start + 1.0 / self.project_weights.get(project, 1.0)
+            self._last_finish[key] = finish_tag
+            self._project_calls[project] = self._project_calls.get(project, 0) + 1
+            self._seq += 1
+            ticket: _Ticket = _Ticket(priority, project, finish_tag, time.monotonic(), self._seq)
+            self._waiting.append(ticket)
+            self._dispatch()
+            while not self._cond.wait_for(lambda: ticket.granted, timeout=ABORT_POLL_INTERVAL):
+                if abort is not None and abort.is_set():
+                    self._waiting.remove(ticket)
+                    self._done(ticket)
+                    self._update_gauges()
+                    raise SchedulerAbortedError(f"{priority.name} call for project {project} aborted while queued")
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        with self._cond:
+            self._active -= 1
+            self._done(ticket)
+            self._dispatch()
+
+    def depth(self, priority: CallPriority = None) -> int:
+        """
+        Number of calls waiting for a slot (optionally for a single priority class).
+        """
+        with self._cond:
+            return len([t for t in self._waiting if priority is None or t.priority == priority])
+
+    def _done(self, ticket: _Ticket):
+        # caller must hold the lock
+        self._project_calls[ticket.project] -= 1
+        if self._project_calls[ticket.project] == 0:
+            del self._project_calls[ticket.project]
+            for priority in CallPriority:
+                self._last_finish.pop((priority, ticket.project), None)
+
+    def _rank(self, ticket: _Ticket, now: float) -> Tuple[int, int, float, int]:
+        promotions: int = int((now - ticket.enqueued) / self.starvation_timeout) if self.starvation_timeout > 0 else 0
+        effective: int = max(0, ticket.priority.value - promotions)
+        if effective < ticket.priority.value:
+            return effective, 0, ticket.enqueued, ticket.seq
+        return effective, 1, ticket.finish_tag, ticket.seq
+
+    def _dispatch(self):
+        # caller must hold the lock
+        granted: bool = False
+        while self._active < self.max_concurrency and self._waiting:
+            now: float = time.monotonic()
+            ticket: _Ticket = min(self._waiting, key=lambda t: self._rank(t, now))
+            self._waiting.remove(ticket)
+            self._virtual_time[ticket.priority] = max(self._virtual_time[ticket.priority], ticket.finish_tag - 1.0 /
+                                                      self.project_weights.get(ticket.project, 1.0))
+            ticket.granted = True
+            self._active += 1
+            granted = True
+            if self._rank(ticket, now)[0] < ticket.priority.value:
+                logger.debug(f"promoted starving {ticket.priority.name} call for project {ticket.project}")
+        if granted:
+            self._cond.notify_all()
+        self._update_gauges()
+
+    def _update_gauges(self):
+        # caller must hold the lock
+        for priority in CallPriority:
+            metrics.SCHEDULER_QUEUED.set(len([t for t in self._waiting if t.priority == priority]),
+                                         priority=priority.name)
+        metrics.SCHEDULER_ACTIVE.set(self._active)
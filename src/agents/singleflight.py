@@ -0,0 +1,58 @@
+import logging
+import threading
+from concurrent.futures import Future
+from logging import Logger
+from typing import Any, Callable, Dict, Tuple
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+ABORT_POLL_INTERVAL: float = 0.1
+
+
+class SingleFlightAbortedError(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls that are in flight at the same time: the first caller for a key (the leader) makes
+    the call and every caller that arrives with the same key before it finishes waits for and shares its result
+    (or exception). Nothing is kept once the call finishes, so this is not a cache. Share one across actors (and
+    conductors) to collapse duplicate work between them.
+    """
+
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self._flights: Dict[str, Future] = {}
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def do(self, key: str, call: Callable[[], Any], abort: threading.Event = None) -> Tuple[Any, bool]:
+        """
+        Returns the result of the call and whether it was shared from another caller's call. A waiting caller
+        raises SingleFlightAbortedError once abort is set; the leader's call isn't affected.
+        """
+        with self._lock:
+            flight: Future | None = self._flights.get(key)
+            leader: bool = flight is None
+            if leader:
+                flight = Future()
+                self._flights[key] = flight
+        if leader:
+            try:
+                result: Any = call()
+                flight.set_result(result)
+                return result, False
+            except BaseException as e:
+                flight.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+
+        while abort is not None and not flight.done():
+            if abort.wait(ABORT_POLL_INTERVAL):
+                raise SingleFlightAbortedError("aborted while waiting for an identical call in flight")
+        return flight.result(), True
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from logging import Logger
+from pathlib import Path
+from typing import BinaryIO, Dict, List
+
+from src.utils import utc_as_string, write_atomic
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used when zstandard isn't installed
+    zstandard = None
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+STORE_DIR_NAME: str = ".artifacts"
+COPY_BUFFER_SIZE: int = 1024 * 1024
+
+
+class ArtifactStore:
+    """
+    Versioned artifact storage for a project dir.
+
+    Content is stored once per distinct content as compressed, content-addressed blobs (zstd if available, else
+    gzip) and every artifact keeps a history of versions. Composite artifacts (e.g. the full narrative) reference
+    the blobs of their parts instead of storing the text again. All writes are atomic (temp file + rename), so a
+    crash never leaves a truncated artifact.
+
+    The refs (the version history of each artifact) live in the project dir. The blobs can live in a blob dir
+    shared by many projects (e.g. the working dir's), so content that is identical across projects is stored once;
+    blobs in the project's own store (where they are kept without a shared blob dir) are still read.
+
+    If materialize is set, a plain working copy of each artifact is also kept in the project dir for people and
+    tools that read the files directly. That trades disk space for convenience: the store then adds to the plain
+    files rather than replacing them.
+    """
+
+    def __init__(self, project_dir: Path, materialize: bool = True, blob_dir: Path = None):
+        self.project_dir: Path = project_dir
+        self.materialize: bool = materialize
+        self.store_dir: Path = project_dir / STORE_DIR_NAME
+        self.blob_dir: Path = blob_dir if blob_dir is not None else self.store_dir / "blobs"
+        # where blobs are looked up: the (shared) blob dir, then the project's own
+        self.blob_dirs: List[Path] = list(dict.fromkeys([self.blob_dir, self.store_dir / "blobs"]))
+        self.ref_dir: Path = self.store_dir / "refs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.ref_dir.mkdir(parents=True, exist_ok=True)
+        self._lock: threading.RLock = threading.RLock()
+
+    def put(self, name: str, content: str) -> int:
+        """
+        Stores a new version of an artifact (unless identical to the latest) and returns its version number.
+        """
+        data: bytes = content.encode("utf-8")
+        digest: str = hashlib.sha256(data).hexdigest()
+        self._put_blob(digest, io.BytesIO(data))
+        version: int = self._add_version(name, {"hash": digest, "size": len(data)})
+        if self.materialize:
+            write_atomic(self.project_dir / name, content)
+        return version
+
+    def put_file(self, name: str, path: Path) -> int:
+        """
+        Stores a new version of an artifact from a file that was written elsewhere (e.g. streamed while drafting)
+        without reading it into memory. The file is the plain copy; it is removed if plain copies aren't kept.
+        """
+        sha: hashlib.sha256 = hashlib.sha256()
+        size: int = 0
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+                sha.update(block)
+                size += len(block)
+        digest: str = sha.hexdigest()
+        with open(path, "rb") as f:
+            self._put_blob(digest, f)
+        version: int = self._add_version(name, {"hash": digest, "size": size})
+        self._drop_plain_copy(name, path)
+        return version
+
+    def put_composite(self, name: str, part_names: List[str], separator: str = "\n\n", path: Path = None) -> int:
+        """
+        Stores an artifact that is the concatenation of the latest versions of other artifacts without storing
+        their content again. If path is given, it is a plain copy the caller already assembled.
+        """
+        parts: List[dict] = [self._latest(part) for part in part_names]
+        size: int = sum(p["size"] for p in parts) + len(separator.encode("utf-8")) * max(0, len(parts) - 1)
+        version: int = self._add_version(name, {"parts": [p["hash"] for p in parts], "separator": separator,
+                                                "size": size})
+        if path is not None:
+            self._drop_plain_copy(name, path)
+        elif self.materialize:
+            # assemble part by part rather than joining the whole thing in memory
+            plain_path: Path = self.project_dir / name
+            tmp_path: Path = plain_path.with_name(f".{plain_path.name}.tmp")
+            with open(tmp_path, "wb") as f:
+                for idx, part in enumerate(parts):
+                    if idx > 0:
+                        f.write(separator.encode("utf-8"))
+                    f.write(self._get_blob(part["hash"]))
+            os.replace(tmp_path, plain_path)
+        return version
+
+    def get(self, name: str, version: int = None) -> str:
+        """
+        Returns the latest (or a specific) version of an artifact.
+        """
+        entry: dict = self._latest(name) if version is None else self._version(name, version)
+        if "parts" in entry:
+            return entry["separator"].join(self._get_blob(h).decode("utf-8") for h in entry["parts"])
+        return self._get_blob(entry["hash"]).decode("utf-8")
+
+    def exists(self, name: str) -> bool:
+        return self._ref_path(name).is_file()
+
+    def history(self, name: str) -> List[dict]:
+        return self._read_ref(name)["versions"] if self.exists(name) else []
+
+    def names(self) -> List[str]:
+        return sorted(p.name[:-len(".json")] for p in self.ref_dir.glob("*.json"))
+
+    def _put_blob(self, digest: str, source: BinaryIO):
+        with self._lock:
+            if self._blob_path(digest) is not None:
+                return
+            suffix: str = ".zst" if zstandard is not None else ".gz"
+            path: Path = self.blob_dir / digest[:2] / f"{digest}{suffix}"
+            path.parent.mkdir(exist_ok=True)
+            # unique per writer, as stores of other projects (or processes) may write the same shared blob
+            tmp_path: Path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                if zstandard is not None:
+                    zstandard.ZstdCompressor().copy_stream(source, f)
+                else:
+                    with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                        shutil.copyfileobj(source, gz, COPY_BUFFER_SIZE)
+            os.replace(tmp_path, path)
+
+    def _drop_plain_copy(self, name: str, path: Path):
+        if not self.materialize and path.resolve() == (self.project_dir / name).resolve():
+            path.unlink()
+
+    def _get_blob(self, digest: str) -> bytes:
+        path: Path | None = self._blob_path(digest)
+        if path is None:
+            raise KeyError(f"missing blob {digest}")
+        with open(path, "rb") as f:
+            compressed: bytes = f.read()
+        if path.suffix == ".zst":
+            if zstandard is None:
+                raise RuntimeError(f"zstandard is required to read {path}")
+            return zstandard.ZstdDecompressor().decompress(compressed)
+        return gzip.decompress(compressed)
+
+    def _blob_path(self, digest: str) -> Path | None:
+        for blob_dir in self.blob_dirs:
+            for suffix in [".zst", ".gz"]:
+                path: Path = blob_dir / digest[:2] / f"{digest}{suffix}"
+                if path.is_file():
+                    return path
+        return None
+
+    def _add_version(self, name: str, entry: dict) -> int:
+        with self._lock:
+            ref: dict = self._read_ref(name) if self.exists(name) else {"versions": []}
+            versions: List[dict] = ref["versions"]
+            if versions and {k: v for k, v in versions[-1].items() if k not in ["version", "created"]} == entry:
+                return versions[-1]["version"]
+            entry = {"version": len(versions) + 1, "created": utc_as_string(compact=False, sub_second=True), **entry}
+            versions.append(entry)
+            write_atomic(self._ref_path(name), json.dumps(ref, indent=2))
+            logger.debug(f"stored {name} v{entry['version']} ({entry['size']} bytes)")
+            return entry["version"]
+
+    def _latest(self, name: str) -> dict:
+        if not self.exists(name):
+            raise KeyError(f"no artifact named {name}")
+        return self._read_ref(name)["versions"][-1]
+
+    def _version(self, name: str, version: int) -> dict:
+        for entry in self.history(name):
+            if entry["version"] == version:
+                return entry
+        raise KeyError(f"no version {version} of artifact {name}")
+
+    def _read_ref(self, name: str) -> Dict[str, List[dict]]:
+        with open(self._ref_path(name), "r") as f:
+            return json.load(f)
+
+    def _ref_path(self, name: str) -> Path:
+        return self.ref_dir / f"{name}.json"
@@ -0,0 +1,141 @@
+import logging
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from logging import Logger
+from typing import Callable, Dict, List
+
+from src import metrics
+from src.agents.actor import Actor, ActorStoppedError
+from src.degeneration import DegenerationGuard
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+# candidates per key page and the score that is good enough to stop waiting for the others
+DEFAULT_CANDIDATES: int = 3
+ACCEPT_SCORE: float = 0.85
+# weights of the page score's parts: length against the request, phrase variety and a finished last sentence
+LENGTH_WEIGHT: float = 0.5
+VARIETY_WEIGHT: float = 0.3
+ENDING_WEIGHT: float = 0.2
+# score kept by a page that degenerated or starts with a preamble
+DEGENERATION_PENALTY: float = 0.5
+
+_WORD: re.Pattern = re.compile(r"\w+(?:'\w+)?")
+_ENDING: re.Pattern = re.compile(r"[.!?][\"'”’)]*\s*$")
+
+
+def score_page(text: str, num_words: int) -> float:
+    """
+    Cheap local quality score in [0, 1] for a drafted page: how close it is to the requested length, how varied its
+    phrasing is (repeated 3-word phrases lower it) and whether it ends on a finished sentence.
+    """
+    words: List[str] = [w.lower() for w in _WORD.findall(text)]
+    if not words:
+        return 0.0
+    length: float = min(len(words) / num_words, num_words / len(words)) if num_words > 0 else 1.0
+    trigrams: List[tuple] = list(zip(words, words[1:], words[2:]))
+    variety: float = len(set(trigrams)) / len(trigrams) if trigrams else 1.0
+    ending: float = 1.0 if _ENDING.search(text) else 0.0
+    score: float = LENGTH_WEIGHT * length + VARIETY_WEIGHT * variety + ENDING_WEIGHT * ending
+    guard: DegenerationGuard = DegenerationGuard()
+    if guard.feed(text + "\n") or guard.preamble_end:
+        score *= DEGENERATION_PENALTY
+    return score
+
+
+@dataclass
+class SelectionStats:
+    """
+    Running totals over the pages sampled best-of-N.
+    """
+    pages: int = 0
+    candidates: int = 0
+    cancelled: int = 0
+    failed: int = 0
+    accepted_early: int = 0
+    score_total: float = 0.0
+
+    @property
+    def mean_score(self) -> float:
+        return self.score_total / self.pages if self.pages else 0.0
+
+    def describe(self) -> str:
+        return (f"{self.pages} pages from {self.candidates} candidates ({self.cancelled} cancelled, {self.failed} "
+                f"failed), {self.accepted_early} accepted early, mean score {self.mean_score:.2f}")
+
+
+class BestOfSampler:
+    """
+    Writes a page as several candidates at once, each on its own fork of the actor, and keeps the best scoring
+    one. As soon as a finished candidate scores at least the threshold it is taken and the others are cancelled,
+    so a retry for quality costs no more wall-clock time than the slowest good candidate (and often less).
+    """
+
+    def __init__(self, candidates: int = DEFAULT_CANDIDATES, threshold: float = ACCEPT_SCORE,
+                 scorer: Callable[[str, int], float] = score_page):
+        self.candidates: int = candidates
+        self.threshold: float = threshold
+        self.scorer: Callable[[str, int], float] = scorer
+        self.stats: SelectionStats = SelectionStats()
+        self._lock: threading.Lock = threading.Lock()
+
+    def sample(self, actor: Actor, write: Callable[[Actor], str], num_words: int) -> str:
+        """
+        Returns the selected page; write(actor) writes one candidate with the given (forked) actor. Candidates run on
+        their own threads rather than the conductor's pool, which may be busy with the chapters calling this.
+        """
+        forks: List[Actor] = [actor.fork() for _ in range(self.candidates)]
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.candidates,
+                                                          thread_name_prefix="best-of")
+        futures: Dict[Future, int] = {executor.submit(write, fork): idx for idx, fork in enumerate(forks)}
+        # cancelled candidates finish (or notice their stop) on their own
+        executor.shutdown(wait=False)
+        best_text: str | None = None
+        best_score: float = -1.0
+        scores: List[float] = []
+        error: BaseException | None = None
+        failed: int = 0
+        try:
+            for future in as_completed(futures):
+                try:
+                    text: str = future.result()
+                except ActorStoppedError:
+                    if actor.stopped:
+                        raise
+                    failed += 1
+                    continue
+                except Exception as e:
+                    logger.warning(f"best-of: candidate {futures[future] + 1} failed: {e}")
+                    error = e
+                    failed += 1
+                    continue
+                score: float = self.scorer(text, num_words)
+                scores.append(score)
+                if score > best_score:
+                    best_text, best_score = text, score
+                if score >= self.threshold:
+                    break
+        finally:
+            cancelled: int = sum(not future.done() for future in futures)
+            for fork in forks:
+                fork.stop()
+        if best_text is None:
+            raise error if error is not None else ActorStoppedError("every best-of candidate was stopped")
+
+        early: bool = cancelled > 0
+        with self._lock:
+            self.stats.pages += 1
+            self.stats.candidates += self.candidates
+            self.stats.cancelled += cancelled
+            self.stats.failed += failed
+            self.stats.accepted_early += int(early)
+            self.stats.score_total += best_score
+        metrics.BEST_OF_CANDIDATES.inc(outcome="selected")
+        metrics.BEST_OF_CANDIDATES.inc(len(scores) - 1, outcome="rejected")
+        metrics.BEST_OF_CANDIDATES.inc(cancelled, outcome="cancelled")
+        metrics.BEST_OF_CANDIDATES.inc(failed, outcome="failed")
+        logger.info(f"best-of: selected a page scoring {best_score:.2f} from "
+                    f"{', '.join(f'{s:.2f}' for s in scores)}" + (f"; cancelled {cancelled}" if cancelled else ""))
+        return best_text
@@ -1,24 +1,89 @@
+import json
 import logging
 import os
+import shutil
+import threading
+import time
+import uuid
 from abc import abstractmethod, ABCMeta
-from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import CancelledError, ThreadPoolExecutor, Future, wait
 from dataclasses import dataclass, field
+from datetime import datetime
 from logging import Logger
 from pathlib import Path
+from typing import Callable
 
 from langchain_aws import ChatBedrock
+from langchain_core.language_models import BaseChatModel
 from langchain_ollama import ChatOllama
 
-from src.agents.actor import CreativeMode
+from src.agents.actor import ActorStoppedError, CreativeMode
 from src.agents.author import Author
-from src.agents.critic import Critic
+from src.agents.critic import ASPECT_FIELDS, Critic, merge_critiques
 from src.agents.editor import Editor
+from src.agents.fake_llm import FakeChatModel
 from src.agents.human import Human
+from src.agents.scheduler import CallScheduler
+from src.agents.singleflight import SingleFlight
+from src.artifact_store import STORE_DIR_NAME, ArtifactStore
+from src import metrics
+from src.best_of import BestOfSampler
+from src.continuity import ContinuityIndex
+from src.deadline import DeadlinePlanner, DraftPlan
+from src.narrative import NarrativeWriter
+from src.dedup import dedupe
 from src.prompt_manager import PromptManager
-from src.utils import StoryContext, utc_as_string
+from src.retrieval import BIBLE_CORE_FIELDS, BibleIndex
+from src.summarizer import CHAPTER_SUMMARY_WORDS, extractive_summary, running_summary
+from src.utils import StoryContext, utc_as_string, write_atomic
 
 logger: Logger = logging.getLogger("scrAIbe")
 
+DEFAULT_BIBLE_TOKEN_BUDGET: int = 1500
+RETRIEVAL_QUERY_WORDS: int = 150
+CONTINUITY_PASSAGES: int = 4
+# keep local models (and the KV cache of the shared prompt prefix) loaded between calls
+OLLAMA_KEEP_ALIVE: str = "30m"
+# smaller local model switched to when a deadline can't be met otherwise
+FAST_OLLAMA_MODEL: str = "llama3.2:1b"
+# context window for local models (Ollama's default is 2048 tokens, which a drafting prompt overflows); prompts
+# are packed to fit it
+OLLAMA_NUM_CTX: int = 8192
+# output cap for calls that don't size it from a requested length (e.g. a 500 word plot needs ~800 tokens)
+DEFAULT_NUM_PREDICT: int = 1024
+# podcast transitions: length, and how much of each adjacent segment they see
+TRANSITION_WORDS: int = 60
+TRANSITION_CONTEXT_WORDS: int = 150
+# how chapter summaries (the book so far, sent with each page) are made: locally, by the LLM, or not at all
+SUMMARIZERS: list[str] = ["extractive", "llm", "none"]
+DEFAULT_SUMMARIZER: str = "extractive"
+
+
+def _first_words(text: str, count: int = TRANSITION_CONTEXT_WORDS) -> str:
+    return " ".join(text.split()[:count])
+
+
+def _last_words(text: str, count: int = TRANSITION_CONTEXT_WORDS) -> str:
+    return " ".join(text.split()[-count:])
+
+
+@dataclass
+class RunManifest:
+    """
+    Record of a develop/draft run written to manifest.json in the project dir, whether or not the run finished,
+    so a cancelled or failed run can be inspected and rescheduled.
+    """
+    operation: str
+    status: str = "running"
+    started: str = field(default_factory=lambda: utc_as_string(compact=False))
+    finished: str | None = None
+    artifacts: list[str] = field(default_factory=list)
+    ideas: list[str] = field(default_factory=list)
+    context: StoryContext | None = None
+
+    def marshall(self) -> str:
+        return json.dumps(self, default=lambda o: o.__dict__, indent=2)
+
 
 @dataclass
 class Conductor(metaclass=ABCMeta):
@@ -37,6 +102,18 @@ class Conductor(metaclass=ABCMeta):
     """
     working_dir: str
     env: str = field(default="local")
+    progress_callback: Callable[[str, int, int], None] | None = field(default=None)
+    scheduler: CallScheduler | None = field(default=None)
+    project: str = field(default="default")
+    drain_timeout: float = field(default=30.0)
+    dedup_threshold: float = field(default=0.7)
+    dedup_rounds: int = field(default=2)
+    keep_plain_copies: bool = field(default=True)
+    prompt_caching: bool | None = field(default=None)
+    revision_mode: str = field(default="delta")
+    speculation_budget: int = field(default=2)
+    single_flight: SingleFlight | None = field(default=None)
+    coalesce_sampled: bool = field(default=False)
     working_dir_path: Path = field(init=False)
     author: Author = field(init=False)
     editor: Editor = field(init=False)
@@ -56,32 +133,139 @@ class Conductor(metaclass=ABCMeta):
         self.working_dir_path = Path(self.working_dir)
         assert self.working_dir_path.is_dir(), f"{self.working_dir_path} is not a valid directory"
 
+        # LLM calls are admitted by a scheduler; share one across conductors to prioritize between projects
+        if self.scheduler is None:
+            self.scheduler = CallScheduler()
+        # identical LLM calls in flight at the same time are made once; share one across conductors to coalesce
+        # between projects too
+        if self.single_flight is None:
+            self.single_flight = SingleFlight()
+
+        # explicit cache markers on stable prompt prefixes; needs provider (and langchain-aws) support, so it's
+        # opt-in except for the fake backend that simulates it
+        if self.prompt_caching is None:
+            self.prompt_caching = self.env == 'fake'
+
+        # worker pool for fanned out calls; created on demand and shut down (or drained) on stop
+        self.max_workers: int = 5
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: list[Future] = []
+        self._cancel_requested: threading.Event = threading.Event()
+        self._manifest: RunManifest | None = None
+        self._stores: dict[Path, ArtifactStore] = {}
+
         # hand off to child class to finish init
         self._post_init()
 
     def develop_concept(self, **kwargs) -> Path:
-        try:
-            out_dir: Path = self.working_dir_path / 'concepts' / f"{utc_as_string()}"
-            out_dir.mkdir(parents=True, exist_ok=False)
+        out_dir: Path = self._new_concept_dir()
+        return self._run("develop", out_dir, lambda: self._do_develop_concept(out_dir, **kwargs))
 
-            return self._do_develop_concept(out_dir, **kwargs)
-        except Exception as e:
-            logger.exception(e)
-        finally:
-            self._stop()
-            logger.info("done!")
+    def draft_narrative(self, concept_dir_path: Path, **kwargs) -> Path:
+        return self._run("draft", concept_dir_path, lambda: self._do_draft_narrative(concept_dir_path, **kwargs))
+
+    def develop_and_draft(self, **kwargs) -> Path:
+        """
+        Develops a concept and drafts it in one run: drafting starts from the in-memory context as soon as the
+        concept is final, while the markdown summary (which drafting doesn't need) is written concurrently.
+        """
+        out_dir: Path = self._new_concept_dir()
+        return self._run("develop_draft", out_dir, lambda: self._do_develop_and_draft(out_dir, **kwargs))
+
+    def _new_concept_dir(self) -> Path:
+        """
+        Creates the dir for a new concept: named by its start time plus a random suffix, so concepts started in
+        the same second (e.g. by concurrent jobs) don't collide.
+        """
+        out_dir: Path = self.working_dir_path / 'concepts' / f"{utc_as_string()}_{uuid.uuid4().hex[:8]}"
+        out_dir.mkdir(parents=True, exist_ok=False)
+        return out_dir
+
+    def refresh_concept(self, concept_dir_path: Path) -> Path:
+        """
+        Recomputes only the parts of a developed concept that are out of date after an edit to context.json
+        (e.g. editing the world regenerates the storyline and the summary but nothing else).
+        """
+        return self._run("refresh", concept_dir_path, lambda: self._do_refresh_concept(concept_dir_path))
+
+    def cancel(self):
+        """
+        Requests cancellation of the running operation (e.g. from another thread); the run stops at the next
+        cancellation point, drains and writes its manifest. The request stands for the conductor's later operations
+        too (e.g. the draft after a job's develop), so one that arrives between operations isn't lost.
+        """
+        logger.info("cancellation requested")
+        self._cancel_requested.set()
+        self._stop_agents()
 
-    def draft_narrative(self, concept_dir_path: Path, **kwargs):
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def _run(self, operation: str, out_dir: Path, func: Callable[[], None]) -> Path | None:
+        """
+        Runs an operation and always finishes with a drained shutdown and a manifest of what was produced.
+        Returns the output dir or None if the run was cancelled or failed.
+        """
+        self._manifest = RunManifest(operation=operation)
+        if self.cancelled:
+            logger.warning(f"{operation} cancelled before it started")
+            self._manifest.status = "cancelled"
+            self._write_manifest(out_dir)
+            return None
+        self._start()
+        interrupted: bool = False
         try:
-            self._do_draft_narrative(concept_dir_path, **kwargs)
+            func()
+            self._manifest.status = "completed"
+            return out_dir
+        except KeyboardInterrupt:
+            logger.warning(f"{operation} interrupted")
+            self._manifest.status = "cancelled"
+            interrupted = True
+        except (ActorStoppedError, CancelledError) as e:
+            logger.warning(f"{operation} cancelled: {e}")
+            self._manifest.status = "cancelled"
         except Exception as e:
             logger.exception(e)
+            self._manifest.status = "failed"
         finally:
-            self._stop()
+            self._stop(cancel=self._manifest.status != "completed")
+            self._write_manifest(out_dir)
+            self._report_simulated_usage()
             logger.info("done!")
-
-    def _stop(self):
+            if interrupted:
+                # let Ctrl-C end the process once everything is flushed
+                raise KeyboardInterrupt()
+
+    def _start(self):
+        self._futures: list[Future] = []
+        for agent in [self.author, self.critic, self.editor, self.human]:
+            if agent:
+                agent.start()
+        if self.cancelled:
+            # cancelled while the agents were being (re)armed
+            self._stop_agents()
+
+    def _stop(self, cancel: bool = False):
+        """
+        Shuts down agents. When cancelling, queued work is dropped, streaming calls are aborted and in-flight
+        calls get up to drain_timeout seconds to finish (so their results can still be checkpointed).
+        """
         logger.info("stopping. shutting down agents...")
+        if cancel:
+            for future in self._futures:
+                future.cancel()
+        self._stop_agents()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            running: list[Future] = [f for f in self._futures if not f.done()]
+            if running:
+                logger.info(f"draining {len(running)} in-flight calls for up to {self.drain_timeout}s")
+                wait(running, timeout=self.drain_timeout)
+            self._executor = None
+
+    def _stop_agents(self):
         if self.author:
             self.author.stop()
         if self.critic:
@@ -91,6 +275,251 @@ class Conductor(metaclass=ABCMeta):
         if self.human:
             self.human.stop()
 
+    def _report_simulated_usage(self):
+        """
+        With the fake backend, logs what the calls so far would have cost and what prompt caching saved.
+        """
+        models: dict[int, FakeChatModel] = {
+            id(agent.llm): agent.llm for agent in [self.author, self.critic, self.editor]
+            if isinstance(getattr(agent, "llm", None), FakeChatModel)}
+        for model in models.values():
+            stats: dict = model.stats
+            uncached: float = (stats["input_tokens"] * model.input_price +
+                               stats["output_tokens"] * model.output_price) / 1e6
+            logger.info(f"simulated usage (model seed {model.seed}): {stats['calls']:.0f} calls, "
+                        f"{stats['input_tokens']:.0f} input tokens ({stats['cache_read_tokens']:.0f} read from the "
+                        f"prompt cache), {stats['output_tokens']:.0f} output tokens; ${stats['cost']:.3f} "
+                        f"(${uncached - stats['cost']:.3f} saved by prompt caching)")
+
+    def _submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Runs func on the conductor's worker pool; these futures are cancelled/drained on stop.
+        """
+        if self._cancel_requested.is_set():
+            raise ActorStoppedError("conductor was cancelled")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        future: Future = self._executor.submit(func, *args, **kwargs)
+        self._futures.append(future)
+        return future
+
+    def _checkpoint(self, **kwargs):
+        """
+        Records in-progress state (e.g. ideas=..., context=...) that is flushed to the manifest if the run stops.
+        """
+        if self._manifest is None:
+            return
+        for key, value in kwargs.items():
+            setattr(self._manifest, key, value)
+
+    def _write_manifest(self, out_dir: Path):
+        if self._manifest.status == "completed":
+            # the checkpointed state is in the regular artifacts
+            self._manifest.context = None
+            self._manifest.ideas = []
+        self._manifest.finished = utc_as_string(compact=False)
+        self._manifest.artifacts = sorted(set(self._artifact_store(out_dir).names()) |
+                                          {p.name for p in out_dir.iterdir() if p.is_file() and
+                                           p.name != "manifest.json" and not p.name.startswith(".") and
+                                           p.suffix != ".partial"})
+        write_atomic(out_dir / "manifest.json", self._manifest.marshall())
+
+    def _artifact_store(self, project_dir: Path) -> ArtifactStore:
+        if project_dir not in self._stores:
+            # blobs are shared by all projects in the working dir, so identical content is stored once
+            self._stores[project_dir] = ArtifactStore(project_dir, materialize=self.keep_plain_copies,
+                                                      blob_dir=self.working_dir_path / STORE_DIR_NAME / "blobs")
+        return self._stores[project_dir]
+
+    def _save_artifact(self, project_dir: Path, name: str, content: str) -> int:
+        """
+        Stores a new version of an artifact in the project's artifact store (atomically; unchanged content is not
+        stored again).
+        """
+        return self._artifact_store(project_dir).put(name, content)
+
+    def _has_artifact(self, project_dir: Path, name: str) -> bool:
+        return self._artifact_store(project_dir).exists(name) or (project_dir / name).is_file()
+
+    def _load_artifact(self, project_dir: Path, name: str) -> str:
+        """
+        Returns the latest version of an artifact. A plain copy that was edited by hand (or predates the store)
+        wins and is recorded as a new version.
+        """
+        store: ArtifactStore = self._artifact_store(project_dir)
+        plain_path: Path = project_dir / name
+        if plain_path.is_file():
+            with open(plain_path, "r") as f:
+                content: str = f.read()
+            if not store.exists(name) or store.get(name) != content:
+                store.put(name, content)
+            return content
+        return store.get(name)
+
+    def _generate_ideas(self, genre: str, starter: str, num_concepts: int) -> list:
+        """
+        Generates the ideas in one structured call; each idea is checkpointed as soon as it has streamed in so
+        nothing paid for is lost on a cancel. Near-duplicate ideas are dropped and only the dropped ones are
+        re-requested (up to dedup_rounds times).
+        """
+        def record(idea: str):
+            if self._manifest is not None:
+                self._manifest.ideas.append(idea)
+
+        def ideate(count: int, exclude: list) -> list:
+            # on the worker pool so the call is cancelled/drained with the run
+            return self._submit(self.author.ideate_many, genre, starter, count, exclude, record).result()
+
+        ideas: list = ideate(num_concepts, [])
+        for i in range(self.dedup_rounds + 1):
+            ideas = [ideas[idx] for idx in dedupe(ideas, self.dedup_threshold, max_keep=num_concepts)]
+            missing: int = num_concepts - len(ideas)
+            if missing == 0 or i == self.dedup_rounds:
+                break
+            logger.info(f"requesting {missing} replacement ideas for near duplicates")
+            ideas += ideate(missing, list(ideas))
+        return ideas
+
+    def _do_refresh_concept(self, concept_dir: Path):
+        context: StoryContext = StoryContext.unmarshall(self._load_artifact(concept_dir, "context.json"))
+        self._checkpoint(context=context)
+
+        edited: list = context.edited_fields()
+        stale: list = [name for name in context.stale_fields()
+                       if name == "summary" or getattr(context, name) is not None]
+        logger.info(f"edited fields: {edited}; recomputing: {stale}")
+        for idx, name in enumerate(stale):
+            if name == "summary":
+                summary: str = self.author.summarize_concept(context)
+                self._save_artifact(concept_dir, "summary.md", summary)
+                context.record("summary", summary)
+            else:
+                setattr(context, name, getattr(self.author, f"develop_{name}")(context))
+                context.record(name)
+            self._report_progress("refresh", idx + 1, len(stale))
+
+        # accept the hand edits as the new baseline
+        for name in edited:
+            context.record(name)
+        self._save_artifact(concept_dir, "context.json", context.marshall())
+
+    def _report_progress(self, stage: str, completed: int, total: int):
+        """
+        Forwards progress to the optional callback (e.g. the job service); never lets a callback error kill a run.
+        """
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, completed, total)
+        except Exception as e:
+            logger.warning(f"progress callback failed: {e}")
+
+    def _critique_aspects(self, context: StoryContext, fields: list[str]) -> dict[str, str]:
+        """
+        Runs the aspect critics for the given fields concurrently (so critique takes as long as the slowest aspect)
+        and returns the merged feedback per field; fields the critics are happy with are left out.
+        """
+        aspects: list[str] = [aspect for aspect, name in ASPECT_FIELDS.items() if name in fields]
+        futures: dict[str, Future] = {
+            aspect: self._submit(getattr(self.critic, f"critique_{aspect}"), context) for aspect in aspects}
+        return merge_critiques({aspect: future.result() for aspect, future in futures.items()})
+
+    def _revise(self, context: StoryContext, critiques: dict[str, str], fields: list[str]):
+        """
+        Updates the story elements based on their own feedback, in order (later elements see the revised earlier
+        ones); elements without feedback are kept. In "delta" revision mode the author edits each element; in
+        "full" mode it regenerates them.
+        """
+        for name in fields:
+            critique: str | None = critiques.get(name)
+            if critique is None:
+                logger.info(f"no feedback on the {name}; keeping it")
+                continue
+            if self.revision_mode == "delta":
+                setattr(context, name, self.author.revise_field(name, context, critique))
+            else:
+                setattr(context, name, getattr(self.author, f"develop_{name}")(context, critique=critique))
+
+    def _get_seed(self, genre: str = None, starter: str = None, num_concepts: int = None) -> (str, str, int):
+        """
+        Returns the genre, starter idea and number of concepts, only prompting the human for values not provided
+        by the caller (e.g. a queued job).
+        """
+        if genre is None:
+            genre = self.human.prompt_user(
+                self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "GENRE"]))
+        if starter is None:
+            starter = self.human.prompt_user(
+                self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "STARTER"]))
+        if num_concepts is None:
+            num_concepts = self.human.prompt_user(
+                self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "NUM_IDEAS"]))
+        return genre, starter, int(num_concepts)
+
+    def _select_idea(self, ideas: list, selection: int = None) -> (int, str):
+        """
+        Returns the (1-based) selection and idea, only prompting the human if no selection was provided.
+        """
+        if selection is None:
+            return self.human.prompt_user_select(ideas)
+        return selection, ideas[selection - 1]
+
+    def _do_develop_and_draft(self, concept_dir: Path, **kwargs):
+        context: StoryContext = self._do_develop_concept(concept_dir, summarize=False, **kwargs)
+        summary: Future = self._submit(self._summarize, concept_dir, context)
+        self._do_draft_narrative(concept_dir, context=context, **kwargs)
+        summary.result()
+
+    def _summarize(self, concept_dir: Path, context: StoryContext):
+        """
+        Writes the markdown summary of a final concept and records it in context.json.
+        """
+        summary: str = self.author.summarize_concept(context)
+        self._save_artifact(concept_dir, "summary.md", summary)
+        context.record("summary", summary)
+        self._save_artifact(concept_dir, "context.json", context.marshall())
+
+    def _select_and_start(self, ideas: list, selection: int = None) -> (int, StoryContext):
+        """
+        Returns the selected idea with a context whose plot and themes are developed. While the human is choosing,
+        the plot and themes of the first speculation_budget ideas are developed speculatively on the worker pool,
+        each with its own fork of the author; the winner's work is kept (or awaited) and the losers' forks are
+        stopped, which aborts their calls in flight.
+        """
+        if selection is not None or self.speculation_budget <= 0:
+            idx, selected_idea = self._select_idea(ideas, selection)
+            return idx, self._start_context(selected_idea)
+
+        authors: dict[str, Author] = {idea: self.author.fork() for idea in ideas[:self.speculation_budget]}
+        futures: dict[str, Future] = {idea: self._submit(self._start_context, idea, author)
+                                      for idea, author in authors.items()}
+        selected_idea: str | None = None
+        try:
+            idx, selected_idea = self._select_idea(ideas)
+        finally:
+            for idea, future in futures.items():
+                if idea != selected_idea:
+                    authors[idea].stop()
+                    future.cancel()
+                    metrics.SPECULATIONS.inc(outcome="wasted")
+        if selected_idea in futures:
+            logger.info(f"using the speculative development of idea {idx}")
+            metrics.SPECULATIONS.inc(outcome="used")
+            return idx, futures[selected_idea].result()
+        return idx, self._start_context(selected_idea)
+
+    def _start_context(self, idea: str, author: Author = None) -> StoryContext:
+        """
+        Develops the first elements of a concept (the ones that only depend on the idea), with the given author
+        (e.g. a fork that can be stopped on its own) or the conductor's.
+        """
+        author = author or self.author
+        context: StoryContext = StoryContext()
+        context.concept = idea
+        context.plot = author.develop_plot(context)
+        context.themes = author.develop_themes(context)
+        return context
+
     @abstractmethod
     def _post_init(self):
         """
@@ -99,16 +528,18 @@ class Conductor(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def _do_develop_concept(self, concept_dir: Path, **kwargs):
+    def _do_develop_concept(self, concept_dir: Path, summarize: bool = True, **kwargs) -> StoryContext:
         """
-        Override to go from rought idea to fully baked concept.
+        Override to go from rought idea to fully baked concept; returns the final context. The summary is left to
+        the caller if summarize is False.
         """
         pass
 
     @abstractmethod
     def _do_draft_narrative(self, concept_dir: Path, **kwargs):
         """
-        Override to take the concept to a full narrative.
+        Override to take the concept to a full narrative; uses kwargs["context"] if given instead of loading
+        context.json.
         """
         pass
 
@@ -129,16 +560,23 @@ class PaperbackWriter(Conductor):
             llm: ChatOllama = ChatOllama(
                 model="llama3.2",
                 temperature=0.8,
-                num_predict=256,
+                num_predict=DEFAULT_NUM_PREDICT,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                num_ctx=OLLAMA_NUM_CTX,
             )
             llm2: ChatOllama = ChatOllama(
                 model="llama3.2",
                 temperature=0.8,
-                num_predict=256,
+                num_predict=DEFAULT_NUM_PREDICT,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                num_ctx=OLLAMA_NUM_CTX,
             )
         elif self.env == 'bedrock':
             llm: ChatBedrock = ChatBedrock(model_id="anthropic.claude-3-haiku-20240307-v1:0")
             llm2: ChatBedrock = ChatBedrock(model_id="anthropic.claude-3-sonnet-20240229-v1:0")
+        elif self.env == 'fake':
+            llm: FakeChatModel = FakeChatModel(seed=1)
+            llm2: FakeChatModel = FakeChatModel(seed=2)
         else:
             raise ValueError(f"invalid environment {self.env}")
 
@@ -147,21 +585,39 @@ class PaperbackWriter(Conductor):
             llm=llm,
             prompt_manager=self.prompt_manager,
             creative_mode=self.creative_mode,
-            identity_prompt_preamble="You are a thoughtful and skilled fiction writer."
+            identity_prompt_preamble="You are a thoughtful and skilled fiction writer.",
+            scheduler=self.scheduler,
+            project=self.project,
+            streaming=True,
+            prompt_caching=self.prompt_caching,
+            single_flight=self.single_flight,
+            coalesce_sampled=self.coalesce_sampled
         )
 
         self.critic = Critic(
             llm=llm2,
             prompt_manager=self.prompt_manager,
             creative_mode=self.creative_mode,
-            identity_prompt_preamble="You are a thoughtful and skilled literary critic who likes to help writers improve."
+            identity_prompt_preamble="You are a thoughtful and skilled literary critic who likes to help writers improve.",
+            scheduler=self.scheduler,
+            project=self.project,
+            streaming=True,
+            prompt_caching=self.prompt_caching,
+            single_flight=self.single_flight,
+            coalesce_sampled=self.coalesce_sampled
         )
 
         self.editor = Editor(
             llm=llm2,
             prompt_manager=self.prompt_manager,
             creative_mode=self.creative_mode,
-            identity_prompt_preamble="You are a skilled editor who helps writers refine their work."
+            identity_prompt_preamble="You are a skilled editor who helps writers refine their work.",
+            scheduler=self.scheduler,
+            project=self.project,
+            streaming=True,
+            prompt_caching=self.prompt_caching,
+            single_flight=self.single_flight,
+            coalesce_sampled=self.coalesce_sampled
         )
 
         self.human = Human(
@@ -169,7 +625,7 @@ class PaperbackWriter(Conductor):
             creative_mode=self.creative_mode
         )
 
-    def _do_develop_concept(self, concept_dir: Path, **kwargs):
+    def _do_develop_concept(self, concept_dir: Path, summarize: bool = True, **kwargs) -> StoryContext:
         """
         Order of operations
         - Get starter idea from human
@@ -185,75 +641,165 @@ class PaperbackWriter(Conductor):
         - Update all of the above
         """
 
-        # get seed ideas and genre from the human
-        genre: str = self.human.prompt_user(
-            self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "GENRE"]))
-        starter: str = self.human.prompt_user(
-            self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "STARTER"]))
-        num_concepts: int = int(self.human.prompt_user(
-            self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "NUM_IDEAS"])))
+        # get seed ideas and genre from the human (unless provided by the caller)
+        genre, starter, num_concepts = self._get_seed(kwargs.get("genre"), kwargs.get("starter"),
+                                                      kwargs.get("num_concepts"))
 
         # generate ideas
-        futures: list[Future] = []
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            for i in range(num_concepts):
-                futures.append(executor.submit(self.author.ideate, genre, starter))
-        ideas: list = [f.result() for f in futures]
+        ideas: list = self._generate_ideas(genre, starter, num_concepts)
 
         # human selects idea to work with
-        idx, selected_idea = self.human.prompt_user_select(ideas)
+        # (the plot and themes of the leading ideas are developed speculatively while the human decides)
+        idx, context = self._select_and_start(ideas, kwargs.get("selection"))
+        self._checkpoint(context=context)
 
-        # generate all of the elements of the story
-        context: StoryContext = StoryContext()
-        context.concept = selected_idea
-        context.plot = self.author.develop_plot(context)
-        context.themes = self.author.develop_themes(context)
+        # generate the rest of the elements of the story
         context.characters = self.author.develop_characters(context)
         context.world = self.author.develop_world(context)
         context.storyline = self.author.develop_storyline(context)
 
         # output context (in progress)
-        with open(concept_dir / "concept.json", "w") as f:
-            f.write(context.marshall())
+        self._save_artifact(concept_dir, "concept.json", context.marshall())
+        self._report_progress("develop", 1, 3)
 
-        # critique the first pass
-        critique: str = self.critic.critique_concept(context)
+        # critique the first pass, one aspect at a time (concurrently)
+        revised_fields: list[str] = ["plot", "characters", "world", "storyline"]
+        critiques: dict[str, str] = self._critique_aspects(context, revised_fields)
 
-        # update the story elements based on the critique
-        context.plot = self.author.develop_plot(context, critique=critique)
-        context.characters = self.author.develop_characters(context, critique=critique)
-        context.world = self.author.develop_world(context, critique=critique)
-        context.storyline = self.author.develop_storyline(context, critique=critique)
+        # update each story element based on its own critique
+        self._revise(context, critiques, revised_fields)
 
         # output context (final)
-        with open(concept_dir / "context.json", "w") as f:
-            f.write(context.marshall())
+        context.record_all()
+        self._save_artifact(concept_dir, "context.json", context.marshall())
+        self._report_progress("develop", 2, 3)
 
         # generate a markdown summary
-        summary: str = self.author.summarize_concept(context)
-        with open(concept_dir / "summary.md", "w") as f:
-            f.write(summary)
-
-    def _write_chapter(self, context: StoryContext, pages_per_chapter: int, words_per_page: int,
-                       previous_chapter_summaries: list) -> str:
+        if summarize:
+            self._summarize(concept_dir, context)
+            self._report_progress("develop", 3, 3)
+        return context
+
+    def _write_chapter(self, context: StoryContext, narrative: NarrativeWriter, pages_per_chapter: int,
+                       words_per_page: int, previous_chapter_summaries: list, bible_index: BibleIndex = None,
+                       chapter_num: int = 1, num_chapters: int = 1, bible_token_budget: int = 0,
+                       continuity: ContinuityIndex = None, planner: DeadlinePlanner = None,
+                       sampler: BestOfSampler = None) -> dict:
         """
-        Experimental; writes the next section of the doc.
+        Experimental; writes the next section of the doc, streaming each page to the narrative as it is written.
+        Returns the chapter's index entry.
+        If a bible index is provided, the pages only get the bible excerpts relevant to the chapter's part of the
+        storyline, within bible_token_budget tokens. They're selected once per chapter so the prompt prefix they
+        go in stays byte-identical (and cached) across the chapter's pages.
+        If a continuity index is provided, each page also gets the few most relevant passages from earlier
+        chapters, and the new pages are added to the index.
+        If a deadline planner is provided, each page is timed for its forecasts.
+        If a best-of sampler is provided, the key pages (the chapter's first and last) are written as several
+        candidates at once and the best is kept.
         """
+        # the summaries are compressed as the book grows so the context per page stays bounded
         book_summary = "".join(
-            [f"Chapter {idx + 1}: {chapter}\n" for idx, chapter in enumerate(previous_chapter_summaries)])
+            [f"Chapter {idx + 1}: {chapter}\n" for idx, chapter in
+             enumerate(running_summary(previous_chapter_summaries))])
+        beats: str = bible_index.storyline_window(chapter_num, num_chapters) if bible_index else ""
+        bible: str | None = bible_index.select(beats, bible_token_budget) if bible_index is not None else None
         # first pass
-        pages: list = []
-        for page in range(1, pages_per_chapter + 1):
-            chapter_so_far: str = "".join([f"{p}\n" for idx, p in enumerate(pages)])
-            pages.append(self.author.write_section(context, words_per_page, page, pages_per_chapter, chapter_so_far,
-                                                   book_summary))
-        chapter: str = " ".join(pages)
-        return chapter
+        narrative.begin(chapter_num)
+        try:
+            for page in range(1, pages_per_chapter + 1):
+                # read back from disk by offset rather than keeping the pages around
+                chapter_so_far: str = "".join([f"{p}\n" for p in narrative.read_pages()])
+                query: str = f"{beats}\n" + " ".join(chapter_so_far.split()[-RETRIEVAL_QUERY_WORDS:])
+                extended_context: str = book_summary
+                if continuity is not None:
+                    recalled: list = continuity.query(query, k=CONTINUITY_PASSAGES, before_chapter=chapter_num)
+                    if recalled:
+                        extended_context += "\nRelevant passages from earlier chapters:\n" + continuity.format(recalled)
+                started: float = time.monotonic()
+                write: Callable[[Author], str] = lambda author: author.write_section(
+                    context, words_per_page, page, pages_per_chapter, chapter_so_far, extended_context, bible=bible)
+                if sampler is not None and page in (1, pages_per_chapter):
+                    content: str = sampler.sample(self.author, write, words_per_page)
+                else:
+                    content = write(self.author)
+                if planner is not None:
+                    planner.observe(len(content.split()), time.monotonic() - started)
+                narrative.write_page(content)
+                metrics.PAGES_DRAFTED.inc(mode=self.creative_mode.value)
+                if continuity is not None:
+                    continuity.add_page(chapter_num, page, content)
+        except BaseException:
+            narrative.close()
+            raise
+        return narrative.end()
+
+    def _write_chapters(self, context: StoryContext, narrative: NarrativeWriter, concept_dir: Path,
+                        chapters: list[int], plan: DraftPlan, previous_chapter_summaries: list, **kwargs):
+        """
+        Writes consecutive chapters with the plan's page size and count. A single chapter is streamed straight to
+        the narrative; several are written concurrently, each to its own scratch narrative (without the others'
+        summaries), and then added to the narrative in order.
+        """
+        if len(chapters) == 1:
+            self._write_chapter(context, narrative, plan.pages_per_chapter, plan.words_per_page,
+                                previous_chapter_summaries, chapter_num=chapters[0], **kwargs)
+            return
+        scratch_dir: Path = concept_dir / ".drafting"
+        writers: list[NarrativeWriter] = []
+        futures: list[Future] = []
+        for chapter in chapters:
+            directory: Path = scratch_dir / f"chapter_{chapter}"
+            directory.mkdir(parents=True, exist_ok=True)
+            writers.append(NarrativeWriter(directory))
+            futures.append(self._submit(self._write_chapter, context, writers[-1], plan.pages_per_chapter,
+                                        plan.words_per_page, previous_chapter_summaries, chapter_num=chapter,
+                                        **kwargs))
+        for future in futures:
+            future.result()
+        for chapter, writer in zip(chapters, writers):
+            narrative.begin(chapter)
+            for page in writer.read_pages(chapter):
+                narrative.write_page(page)
+            narrative.end()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    def _fast_llm(self) -> BaseChatModel | None:
+        """
+        A faster model for the author to switch to if a deadline can't be met otherwise (None if there isn't one;
+        on Bedrock the author already uses the fastest model).
+        """
+        if self.env == 'local':
+            return ChatOllama(
+                model=FAST_OLLAMA_MODEL,
+                temperature=0.8,
+                num_predict=DEFAULT_NUM_PREDICT,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                num_ctx=OLLAMA_NUM_CTX,
+            )
+        return None
+
+    def _add_chapter_summary(self, chapter_summaries: list, context: StoryContext, text: str, chapter_num: int,
+                             summarizer: str):
+        """
+        Summarizes a finished chapter for the pages of later chapters: extractively (local, no LLM call), with the
+        LLM, or not at all.
+        """
+        if summarizer == "none":
+            return
+        if summarizer == "llm":
+            summary: str = self.author.summarize_chapter(context, text, chapter_num, CHAPTER_SUMMARY_WORDS)
+        else:
+            summary = extractive_summary(text, CHAPTER_SUMMARY_WORDS)
+        chapter_summaries.append(summary)
 
     def _do_draft_narrative(self, concept_dir: Path, **kwargs):
         """
         Experimental; turns the concept into a full narrative. Works well for a single chapter, but struggling to
         keep continuity and flow across sections and chapters.
+        With a deadline (kwargs["deadline"], a datetime), the pages are timed and before each chapter the plan for
+        the rest is adapted if it's forecast to miss the deadline (see DeadlinePlanner).
+        With best_of > 1 (kwargs["best_of"]), each chapter's first and last page are written as that many candidates
+        at once and the best is kept (see BestOfSampler).
         """
 
         logger.info(f"draft narrative for {concept_dir}")
@@ -262,19 +808,82 @@ class PaperbackWriter(Conductor):
         words_per_page: int = 250
         pages_per_chapter: int = num_pages // num_chapters
 
-        with open(concept_dir / "context.json", "r") as f:
-            context = StoryContext.unmarshall(f.read())
+        context: StoryContext = kwargs.get("context") or \
+            StoryContext.unmarshall(self._load_artifact(concept_dir, "context.json"))
+
+        # only send the relevant parts of the story bible with each page (0 sends the whole bible)
+        bible_token_budget: int = kwargs.get("bible_token_budget", DEFAULT_BIBLE_TOKEN_BUDGET)
+        # (the core of the bible is sent whole in the cacheable prompt prefix, so only the rest is retrieved)
+        bible_index: BibleIndex | None = BibleIndex(context, always_include=[], exclude=BIBLE_CORE_FIELDS) \
+            if bible_token_budget > 0 else None
+        continuity: ContinuityIndex = ContinuityIndex()
+
+        # pages are streamed to the chapter files and full_narrative.txt as they are written
+        resume: bool = kwargs.get("resume", False)
+        narrative: NarrativeWriter = NarrativeWriter(concept_dir, "full_narrative.txt", section="chapter",
+                                                     resume=resume)
+        store: ArtifactStore = self._artifact_store(concept_dir)
+        summarizer: str = kwargs.get("summarizer", DEFAULT_SUMMARIZER)
+        if summarizer not in SUMMARIZERS:
+            raise ValueError(f"invalid summarizer {summarizer}")
+        plan: DraftPlan = DraftPlan(words_per_page, pages_per_chapter)
+        deadline: datetime | None = kwargs.get("deadline")
+        fast_llm: BaseChatModel | None = self._fast_llm() if deadline is not None else None
+        planner: DeadlinePlanner | None = None
+        if deadline is not None:
+            planner = DeadlinePlanner(deadline.timestamp(), fast_model_available=fast_llm is not None)
+        best_of: int = kwargs.get("best_of", 1)
+        sampler: BestOfSampler | None = BestOfSampler(best_of) if best_of > 1 else None
+
+        def finished(number: int) -> bool:
+            return resume and (narrative.is_complete(number) or
+                               self._has_artifact(concept_dir, narrative.section_name(number)))
 
         chapter_summaries: list = []
-        chapters: list = []
-        for chapter in range(1, num_chapters + 1):
-            content: str = self._write_chapter(context, pages_per_chapter, words_per_page, chapter_summaries)
-            chapters.append(content)
-            with open(concept_dir / f"chapter_{chapter}.txt", "w") as f:
-                f.write(content)
-
-        with open(concept_dir / f"full_narrative.txt", "w") as f:
-            f.write("\n\n".join(chapters))
+        chapter: int = 1
+        while chapter <= num_chapters:
+            chapter_name: str = narrative.section_name(chapter)
+            batch: list[int] = [chapter]
+            if resume and narrative.is_complete(chapter):
+                # chapter finished in a previous (interrupted) run
+                logger.info(f"resuming: reusing {chapter_name}")
+                text: str = narrative.read(chapter)
+                continuity.add_page(chapter, 0, text)
+                self._add_chapter_summary(chapter_summaries, context, text, chapter, summarizer)
+                self._report_progress("draft", chapter, num_chapters)
+                chapter += 1
+                continue
+            if resume and self._has_artifact(concept_dir, chapter_name):
+                # finished in a run without the narrative index (or only kept in the store)
+                logger.info(f"resuming: re-adding {chapter_name}")
+                text = self._load_artifact(concept_dir, chapter_name)
+                narrative.begin(chapter)
+                narrative.write_page(text)
+                narrative.end()
+                continuity.add_page(chapter, 0, text)
+            else:
+                if planner is not None:
+                    adapted: DraftPlan = planner.adapt(plan, num_chapters - chapter + 1)
+                    if adapted.fast_model and not plan.fast_model:
+                        self.author.use_llm(fast_llm)
+                    plan = adapted
+                while len(batch) < plan.concurrency and batch[-1] < num_chapters and not finished(batch[-1] + 1):
+                    batch.append(batch[-1] + 1)
+                self._write_chapters(context, narrative, concept_dir, batch, plan, list(chapter_summaries),
+                                     bible_index=bible_index, num_chapters=num_chapters,
+                                     bible_token_budget=bible_token_budget, continuity=continuity, planner=planner,
+                                     sampler=sampler)
+            for number in batch:
+                self._add_chapter_summary(chapter_summaries, context, narrative.read(number), number, summarizer)
+                store.put_file(narrative.section_name(number), narrative.section_path(number))
+                self._report_progress("draft", number, num_chapters)
+            chapter = batch[-1] + 1
+        if sampler is not None:
+            logger.info(f"best-of: {sampler.stats.describe()}")
+
+        # the full narrative references the chapter blobs rather than storing the text twice
+        store.put_composite("full_narrative.txt", [narrative.section_name(c) for c in range(1, num_chapters + 1)],
+                            path=narrative.path)
 
 
 class HistoryPodcaster(Conductor):
@@ -292,16 +901,23 @@ class HistoryPodcaster(Conductor):
             llm: ChatOllama = ChatOllama(
                 model="llama3.2",
                 temperature=0.8,
-                num_predict=256,
+                num_predict=DEFAULT_NUM_PREDICT,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                num_ctx=OLLAMA_NUM_CTX,
             )
             llm2: ChatOllama = ChatOllama(
                 model="llama3.2",
                 temperature=0.8,
-                num_predict=256,
+                num_predict=DEFAULT_NUM_PREDICT,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                num_ctx=OLLAMA_NUM_CTX,
             )
         elif self.env == 'bedrock':
             llm: ChatBedrock = ChatBedrock(model_id="anthropic.claude-3-haiku-20240307-v1:0")
             llm2: ChatBedrock = ChatBedrock(model_id="anthropic.claude-3-sonnet-20240229-v1:0")
+        elif self.env == 'fake':
+            llm: FakeChatModel = FakeChatModel(seed=1)
+            llm2: FakeChatModel = FakeChatModel(seed=2)
         else:
             raise ValueError(f"invalid environment {self.env}")
 
@@ -310,21 +926,39 @@ class HistoryPodcaster(Conductor):
             llm=llm,
             prompt_manager=self.prompt_manager,
             creative_mode=self.creative_mode,
-            identity_prompt_preamble="You are the assistant to a creative podcast producer."
+            identity_prompt_preamble="You are the assistant to a creative podcast producer.",
+            scheduler=self.scheduler,
+            project=self.project,
+            streaming=True,
+            prompt_caching=self.prompt_caching,
+            single_flight=self.single_flight,
+            coalesce_sampled=self.coalesce_sampled
         )
 
         self.critic = Critic(
             llm=llm2,
             prompt_manager=self.prompt_manager,
             creative_mode=self.creative_mode,
-            identity_prompt_preamble="You are a thoughtful and skilled critic on podcasts."
+            identity_prompt_preamble="You are a thoughtful and skilled critic on podcasts.",
+            scheduler=self.scheduler,
+            project=self.project,
+            streaming=True,
+            prompt_caching=self.prompt_caching,
+            single_flight=self.single_flight,
+            coalesce_sampled=self.coalesce_sampled
         )
 
         self.editor = Editor(
             llm=llm2,
             prompt_manager=self.prompt_manager,
             creative_mode=self.creative_mode,
-            identity_prompt_preamble="You are the assistant to a creative podcast producer."
+            identity_prompt_preamble="You are the assistant to a creative podcast producer.",
+            scheduler=self.scheduler,
+            project=self.project,
+            streaming=True,
+            prompt_caching=self.prompt_caching,
+            single_flight=self.single_flight,
+            coalesce_sampled=self.coalesce_sampled
         )
 
         self.human = Human(
@@ -332,71 +966,91 @@ class HistoryPodcaster(Conductor):
             creative_mode=self.creative_mode,
         )
 
-    def _do_develop_concept(self, concept_dir: Path, **kwargs):
-        genre: str = self.human.prompt_user(self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "GENRE"])).get()
-        # genre: str = "historical battles"
-        starter: str = self.human.prompt_user(
-            self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "STARTER"]))
-        num_concepts: int = int(self.human.prompt_user(
-            self.prompt_manager.get_prompt([self.creative_mode.value, "HUMAN", "NUM_IDEAS"])))
-
-        futures: list = []
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            for i in range(num_concepts):
-                futures.append(executor.submit(self.author.ideate, genre, starter))
-        ideas: list = [f.get() for f in futures]
-        idx, selected_idea = self.human.prompt_user_select(ideas)
+    def _do_develop_concept(self, concept_dir: Path, summarize: bool = True, **kwargs) -> StoryContext:
+        genre, starter, num_concepts = self._get_seed(kwargs.get("genre"), kwargs.get("starter"),
+                                                      kwargs.get("num_concepts"))
 
-        context: StoryContext = StoryContext()
-        context.concept = selected_idea
-        context.plot = self.author.develop_plot(context)
-        context.themes = self.author.develop_themes(context)
+        ideas: list = self._generate_ideas(genre, starter, num_concepts)
+        idx, context = self._select_and_start(ideas, kwargs.get("selection"))
+        self._checkpoint(context=context)
         context.characters = self.author.develop_characters(context)
         # context.world = self.author.develop_world(context)
         context.storyline = self.author.develop_storyline(context)
 
         # output context
-        with open(concept_dir / "concept.json", "w") as f:
-            f.write(context.marshall())
+        self._save_artifact(concept_dir, "concept.json", context.marshall())
 
-        critique: str = self.critic.critique_concept(context)
-        context.plot = self.author.develop_plot(context, critique=critique)
-        context.characters = self.author.develop_characters(context, critique=critique)
-        # context.world = self.author.develop_world(context, critique=critique)
-        context.storyline = self.author.develop_storyline(context, critique=critique)
+        revised_fields: list[str] = ["plot", "characters", "storyline"]
+        critiques: dict[str, str] = self._critique_aspects(context, revised_fields)
+        self._revise(context, critiques, revised_fields)
 
         # output context
-        with open(concept_dir / "context.json", "w") as f:
-            f.write(context.marshall())
-
-        summary: str = self.author.summarize_concept(context)
-
-        # output summary
-        with open(concept_dir / "summary.md", "w") as f:
-            f.write(summary)
-
-    def _write_segment(self, context: StoryContext, num_words: int, previous_segment_summaries: list) -> str:
-        full_summary = "".join(
-            [f"Segment {idx + 1}: {segment}\n" for idx, segment in enumerate(previous_segment_summaries)])
-        # first pass
-        content = self.author.write_section(context, num_words, 1, 1, "", full_summary)
+        context.record_all()
+        self._save_artifact(concept_dir, "context.json", context.marshall())
+
+        if summarize:
+            self._summarize(concept_dir, context)
+        return context
+
+    def _write_segment(self, context: StoryContext, num_words: int, plan: list[str], segment_num: int,
+                       previous_ending: str = "") -> str:
+        plan_text: str = "".join(f"Segment {idx + 1}: {topic}\n" for idx, topic in enumerate(plan))
+        plan_text += f"\nYou're writing segment {segment_num}: {plan[segment_num - 1]}\n"
+        if previous_ending:
+            plan_text += f"\nThe previous segment ended with:\n{previous_ending}\n"
+        content: str = self.author.write_section(context, num_words, segment_num, len(plan), "", plan_text)
+        metrics.PAGES_DRAFTED.inc(mode=self.creative_mode.value)
         return content
 
     def _do_draft_narrative(self, concept_dir: Path, **kwargs):
+        """
+        Plans the segments from the storyline up front, writes them concurrently (each with the whole plan as
+        context) and then bridges adjacent segments with short transitions, also concurrently, so an episode takes
+        about as long as its slowest segment. With concurrent_segments=False the segments are written in order,
+        each following on from the end of the previous one, and need no transitions.
+        """
         logger.info(f"draft narrative for {concept_dir}")
         num_segments: int = 4
         words_per_segment: int = 1000
-
-        with open(concept_dir / "context.json", "r") as f:
-            context = StoryContext.unmarshall(f.read())
-
-        segment_summaries: list = []
-        segments: list = []
-        for chapter in range(1, num_segments + 1):
-            content: str = self._write_segment(context, words_per_segment, segment_summaries)
-            segments.append(content)
-            with open(concept_dir / f"segment_{chapter}.txt", "w") as f:
-                f.write(content)
-
-        with open(concept_dir / f"podcast.txt", "w") as f:
-            f.write("\n\n".join(segments))
+        concurrent: bool = kwargs.get("concurrent_segments", True)
+
+        context: StoryContext = kwargs.get("context") or \
+            StoryContext.unmarshall(self._load_artifact(concept_dir, "context.json"))
+
+        plan: list[str] = self.author.plan_segments(context, num_segments)
+        if len(plan) < num_segments:
+            logger.warning(f"segment plan has {len(plan)} of {num_segments} segments")
+        num_segments = len(plan)
+
+        segments: list[str] = []
+        transitions: list[str | None] = [None] * num_segments
+        if concurrent:
+            futures: list[Future] = [self._submit(self._write_segment, context, words_per_segment, plan, segment)
+                                     for segment in range(1, num_segments + 1)]
+            for segment, future in enumerate(futures, start=1):
+                segments.append(future.result())
+                self._report_progress("draft", segment, num_segments)
+            bridges: list[Future] = [
+                self._submit(self.author.write_transition, context, _last_words(segments[idx - 1]),
+                             _first_words(segments[idx]), idx, TRANSITION_WORDS)
+                for idx in range(1, num_segments)]
+            transitions[1:] = [future.result() for future in bridges]
+        else:
+            for segment in range(1, num_segments + 1):
+                previous_ending: str = _last_words(segments[-1]) if segments else ""
+                segments.append(self._write_segment(context, words_per_segment, plan, segment, previous_ending))
+                self._report_progress("draft", segment, num_segments)
+
+        narrative: NarrativeWriter = NarrativeWriter(concept_dir, "podcast.txt", section="segment")
+        store: ArtifactStore = self._artifact_store(concept_dir)
+        for segment, content in enumerate(segments, start=1):
+            narrative.begin(segment)
+            # the transition into a segment opens it
+            if transitions[segment - 1]:
+                narrative.write_page(transitions[segment - 1])
+            narrative.write_page(content)
+            narrative.end()
+            store.put_file(narrative.section_name(segment), narrative.section_path(segment))
+
+        store.put_composite("podcast.txt", [narrative.section_name(s) for s in range(1, num_segments + 1)],
+                            path=narrative.path)
@@ -0,0 +1,105 @@
+import logging
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from logging import Logger
+from typing import Dict, List, Set
+
+import numpy as np
+
+from src.retrieval import HashingVectorizer, STOPWORDS, chunk_text
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+# capitalized words (and runs of them) that aren't just sentence openers like "The" or "She"
+ENTITY_PATTERN: re.Pattern = re.compile(r"\b[A-Z][a-z']+(?:\s+[A-Z][a-z']+)*\b")
+ENTITY_BOOST: float = 0.1
+
+
+@dataclass
+class Passage:
+    chapter: int
+    page: int
+    text: str
+    entities: Set[str]
+
+
+def extract_entities(text: str) -> Set[str]:
+    entities: Set[str] = set()
+    for match in ENTITY_PATTERN.findall(text):
+        words: List[str] = match.split()
+        while words and words[0].lower() in STOPWORDS:
+            words.pop(0)
+        if words:
+            entities.add(" ".join(words))
+    return entities
+
+
+class ContinuityIndex:
+    """
+    Incrementally updated index over everything drafted so far. Lets a page pull in the handful of earlier
+    passages that matter (same characters, places, objects) instead of resending ever-growing context. Safe to
+    update and query from concurrently drafted chapters.
+    """
+
+    def __init__(self, passage_words: int = 80, vectorizer: HashingVectorizer = None):
+        self.passage_words: int = passage_words
+        self.vectorizer: HashingVectorizer = vectorizer or HashingVectorizer(n_features=2 ** 12)
+        self.passages: List[Passage] = []
+        self.entities: Dict[str, List[int]] = defaultdict(list)
+        self._vectors: np.ndarray = np.zeros((64, self.vectorizer.n_features), dtype=np.float32)
+        self._lock: threading.Lock = threading.Lock()
+
+    def add_page(self, chapter: int, page: int, text: str):
+        texts: List[str] = chunk_text(text, self.passage_words)
+        if not texts:
+            return
+        vectors: np.ndarray = self.vectorizer.transform(texts)
+        with self._lock:
+            self._add(chapter, page, texts, vectors)
+
+    def _add(self, chapter: int, page: int, texts: List[str], vectors: np.ndarray):
+        needed: int = len(self.passages) + len(texts)
+        if needed > self._vectors.shape[0]:
+            grown: np.ndarray = np.zeros((max(needed, 2 * self._vectors.shape[0]), self._vectors.shape[1]),
+                                         dtype=np.float32)
+            grown[:len(self.passages)] = self._vectors[:len(self.passages)]
+            self._vectors = grown
+        self._vectors[len(self.passages):needed] = vectors
+        for passage_text in texts:
+            passage: Passage = Passage(chapter, page, passage_text, extract_entities(passage_text))
+            for entity in passage.entities:
+                self.entities[entity].append(len(self.passages))
+            self.passages.append(passage)
+
+    def facts(self, entity: str) -> List[Passage]:
+        """
+        All passages that mention an entity, in narrative order.
+        """
+        return [self.passages[i] for i in self.entities.get(entity, [])]
+
+    def query(self, text: str, k: int = 4, before_chapter: int = None) -> List[Passage]:
+        """
+        Returns up to k passages most similar to the text (with a boost for shared entities), optionally only
+        from chapters before before_chapter. Results are in narrative order.
+        """
+        query: np.ndarray = self.vectorizer.transform([text])[0]
+        with self._lock:
+            candidates: np.ndarray = np.arange(len(self.passages))
+            if before_chapter is not None:
+                candidates = np.array([i for i in candidates if self.passages[i].chapter < before_chapter],
+                                      dtype=int)
+            if len(candidates) == 0:
+                return []
+            scores: np.ndarray = self._vectors[candidates] @ query
+        query_entities: Set[str] = extract_entities(text)
+        if query_entities:
+            scores += ENTITY_BOOST * np.array([len(self.passages[i].entities & query_entities) for i in candidates])
+        best: np.ndarray = np.argsort(-scores, kind="stable")[:k]
+        best = best[scores[best] > 0]
+        return [self.passages[i] for i in sorted(candidates[best])]
+
+    @staticmethod
+    def format(passages: List[Passage]) -> str:
+        return "\n".join(f"(Chapter {p.chapter}) {p.text}" for p in passages)
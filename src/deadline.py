@@ -0,0 +1,146 @@
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, replace
+from logging import Logger
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+# how far drafting may adapt to meet a deadline
+MAX_WORDS_PER_PAGE: int = 1000
+MAX_CHAPTER_CONCURRENCY: int = 4
+# assumed speedup of the faster model until its own pages have been timed
+FAST_MODEL_SPEEDUP: float = 2.0
+# share of a page's time taken to be per call overhead (latency, prompt processing) as long as all timed pages
+# have the same length, so overhead and generation time can't be told apart
+OVERHEAD_SHARE: float = 0.3
+# pages timed before forecasting
+MIN_OBSERVATIONS: int = 3
+
+
+@dataclass
+class DraftPlan:
+    """
+    How the rest of a narrative is drafted: page size and count per chapter, chapters drafted at once, and
+    whether the faster model is used.
+    """
+    words_per_page: int
+    pages_per_chapter: int
+    concurrency: int = 1
+    fast_model: bool = False
+
+    def describe(self) -> str:
+        return (f"{self.pages_per_chapter} pages of {self.words_per_page} words per chapter, "
+                f"{self.concurrency} chapter(s) at a time{', fast model' if self.fast_model else ''}")
+
+
+class DeadlinePlanner:
+    """
+    Forecasts when drafting will finish from the timed pages so far (a page takes a fixed overhead plus a time
+    per word, fitted to the observations) and adapts the plan when the forecast misses the deadline. Changes are
+    tried least intrusive first, until the forecast fits:
+    - fewer, longer pages per chapter (the same words in fewer calls)
+    - several chapters drafted at once (they don't see each other's summaries)
+    - the faster model
+    The plan is never scaled back, so it doesn't flap between chapters. Every decision is logged.
+    """
+
+    def __init__(self, deadline: float, fast_model_available: bool = False,
+                 max_words_per_page: int = MAX_WORDS_PER_PAGE, max_concurrency: int = MAX_CHAPTER_CONCURRENCY):
+        self.deadline: float = deadline
+        self.fast_model_available: bool = fast_model_available
+        self.max_words_per_page: int = max_words_per_page
+        self.max_concurrency: int = max_concurrency
+        self.decisions: List[str] = []
+        self._samples: List[Tuple[int, float]] = []
+        self._timing_fast_model: bool = False
+        self._lock: threading.Lock = threading.Lock()
+
+    def observe(self, words: int, seconds: float):
+        """
+        Records a drafted page (safe to call from concurrently drafted chapters).
+        """
+        with self._lock:
+            self._samples.append((words, seconds))
+
+    def page_seconds(self, words: int) -> float | None:
+        with self._lock:
+            samples: List[Tuple[int, float]] = list(self._samples)
+        if len(samples) < MIN_OBSERVATIONS:
+            return None
+        lengths: np.ndarray = np.array([w for w, _ in samples], dtype=float)
+        durations: np.ndarray = np.array([s for _, s in samples], dtype=float)
+        per_word: float = 0.0
+        if np.ptp(lengths) > 0:
+            per_word, overhead = np.polyfit(lengths, durations, 1)
+        if per_word <= 0:
+            mean: float = float(durations.mean())
+            overhead = OVERHEAD_SHARE * mean
+            per_word = (1 - OVERHEAD_SHARE) * mean / max(float(lengths.mean()), 1.0)
+        return max(float(overhead), 0.0) + float(per_word) * words
+
+    def forecast(self, plan: DraftPlan, chapters_left: int) -> float | None:
+        """
+        Seconds to draft the remaining chapters with the plan, or None before enough pages were timed.
+        """
+        page: float | None = self.page_seconds(plan.words_per_page)
+        if page is None:
+            return None
+        chapter: float = page * plan.pages_per_chapter
+        if plan.fast_model and not self._timing_fast_model:
+            chapter /= FAST_MODEL_SPEEDUP
+        return math.ceil(chapters_left / plan.concurrency) * chapter
+
+    def adapt(self, plan: DraftPlan, chapters_left: int) -> DraftPlan:
+        """
+        Returns the plan for the remaining chapters: unchanged if it's forecast to finish in time (or can't be
+        forecast yet), otherwise the least intrusive plan that is (or the most aggressive one).
+        """
+        time_left: float = self.deadline - time.time()
+        forecast: float | None = self.forecast(plan, chapters_left)
+        if forecast is None:
+            return plan
+        if forecast <= time_left:
+            logger.info(f"deadline: on track, {chapters_left} chapters forecast to take {forecast / 60:.1f} of the "
+                        f"{time_left / 60:.1f} minutes left")
+            return plan
+
+        adapted: DraftPlan = plan
+        adapted_forecast: float = forecast
+        for candidate in self._escalations(plan):
+            adapted, adapted_forecast = candidate, self.forecast(candidate, chapters_left)
+            if adapted_forecast <= time_left:
+                break
+        if adapted == plan:
+            logger.warning(f"deadline: {chapters_left} chapters forecast to take {forecast / 60:.1f} minutes with "
+                           f"{time_left / 60:.1f} left and nothing left to adapt")
+            return plan
+        decision: str = (f"{chapters_left} chapters forecast to take {forecast / 60:.1f} minutes with "
+                         f"{time_left / 60:.1f} left; switching to {adapted.describe()} "
+                         f"(forecast {adapted_forecast / 60:.1f} minutes)")
+        self.decisions.append(decision)
+        if adapted_forecast <= time_left:
+            logger.info(f"deadline: {decision}")
+        else:
+            logger.warning(f"deadline: {decision}, which still misses the deadline")
+        if adapted.fast_model and not plan.fast_model:
+            # the timings so far are the other model's
+            with self._lock:
+                self._samples.clear()
+            self._timing_fast_model = True
+        return adapted
+
+    def _escalations(self, plan: DraftPlan) -> Iterator[DraftPlan]:
+        while plan.words_per_page * 2 <= self.max_words_per_page and plan.pages_per_chapter > 1:
+            plan = replace(plan, words_per_page=plan.words_per_page * 2,
+                           pages_per_chapter=math.ceil(plan.pages_per_chapter / 2))
+            yield plan
+        while plan.concurrency < self.max_concurrency:
+            plan = replace(plan, concurrency=min(plan.concurrency * 2, self.max_concurrency))
+            yield plan
+        if self.fast_model_available and not plan.fast_model:
+            yield replace(plan, fast_model=True)
@@ -0,0 +1,51 @@
+import logging
+from logging import Logger
+from typing import List
+
+import numpy as np
+
+from src.retrieval import HashingVectorizer
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+
+def similarity_matrix(texts: List[str], vectorizer: HashingVectorizer = None) -> np.ndarray:
+    """
+    Pairwise cosine similarity of hashed TF-IDF vectors, with IDF computed over the texts themselves so words
+    every idea shares (e.g. the genre) don't make everything look alike.
+    """
+    vectorizer = vectorizer or HashingVectorizer(n_features=2 ** 12)
+    tf: np.ndarray = vectorizer.transform(texts)
+    df: np.ndarray = (tf > 0).sum(axis=0)
+    idf: np.ndarray = np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0
+    vectors: np.ndarray = tf * idf
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    return vectors @ vectors.T
+
+
+def dedupe(texts: List[str], threshold: float = 0.7, max_keep: int = None) -> List[int]:
+    """
+    Returns the indices (in original order) of texts to keep: each text whose similarity to an already kept text
+    is >= threshold is dropped as a near duplicate. If more than max_keep survive, the most mutually diverse
+    max_keep are kept (greedy farthest point selection).
+    """
+    if not texts:
+        return []
+    sim: np.ndarray = similarity_matrix(texts)
+    kept: List[int] = []
+    for idx in range(len(texts)):
+        if not kept or sim[idx, kept].max() < threshold:
+            kept.append(idx)
+
+    if max_keep is not None and len(kept) > max_keep:
+        selected: List[int] = [kept[0]]
+        remaining: List[int] = kept[1:]
+        while len(selected) < max_keep:
+            # the candidate least similar to anything already selected
+            closest: np.ndarray = sim[np.ix_(remaining, selected)].max(axis=1)
+            selected.append(remaining.pop(int(closest.argmin())))
+        kept = sorted(selected)
+
+    if len(kept) < len(texts):
+        logger.info(f"kept {len(kept)} of {len(texts)} ideas after deduplication")
+    return kept
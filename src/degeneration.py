@@ -0,0 +1,113 @@
+import re
+from typing import Dict, List, Tuple
+
+# a phrase of NGRAM_WORDS words seen MAX_REPEATS times is a loop rather than a stylistic repetition
+NGRAM_WORDS: int = 8
+MAX_REPEATS: int = 3
+# more consecutive list items than this in prose is a runaway list
+MAX_LIST_ITEMS: int = 15
+# how much output to see before deciding whether it starts with a preamble
+PREAMBLE_WINDOW: int = 300
+
+_WORD: re.Pattern = re.compile(r"\S+")
+_LIST_ITEM: re.Pattern = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_SENTENCE_END: re.Pattern = re.compile(r"[.!?][\"'”’)]*(?=\s|$)")
+_PREAMBLE: re.Pattern = re.compile(
+    r"^\s*(?:sure|certainly|of course|absolutely|okay|here(?:'s| is| are)|i(?:'d| would) be (?:happy|glad)|"
+    r"as an ai)\b", re.IGNORECASE)
+
+
+class DegenerationGuard:
+    """
+    Watches streamed output for degeneration: a phrase repeating in a loop, a runaway list, or an off-task
+    preamble ("Sure! Here is the next section:"). feed() returns the reason once the output has degenerated, so the
+    caller can stop the generation; good_text() is the output without the preamble and cut back to the last
+    complete sentence before the degeneration started.
+    """
+
+    def __init__(self, ngram_words: int = NGRAM_WORDS, max_repeats: int = MAX_REPEATS,
+                 max_list_items: int = MAX_LIST_ITEMS):
+        self.ngram_words: int = ngram_words
+        self.max_repeats: int = max_repeats
+        self.max_list_items: int = max_list_items
+        self.text: str = ""
+        self.reason: str | None = None
+        self.preamble_end: int = 0
+        self._cut: int | None = None
+        self._cut_at_sentence: bool = True
+        self._words: List[Tuple[str, int]] = []
+        self._ngrams: Dict[Tuple[str, ...], List[int]] = {}
+        self._words_scanned: int = 0
+        self._lines_scanned: int = 0
+        self._list_items: int = 0
+        self._preamble_checked: bool = False
+
+    def feed(self, text: str) -> str | None:
+        if self.reason is None:
+            self.text += text
+            self._check_preamble()
+            self._scan_words()
+            self._scan_lines()
+        return self.reason
+
+    def good_text(self) -> str:
+        end: int = len(self.text)
+        if self._cut is not None:
+            end = self._cut
+        if self._cut is not None and self._cut_at_sentence:
+            sentence_end: int | None = None
+            for match in _SENTENCE_END.finditer(self.text, self.preamble_end, end):
+                sentence_end = match.end()
+            if sentence_end is not None:
+                end = sentence_end
+        return self.text[self.preamble_end:end].strip()
+
+    def _degenerated(self, reason: str, cut: int, at_sentence: bool = True):
+        self.reason = reason
+        self._cut = cut
+        self._cut_at_sentence = at_sentence
+
+    def _check_preamble(self):
+        if self._preamble_checked or ("\n" not in self.text and len(self.text) < PREAMBLE_WINDOW):
+            return
+        self._preamble_checked = True
+        first_line: str = self.text.split("\n", 1)[0]
+        # ("Sure enough, the storm broke." is prose; "Sure!" and "Here is the next section:" are not)
+        if "\n" in self.text and _PREAMBLE.match(first_line) and first_line.rstrip()[-1:] in (":", "!"):
+            self.preamble_end = len(first_line) + 1
+
+    def _scan_words(self):
+        # only complete words (followed by something) are counted
+        for match in _WORD.finditer(self.text, self._words_scanned):
+            if match.end() == len(self.text):
+                break
+            self._words_scanned = match.end()
+            word: str = match.group().strip(".,;:!?\"'()[]”“’‘*_-").lower()
+            if not word:
+                continue
+            self._words.append((word, match.start()))
+            if len(self._words) < self.ngram_words:
+                continue
+            ngram: Tuple[str, ...] = tuple(w for w, _ in self._words[-self.ngram_words:])
+            starts: List[int] = self._ngrams.setdefault(ngram, [])
+            starts.append(self._words[-self.ngram_words][1])
+            if len(starts) >= self.max_repeats:
+                # the loop started with the first repeat
+                self._degenerated("repetition", starts[1])
+                return
+
+    def _scan_lines(self):
+        while self.reason is None:
+            line_end: int = self.text.find("\n", self._lines_scanned)
+            if line_end < 0:
+                return
+            line_start: int = self._lines_scanned
+            line: str = self.text[line_start:line_end]
+            self._lines_scanned = line_end + 1
+            if _LIST_ITEM.match(line):
+                self._list_items += 1
+                if self._list_items > self.max_list_items:
+                    # a line is a clean enough boundary for a list
+                    self._degenerated("runaway_list", line_start, at_sentence=False)
+            elif line.strip():
+                self._list_items = 0
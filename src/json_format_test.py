@@ -1,41 +1,91 @@
+"""
+Reliability benchmark for structured (JSON list) output: how often a model's list parses with a strict json.loads
+versus the tolerant parser used by the Author, and how many items survive. Runs trials concurrently.
+
+Invoked by (e.g.)
+`python -m src.json_format_test -e bedrock -n 50 -c 8 -k 5`
+"""
+import argparse
 import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
-from langchain.chat_models import ChatOllama
 from langchain_aws import ChatBedrock
-from tqdm import tqdm
+from langchain_core.language_models import BaseChatModel
+from langchain_ollama import ChatOllama
 
-print("starting...")
-# llm: ChatOllama = ChatOllama(
-#     model="llama3.2",
-#     temperature=0.8,
-#     num_predict=256,
-# )
-llm: ChatBedrock = ChatBedrock(model_id="anthropic.claude-3-haiku-20240307-v1:0")
+from src.agents.author import Author
+from src.json_stream import parse_list
 
-prompt: str = """
+PROMPT: str = """
 You are a brilliant poet that can turn words into magic.
 
-Write three sonnets and then output them as a JSON list. For example:
+Write {count} short poems about {topic}.
 
-[
-    "<sonnet 1>",
-    "<sonnet 2>",
-    "<sonnet 3>"
-]
+{format_instructions}
+ANSWER:
+"""
 
-Only respond in JSON and nothing else.
 
-ANSWER: 
-"""
+@dataclass
+class Trial:
+    seconds: float
+    strict_ok: bool
+    items: int
+
 
-num_correct: int = 0
-for i in range(10):
-    print(f"generating #{i+1}")
-    res = llm.invoke(prompt)
+def create_llm(env: str, temperature: float) -> BaseChatModel:
+    if env == 'local':
+        return ChatOllama(model="llama3.2", temperature=temperature, num_predict=1024)
+    if env == 'bedrock':
+        return ChatBedrock(model_id="anthropic.claude-3-haiku-20240307-v1:0",
+                           model_kwargs={"temperature": temperature})
+    raise ValueError(f"invalid environment {env}")
+
+
+def run_trial(llm: BaseChatModel, prompt: str) -> Trial:
+    start: float = time.monotonic()
+    text: str = llm.invoke(prompt).content
+    seconds: float = time.monotonic() - start
     try:
-        json.loads(res.content)
-        num_correct += 1
-    except json.JSONDecodeError as e:
-        print("JSON error")
+        strict_ok: bool = isinstance(json.loads(text), list)
+    except json.JSONDecodeError:
+        strict_ok = False
+    return Trial(seconds, strict_ok, len([i for i in parse_list(text) if isinstance(i, str) and i.strip()]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='JSON list output reliability benchmark')
+    parser.add_argument('-e', '--env', type=str, default='local', help='LLM environment to use [local|bedrock]')
+    parser.add_argument('-n', '--trials', type=int, default=20, help='Number of calls (default: 20)')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='Concurrent calls (default: 4)')
+    parser.add_argument('-k', '--items', type=int, default=3, help='Items requested per call (default: 3)')
+    parser.add_argument('-t', '--temperature', type=float, default=0.8, help='Sampling temperature (default: 0.8)')
+    parser.add_argument('--topic', type=str, default='the sea', help='Poem topic')
+    args = parser.parse_args()
+
+    llm: BaseChatModel = create_llm(args.env, args.temperature)
+    prompt: str = PROMPT.format(count=args.items, topic=args.topic,
+                                format_instructions=Author.JsonListOutputParser().get_format_instructions())
+
+    print(f"running {args.trials} trials ({args.concurrency} concurrent) against {args.env}...")
+    start: float = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        trials: list[Trial] = list(pool.map(lambda i: run_trial(llm, prompt), range(args.trials)))
+    elapsed: float = time.monotonic() - start
 
-print(f"Correct: {num_correct}")
\ No newline at end of file
+    strict: int = sum(t.strict_ok for t in trials)
+    complete: int = sum(t.items >= args.items for t in trials)
+    missing: int = sum(max(0, args.items - t.items) for t in trials)
+    latencies: list[float] = sorted(t.seconds for t in trials)
+    print(f"strict json.loads ok:      {strict}/{len(trials)}")
+    print(f"tolerant parse complete:   {complete}/{len(trials)}")
+    print(f"items recovered:           {sum(t.items for t in trials)}/{args.items * len(trials)}")
+    # a strict parser retries the whole call on any failure; the tolerant one only asks for missing items
+    print(f"full retries (strict):     {len(trials) - strict}")
+    print(f"items to re-request:       {missing}")
+    print(f"latency p50/p95:           {statistics.median(latencies):.2f}s / "
+          f"{latencies[max(0, int(len(latencies) * 0.95) - 1)]:.2f}s")
+    print(f"throughput:                {len(trials) / elapsed:.2f} calls/s")
@@ -0,0 +1,183 @@
+import json
+import re
+from typing import Any, List
+
+# states of the list parser
+_PREFIX = "prefix"  # before the opening bracket (prose, code fences)
+_BETWEEN = "between"  # between items
+_STRING = "string"  # inside a string item
+_VALUE = "value"  # inside a non-string item (number, object, nested list)
+_DONE = "done"
+
+_TRAILING_COMMA: re.Pattern = re.compile(r",\s*([\]}])")
+_LIST_LINE: re.Pattern = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.+?)\s*$")
+
+
+class JsonListStreamParser:
+    """
+    Incremental, tolerant parser for a JSON list in LLM output. Feed it chunks as they stream and it returns each
+    item as soon as the item is complete.
+
+    Repairs the defects models commonly produce instead of failing the whole response:
+    - prose or code fences before the list (and anything after it); the list must hold strings, objects or lists
+    - trailing commas and missing commas between string items on separate lines
+    - unescaped double quotes inside strings (a quote only ends a string if a comma or bracket follows it)
+    - raw newlines and invalid escapes inside strings
+    - a missing closing bracket
+
+    An item cut off by the end of the response is not returned, so the caller can re-request it.
+    """
+
+    def __init__(self):
+        self._state: str = _PREFIX
+        self._pending_open: bool = False
+        self._raw: List[str] = []
+        self._pending_quote: bool = False
+        self._pending_ws: List[str] = []
+        self._escaped: bool = False
+        self._depth: int = 0
+        self._in_value_string: bool = False
+        self.invalid_items: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> List[Any]:
+        items: List[Any] = []
+        for char in text:
+            if self._state == _DONE:
+                break
+            self._step(char, items)
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        Ends the input; returns the last item if it was complete (e.g. only the closing bracket was missing).
+        """
+        items: List[Any] = []
+        if self._state == _STRING and self._pending_quote:
+            self._emit_string(items)
+        elif self._state == _VALUE and self._depth == 0:
+            self._emit_value(items)
+        self._state = _DONE
+        return items
+
+    def _step(self, char: str, items: List[Any]):
+        if self._state == _PREFIX:
+            if self._pending_open and not char.isspace():
+                self._pending_open = False
+                if char in "\"[{]":
+                    self._state = _BETWEEN
+                    self._step(char, items)
+                    return
+            if char == "[":
+                # only a list of strings, objects or lists counts (not e.g. "[1]" or "[sic]" in the preamble)
+                self._pending_open = True
+        elif self._state == _BETWEEN:
+            if char == "]":
+                self._state = _DONE
+            elif char == "\"":
+                self._start(_STRING)
+            elif not char.isspace() and char != ",":
+                self._start(_VALUE)
+                self._step_value(char, items)
+        elif self._state == _STRING:
+            self._step_string(char, items)
+        else:
+            self._step_value(char, items)
+
+    def _start(self, state: str):
+        self._state = state
+        self._raw = []
+        self._pending_quote = False
+        self._pending_ws = []
+        self._escaped = False
+        self._depth = 0
+        self._in_value_string = False
+
+    def _step_string(self, char: str, items: List[Any]):
+        if self._pending_quote:
+            if char.isspace():
+                self._pending_ws.append(char)
+                return
+            if char in ",]" or (char == "\"" and "\n" in self._pending_ws):
+                # the quote ended the item (a new quote on the next line is an item with a missing comma)
+                self._emit_string(items)
+                self._state = _BETWEEN
+                self._step(char, items)
+                return
+            # an unescaped quote inside the string
+            self._raw.append("\\\"")
+            self._raw.extend(self._pending_ws)
+            self._pending_quote = False
+            self._pending_ws = []
+        if self._escaped:
+            self._raw.append(char)
+            self._escaped = False
+        elif char == "\\":
+            self._raw.append(char)
+            self._escaped = True
+        elif char == "\"":
+            self._pending_quote = True
+        else:
+            self._raw.append(char)
+
+    def _step_value(self, char: str, items: List[Any]):
+        if self._in_value_string:
+            self._raw.append(char)
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == "\"":
+                self._in_value_string = False
+            return
+        if self._depth == 0 and char in ",]":
+            self._emit_value(items)
+            self._state = _DONE if char == "]" else _BETWEEN
+            return
+        self._raw.append(char)
+        if char == "\"":
+            self._in_value_string = True
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            self._depth -= 1
+
+    def _emit_string(self, items: List[Any]):
+        raw: str = "".join(self._raw)
+        try:
+            items.append(json.loads(f"\"{raw}\"", strict=False))
+        except json.JSONDecodeError:
+            # invalid escapes; keep the text as written
+            items.append(raw.replace("\\\"", "\""))
+        self._pending_quote = False
+
+    def _emit_value(self, items: List[Any]):
+        raw: str = "".join(self._raw).strip()
+        try:
+            items.append(json.loads(_TRAILING_COMMA.sub(r"\1", raw), strict=False))
+        except json.JSONDecodeError:
+            self.invalid_items += 1
+
+
+def parse_list(text: str) -> List[Any]:
+    """
+    Parses a list from LLM output with JsonListStreamParser, falling back to a bulleted or numbered list when
+    there is no JSON list at all.
+    """
+    parser: JsonListStreamParser = JsonListStreamParser()
+    items: List[Any] = parser.feed(text)
+    found_list: bool = parser._state != _PREFIX
+    items += parser.close()
+    if found_list:
+        return items
+    return [m.group(1) for m in map(_LIST_LINE.match, text.splitlines()) if m]
+
+
+def repair_json_list(text: str) -> str:
+    """
+    Returns valid JSON for the list in the text.
+    """
+    return json.dumps(parse_list(text))
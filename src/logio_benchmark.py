@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of the per-call overhead of @logio on a cheap function with a large argument, e.g.
+
+python -m src.logio_benchmark -n 100000
+"""
+import argparse
+import logging
+import os
+import timeit
+
+from src import logutils
+from src.logutils import logio
+from src.utils import StoryContext
+
+PROMPT: str = "lorem ipsum dolor sit amet " * 400  # ~10KB, like a drafting prompt
+CONTEXT: StoryContext = StoryContext(concept=PROMPT, plot=PROMPT, storyline=PROMPT)
+
+
+def plain(context: StoryContext, prompt: str) -> int:
+    return len(prompt)
+
+
+def run(name: str, func, number: int, baseline: float = None) -> float:
+    seconds: float = min(timeit.repeat(lambda: func(CONTEXT, PROMPT), number=number, repeat=3))
+    per_call: float = seconds / number * 1e6
+    overhead: str = f" (+{per_call - baseline:.2f}us)" if baseline is not None else ""
+    print(f"{name:<32} {per_call:8.2f}us/call{overhead}")
+    return per_call
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the overhead of the logio decorator')
+    parser.add_argument('-n', '--number', type=int, default=100_000, help='Calls per measurement')
+    args = parser.parse_args()
+
+    # measure the decorator and the formatting of its records (as in a run), not the terminal: records are
+    # formatted into a handler that writes to the null device, behind the same queue handler as the real logger
+    logger: logging.Logger = logutils.wrapper_logger
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    devnull: logging.StreamHandler = logging.StreamHandler(open(os.devnull, "w"))
+    devnull.setFormatter(logging.Formatter(logutils.WRAPPER_LOG_FORMAT))
+    logger.addHandler(logutils._queue_handler(devnull))
+
+    baseline: float = run("undecorated", plain, args.number)
+
+    logger.setLevel(logging.INFO)
+    run("logio, DEBUG disabled", logio()(plain), args.number, baseline)
+
+    logger.setLevel(logging.DEBUG)
+    run("logio, 1% sampled", logio(sample_rate=0.01)(plain), args.number, baseline)
+    run("logio, enabled", logio()(plain), args.number // 10, baseline)
+    run("logio, enabled, no truncation", logio(truncate_at=-1)(plain), args.number // 10, baseline)
@@ -1,13 +1,38 @@
+import atexit
+import dataclasses
 import functools
 import inspect
 import logging
+import os
+import queue
+import random
+import reprlib
 import sys
 import typing
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
 LOG_FORMAT: str = "%(asctime)s [%(levelname)s] <%(filename)s:%(lineno)s - %(funcName)s()> %(message)s"
 WRAPPER_LOG_FORMAT: str = "%(asctime)s [%(levelname)s] %(message)s"
 
+# logio can be tuned in production without code changes, e.g. SCRAIBE_LOGIO_LEVEL=INFO or SCRAIBE_LOGIO_SAMPLE=0.05
+LOGIO_LEVEL: str = os.environ.get("SCRAIBE_LOGIO_LEVEL", "DEBUG")
+LOGIO_SAMPLE_RATE: float = float(os.environ.get("SCRAIBE_LOGIO_SAMPLE", "1.0"))
+
+
+def _queue_handler(handler: logging.Handler) -> logging.Handler:
+    """
+    Wraps a handler so records are handed to a background thread and the caller never blocks on I/O.
+    """
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener: QueueListener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    # flush what's still queued at exit
+    atexit.register(listener.stop)
+    queue_handler: QueueHandler = QueueHandler(log_queue)
+    queue_handler.setLevel(handler.level)
+    return queue_handler
+
 
 def create_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
@@ -16,47 +41,115 @@ def create_logger(name: str) -> logging.Logger:
     ch.setLevel(logging.DEBUG)
     formatter = logging.Formatter(LOG_FORMAT)
     ch.setFormatter(formatter)
-    logger.addHandler(ch)
+    logger.addHandler(_queue_handler(ch))
     return logger
 
 
 def create_wrapper_logger():
     logger = logging.getLogger("wrapper")
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(LOGIO_LEVEL)
     ch = logging.StreamHandler(stream=sys.stdout)
     ch.setLevel(logging.DEBUG)
     formatter = logging.Formatter(WRAPPER_LOG_FORMAT)
     ch.setFormatter(formatter)
-    logger.addHandler(ch)
+    logger.addHandler(_queue_handler(ch))
     return logger
 
 
 wrapper_logger: logging.Logger = create_wrapper_logger()
 
 
-def logio(truncate_at: int = 100) -> typing.Callable:
+def _repr_fields(obj: Any) -> list | None:
+    """
+    The (name, value) pairs a dataclass or pydantic model's repr is built from, or None for other objects.
+    """
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return [(f.name, getattr(obj, f.name)) for f in dataclasses.fields(obj) if f.repr]
+    model_fields: Any = getattr(type(obj), "model_fields", None)
+    if isinstance(model_fields, dict):
+        return [(name, getattr(obj, name, None)) for name in model_fields]
+    return None
+
+
+class _CappedReprlib(reprlib.Repr):
+    """
+    reprlib that also caps dataclasses and pydantic models (e.g. StoryContext, messages) field by field instead of
+    building their full repr first.
+    """
+
+    def repr_instance(self, obj: Any, level: int) -> str:
+        fields: list | None = _repr_fields(obj)
+        if fields is None:
+            return super().repr_instance(obj, level)
+        parts: list = []
+        size: int = len(type(obj).__name__) + 2
+        for name, value in fields:
+            parts.append(f"{name}={self.repr1(value, level - 1)}")
+            size += len(parts[-1]) + 2
+            if size > self.maxother:
+                break
+        return f"{type(obj).__name__}({', '.join(parts)})"
+
+
+class CappedRepr:
+    """
+    repr of an object, computed only when the log record is formatted and capped at length characters without
+    building the full repr of long strings (e.g. multi-KB prompts) or of dataclasses and pydantic models holding
+    them first. length < 3 means no cap.
+    """
+    __slots__ = ("obj", "length")
+
+    def __init__(self, obj: Any, length: int):
+        self.obj: Any = obj
+        self.length: int = length
+
+    def __str__(self) -> str:
+        if self.length < 3:
+            return repr(self.obj)
+        if isinstance(self.obj, str):
+            rep: str = repr(self.obj[:self.length])
+        else:
+            limiter: reprlib.Repr = _CappedReprlib()
+            limiter.maxstring = limiter.maxother = self.length
+            rep = limiter.repr(self.obj)
+        return f"{rep[:self.length - 3]}..." if len(rep) > self.length else rep
+
+
+class _CallArgs:
+    __slots__ = ("param_names", "args", "kwargs", "length")
+
+    def __init__(self, param_names: list, args: tuple, kwargs: dict, length: int):
+        self.param_names: list = param_names
+        self.args: tuple = args
+        self.kwargs: dict = kwargs
+        self.length: int = length
+
+    def __str__(self) -> str:
+        all_args: dict = dict(zip(self.param_names, self.args))
+        all_args.update(self.kwargs)
+        return ", ".join(f"{k}={CappedRepr(v, self.length)}" for k, v in all_args.items())
+
+
+def logio(truncate_at: int = 100, sample_rate: float = None, level: int = logging.DEBUG) -> typing.Callable:
+    """
+    Logs the arguments and result of each call. Costs next to nothing when the wrapper logger isn't enabled for
+    level: the signature is resolved once at decoration time and reprs are only built when a record is actually
+    emitted. sample_rate (default SCRAIBE_LOGIO_SAMPLE) logs only that fraction of calls.
+    """
     def logio_decorator(func) -> typing.Callable:
+        param_names: list = list(inspect.signature(func).parameters.keys())
+        rate: float = LOGIO_SAMPLE_RATE if sample_rate is None else sample_rate
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            def truncate(obj: Any, length: int = truncate_at) -> str:
-                rep: str = repr(obj)
-                if length < 3:
-                    return rep
-                return f"{rep[:length-3]}..." if len(rep) > length else rep
-
             logger = wrapper_logger
-            sig = inspect.signature(func)
-            param_names = list(sig.parameters.keys())
-            all_args = dict(zip(param_names, args))
-            all_args.update(kwargs)
-            allargs_repr = [f"{k}={truncate(v)}" for k, v in all_args.items()]
-            signature = ", ".join(allargs_repr)
-            logger.debug(f">>> {func.__name__}({signature})")
+            if not logger.isEnabledFor(level) or (rate < 1.0 and random.random() >= rate):
+                return func(*args, **kwargs)
 
+            logger.log(level, ">>> %s(%s)", func.__name__, _CallArgs(param_names, args, kwargs, truncate_at))
             result = func(*args, **kwargs)
-            logger.debug(f"<<< {func.__name__}: {truncate(result)}")
+            logger.log(level, "<<< %s: %s", func.__name__, CappedRepr(result, truncate_at))
 
             return result
         return wrapper
     return logio_decorator
-
@@ -0,0 +1,249 @@
+import bisect
+import logging
+import threading
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from src.utils import write_atomic
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = None) -> str:
+    pairs: List[str] = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """
+    A named metric with a fixed set of label names; a value is kept per combination of label values.
+    """
+    type_name: str = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: List[str] = None):
+        self.name: str = name
+        self.help: str = help
+        self.labelnames: Tuple[str, ...] = tuple(labelnames or [])
+        self._lock: threading.Lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: List[str] = None):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        assert amount >= 0, "counters can only go up"
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+                    for k, v in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: List[str] = None):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+                    for k, v in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: List[str] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # per label values: counts per bucket (plus +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative: int = 0
+                for bound, count in zip(list(self.buckets) + [float("inf")], counts):
+                    cumulative += count
+                    le: str = "+Inf" if bound == float("inf") else _format_value(bound)
+                    labels: str = _format_labels(self.labelnames, key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Set of metrics rendered together in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            assert metric.name not in self._metrics, f"metric {metric.name} already registered"
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: List[str] = None) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: List[str] = None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: List[str] = None,
+                  buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics: List[Metric] = list(self._metrics.values())
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+    def write_textfile(self, path: Path):
+        """
+        Writes the metrics for e.g. the node_exporter textfile collector; atomic so a scrape never sees half a file.
+        """
+        write_atomic(path, self.render())
+
+
+class TextfileExporter:
+    """
+    Periodically writes a registry to a textfile (for processes without a scrape endpoint, e.g. the CLI).
+    """
+
+    def __init__(self, path: Path, registry: MetricsRegistry = None, interval: float = 15.0):
+        self.path: Path = path
+        self.registry: MetricsRegistry = registry or REGISTRY
+        self.interval: float = interval
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(target=self._loop, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        self._export()
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self._export()
+
+    def _export(self):
+        try:
+            self.registry.write_textfile(self.path)
+        except OSError as e:
+            logger.warning(f"failed to write metrics to {self.path}: {e}")
+
+
+# process wide metrics
+REGISTRY: MetricsRegistry = MetricsRegistry()
+
+LLM_CALLS: Counter = REGISTRY.counter(
+    "scraibe_llm_calls_total", "LLM calls by actor, priority and outcome (ok, error, stopped)",
+    ["actor", "priority", "outcome"])
+LLM_LATENCY: Histogram = REGISTRY.histogram(
+    "scraibe_llm_call_seconds", "Duration of LLM calls once admitted by the scheduler", ["actor", "priority"])
+LLM_QUEUE_WAIT: Histogram = REGISTRY.histogram(
+    "scraibe_llm_queue_wait_seconds", "Time LLM calls waited for a scheduler slot", ["priority"])
+LLM_TOKENS: Counter = REGISTRY.counter(
+    "scraibe_llm_tokens_total", "LLM tokens by actor and direction (input, output, cache_read)",
+    ["actor", "direction"])
+LLM_RETRIES: Counter = REGISTRY.counter(
+    "scraibe_llm_retries_total", "LLM calls repeated or continued, by actor and reason", ["actor", "reason"])
+LLM_CACHE_HITS: Counter = REGISTRY.counter(
+    "scraibe_llm_cache_hits_total", "LLM calls served (fully or partly) from a cache, by actor and cache",
+    ["actor", "cache"])
+SCHEDULER_QUEUED: Gauge = REGISTRY.gauge(
+    "scraibe_scheduler_queued_calls", "LLM calls waiting for a scheduler slot", ["priority"])
+SCHEDULER_ACTIVE: Gauge = REGISTRY.gauge(
+    "scraibe_scheduler_active_calls", "LLM calls holding a scheduler slot")
+PROMPT_SLOTS_PACKED: Counter = REGISTRY.counter(
+    "scraibe_prompt_slots_packed_total", "Prompt template slots shrunk to fit the context window, by slot and action "
+    "(summarized, trimmed, dropped)", ["slot", "action"])
+PAGES_DRAFTED: Counter = REGISTRY.counter(
+    "scraibe_pages_drafted_total", "Pages (or podcast segments) drafted", ["mode"])
+BEST_OF_CANDIDATES: Counter = REGISTRY.counter(
+    "scraibe_best_of_candidates_total", "Candidates of pages sampled best-of-N, by outcome (selected, rejected, "
+    "cancelled, failed)", ["outcome"])
+SPECULATIONS: Counter = REGISTRY.counter(
+    "scraibe_speculations_total", "Ideas developed speculatively while the human chose, by outcome (used, wasted)",
+    ["outcome"])
+JOBS_QUEUED: Gauge = REGISTRY.gauge(
+    "scraibe_jobs_queued", "Jobs waiting in the job service queue")
+JOBS_FINISHED: Counter = REGISTRY.counter(
+    "scraibe_jobs_finished_total", "Jobs finished by the job service, by kind and status", ["kind", "status"])
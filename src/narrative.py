@@ -0,0 +1,146 @@
+import json
+import logging
+import shutil
+from logging import Logger
+from pathlib import Path
+from typing import BinaryIO, List
+
+from src.utils import write_atomic
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+
+class NarrativeWriter:
+    """
+    Streams a narrative to disk while it is drafted. Each page is appended to its section's partial file (e.g.
+    chapter_3.txt.partial) as soon as it is written; a finished section is renamed to its section file (e.g.
+    chapter_3.txt), so that file only ever holds a whole section, and appended to the assembled narrative (e.g.
+    full_narrative.txt). Neither the book nor a chapter is held in memory and there is no final assembly step.
+
+    An index of byte offsets per section and page (e.g. full_narrative.index.json) gives random access to the text
+    and lets an interrupted run resume after the last finished section.
+    """
+
+    def __init__(self, directory: Path, name: str = "full_narrative.txt", section: str = "chapter",
+                 page_separator: str = " ", section_separator: str = "\n\n", resume: bool = False):
+        self.directory: Path = directory
+        self.path: Path = directory / name
+        self.index_path: Path = directory / f"{Path(name).stem}.index.json"
+        self.section: str = section
+        self.page_separator: bytes = page_separator.encode("utf-8")
+        self.section_separator: bytes = section_separator.encode("utf-8")
+        self.sections: List[dict] = []
+        self._current: dict | None = None
+        self._file: BinaryIO | None = None
+        if resume and self.index_path.is_file():
+            self._load()
+        # drop whatever an interrupted run wrote after the last finished section
+        with open(self.path, "ab") as f:
+            f.truncate(self._end())
+        self._save()
+
+    def section_name(self, number: int) -> str:
+        return f"{self.section}_{number}.txt"
+
+    def section_path(self, number: int) -> Path:
+        return self.directory / self.section_name(number)
+
+    def partial_path(self, number: int) -> Path:
+        return self.directory / f"{self.section_name(number)}.partial"
+
+    def is_complete(self, number: int) -> bool:
+        return any(s["number"] == number for s in self.sections)
+
+    def begin(self, number: int):
+        """
+        Starts a new section; an unfinished section from an earlier run is overwritten and a finished one is
+        removed until the new one is ended.
+        """
+        assert self._current is None, f"{self.section} {self._current and self._current['number']} not ended"
+        self._current = {"number": number, "file": self.section_name(number), "offset": None, "length": 0,
+                         "pages": []}
+        self.section_path(number).unlink(missing_ok=True)
+        self._file = open(self.partial_path(number), "wb")
+
+    def write_page(self, text: str):
+        """
+        Appends a page to the current section and flushes it, so readers (e.g. the job service) see it right away.
+        """
+        data: bytes = text.encode("utf-8")
+        if self._current["pages"]:
+            self._file.write(self.page_separator)
+            self._current["length"] += len(self.page_separator)
+        self._current["pages"].append({"number": len(self._current["pages"]) + 1,
+                                       "offset": self._current["length"], "length": len(data)})
+        self._file.write(data)
+        self._file.flush()
+        self._current["length"] += len(data)
+
+    def end(self) -> dict:
+        """
+        Finishes the current section: renames it to its section file, appends it to the assembled narrative and
+        records it in the index.
+        """
+        self._file.close()
+        self._file = None
+        section: dict = self._current
+        self._current = None
+        self.partial_path(section["number"]).replace(self.section_path(section["number"]))
+        with open(self.path, "ab") as out, open(self.section_path(section["number"]), "rb") as f:
+            if self.sections:
+                out.write(self.section_separator)
+            section["offset"] = out.tell()
+            shutil.copyfileobj(f, out)
+        self.sections.append(section)
+        self._save()
+        logger.debug(f"finished {section['file']}: {len(section['pages'])} pages, {section['length']} bytes")
+        return section
+
+    def close(self):
+        """
+        Closes an unfinished section (e.g. on cancel); it is left as a partial file and not added to the narrative.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._current = None
+
+    def read(self, number: int) -> str:
+        """
+        Returns the text of a finished section (from the assembled narrative) or of the current section so far.
+        """
+        return self.page_separator.decode("utf-8").join(self.read_pages(number))
+
+    def read_pages(self, number: int = None) -> List[str]:
+        """
+        Returns the pages of a section (default: the current one) using the offset index.
+        """
+        if number is None or (self._current is not None and number == self._current["number"]):
+            path, base, section = self.partial_path(self._current["number"]), 0, self._current
+        else:
+            section = next((s for s in self.sections if s["number"] == number), None)
+            if section is None:
+                raise KeyError(f"no finished {self.section} {number}")
+            path, base = self.path, section["offset"]
+        pages: List[str] = []
+        with open(path, "rb") as f:
+            for page in section["pages"]:
+                f.seek(base + page["offset"])
+                pages.append(f.read(page["length"]).decode("utf-8"))
+        return pages
+
+    def _end(self) -> int:
+        return self.sections[-1]["offset"] + self.sections[-1]["length"] if self.sections else 0
+
+    def _load(self):
+        with open(self.index_path, "r") as f:
+            sections: List[dict] = json.load(f)["sections"]
+        size: int = self.path.stat().st_size if self.path.is_file() else 0
+        for section in sections:
+            if section["offset"] + section["length"] > size:
+                break
+            self.sections.append(section)
+        logger.info(f"resuming {self.path.name} after {len(self.sections)} finished {self.section}s")
+
+    def _save(self):
+        write_atomic(self.index_path, json.dumps({"name": self.path.name, "sections": self.sections}, indent=2))
@@ -0,0 +1,178 @@
+import logging
+import re
+from dataclasses import dataclass
+from logging import Logger
+from typing import Any, Dict, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_ollama import ChatOllama
+
+from src.summarizer import extractive_summary
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+# characters per token within a word by tokenizer family (llama 3's 128k vocabulary packs more into a token than
+# Claude's); every word, group of up to 3 digits and punctuation mark is at least one token
+CHARS_PER_TOKEN: Dict[str, float] = {"llama": 4.5, "claude": 4.0, "default": 3.5}
+# context windows: Ollama's num_ctx default when the model doesn't set one, and Claude's
+OLLAMA_DEFAULT_NUM_CTX: int = 2048
+CLAUDE_CONTEXT_WINDOW: int = 200_000
+# share of the window used, as the counts are approximations of the real tokenizers
+WINDOW_SAFETY: float = 0.9
+# a slot left with fewer tokens than this is dropped rather than mangled
+MIN_SLOT_TOKENS: int = 32
+
+_PIECE: re.Pattern = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+
+@dataclass
+class SlotPolicy:
+    """
+    How a template slot is packed: slots with a higher priority keep their text first; a slot that doesn't fit is
+    summarized (extractively) or cut to its head or tail.
+    """
+    priority: int
+    shrink: str = "summarize"
+
+
+# slots that may be shrunk, by priority; anything else (the idea, feedback, instructions, ...) is always sent whole
+SLOT_POLICIES: Dict[str, SlotPolicy] = {
+    "preceding_sections": SlotPolicy(90, "tail"),
+    "ending": SlotPolicy(85, "tail"),
+    "opening": SlotPolicy(85, "head"),
+    "storyline": SlotPolicy(80),
+    "bible": SlotPolicy(75),
+    "plot": SlotPolicy(70),
+    "characters": SlotPolicy(60),
+    "world": SlotPolicy(50),
+    "themes": SlotPolicy(40),
+    "extended_context": SlotPolicy(30),
+    "chapter": SlotPolicy(20),
+}
+
+
+@dataclass
+class PackingDecision:
+    slot: str
+    tokens: int
+    packed_tokens: int
+    action: str  # summarized, trimmed or dropped
+
+
+def model_family(llm: BaseChatModel) -> str:
+    name: Any = getattr(llm, "model", None) or getattr(llm, "model_id", None)
+    name = name.lower() if isinstance(name, str) else ""
+    if "llama" in name:
+        return "llama"
+    if "claude" in name or "anthropic" in name:
+        return "claude"
+    return "default"
+
+
+def context_window(llm: BaseChatModel) -> int | None:
+    """
+    The model's context window in tokens, or None if unknown (prompts aren't packed).
+    """
+    if isinstance(llm, ChatOllama):
+        num_ctx: Any = getattr(llm, "num_ctx", None)
+        return num_ctx if isinstance(num_ctx, int) else OLLAMA_DEFAULT_NUM_CTX
+    if model_family(llm) == "claude":
+        return CLAUDE_CONTEXT_WINDOW
+    return None
+
+
+class TokenCounter:
+    """
+    Local token counts for a model family without its tokenizer: words are split into pieces of the family's
+    typical length, and digits and punctuation are counted separately.
+    """
+
+    def __init__(self, family: str = "default"):
+        self.family: str = family
+        self.chars_per_token: float = CHARS_PER_TOKEN.get(family, CHARS_PER_TOKEN["default"])
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return sum(max(1, int(len(piece) / self.chars_per_token + 0.5)) for piece in _PIECE.findall(text))
+
+    def head(self, text: str, max_tokens: int) -> str:
+        words: List[str] = text.split(" ")
+        kept: int = self._fitting_words(words, max_tokens)
+        return " ".join(words[:kept])
+
+    def tail(self, text: str, max_tokens: int) -> str:
+        words: List[str] = text.split(" ")[::-1]
+        kept: int = self._fitting_words(words, max_tokens)
+        return " ".join(words[:kept][::-1])
+
+    def _fitting_words(self, words: List[str], max_tokens: int) -> int:
+        total: int = 0
+        for idx, word in enumerate(words):
+            total += self.count(word)
+            if total > max_tokens:
+                return idx
+        return len(words)
+
+
+class PromptPacker:
+    """
+    Fits the values of a prompt template into a model's context window: when the prompt (plus the output it may
+    generate) wouldn't fit, the budget left after the template and the fixed values goes to the shrinkable slots
+    by priority (see SLOT_POLICIES), and slots that don't fit are summarized, trimmed or dropped.
+    """
+
+    def __init__(self, context_window: int, family: str = "default", policies: Dict[str, SlotPolicy] = None):
+        self.context_window: int = context_window
+        self.counter: TokenCounter = TokenCounter(family)
+        self.policies: Dict[str, SlotPolicy] = policies if policies is not None else SLOT_POLICIES
+
+    @classmethod
+    def for_model(cls, llm: BaseChatModel) -> "PromptPacker | None":
+        window: int | None = context_window(llm)
+        return cls(window, model_family(llm)) if window else None
+
+    def budget(self, skeleton: str, output_tokens: int) -> int:
+        """
+        Tokens available to the template's values, given the rendered template without them.
+        """
+        return int(self.context_window * WINDOW_SAFETY) - output_tokens - self.counter.count(skeleton)
+
+    def pack(self, values: Dict[str, Any], budget: int) -> (Dict[str, Any], List[PackingDecision]):
+        slots: List[str] = [name for name, value in values.items()
+                            if name in self.policies and isinstance(value, str) and value]
+        tokens: Dict[str, int] = {name: self.counter.count(values[name]) for name in slots}
+        fixed: int = sum(self.counter.count(value) for name, value in values.items()
+                         if name not in tokens and isinstance(value, str))
+        available: int = budget - fixed
+        if sum(tokens.values()) <= available:
+            return values, []
+
+        packed: Dict[str, Any] = dict(values)
+        decisions: List[PackingDecision] = []
+        for name in sorted(slots, key=lambda slot: -self.policies[slot].priority):
+            allowed: int = max(available, 0)
+            if tokens[name] <= allowed:
+                available -= tokens[name]
+                continue
+            if allowed < MIN_SLOT_TOKENS:
+                packed[name] = ""
+                decisions.append(PackingDecision(name, tokens[name], 0, "dropped"))
+                continue
+            packed[name], action = self._shrink(values[name], tokens[name], allowed, self.policies[name].shrink)
+            packed_tokens: int = self.counter.count(packed[name])
+            available -= packed_tokens
+            decisions.append(PackingDecision(name, tokens[name], packed_tokens, action))
+        return packed, decisions
+
+    def _shrink(self, text: str, tokens: int, max_tokens: int, how: str) -> (str, str):
+        if how == "head":
+            return self.counter.head(text, max_tokens), "trimmed"
+        if how == "tail":
+            return self.counter.tail(text, max_tokens), "trimmed"
+        # the most salient sentences in about the allowed number of words
+        max_words: int = int(len(text.split()) * max_tokens / tokens)
+        summary: str = extractive_summary(text, max_words)
+        if self.counter.count(summary) > max_tokens:
+            return self.counter.head(summary, max_tokens), "trimmed"
+        return summary, "summarized"
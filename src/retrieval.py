@@ -0,0 +1,188 @@
+import logging
+import re
+import zlib
+from dataclasses import dataclass
+from logging import Logger
+from typing import Dict, List
+
+import numpy as np
+
+from src.utils import StoryContext, estimate_tokens
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+STOPWORDS: frozenset = frozenset("""
+a an and are as at be been but by for from had has have he her hers him his i if in into is it its me my no not of
+on or our she so than that the their them then there these they this to was we were what when where which who will
+with would you your
+""".split())
+
+# order in which bible fields are presented to the model (matches the full DRAFT.SECTION prompt)
+BIBLE_FIELDS: List[str] = ["concept", "plot", "themes", "characters", "world", "storyline"]
+# fields every page needs, sent whole in the cacheable prompt prefix rather than retrieved per page
+BIBLE_CORE_FIELDS: List[str] = ["concept", "characters", "storyline"]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens without stopwords; good enough for lexical retrieval over prose.
+    """
+    return [t for t in re.findall(r"[a-z0-9']+", text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+
+def chunk_text(text: str, max_words: int = 120) -> List[str]:
+    """
+    Splits text into chunks of at most ~max_words, keeping paragraphs (and markdown sections) together where
+    possible and falling back to sentence boundaries for long paragraphs.
+    """
+    paragraphs: List[str] = [p.strip() for p in re.split(r"\n\s*\n|\n(?=#)", text) if p.strip()]
+    pieces: List[str] = []
+    for paragraph in paragraphs:
+        if len(paragraph.split()) <= max_words:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(split_sentences(paragraph))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_words: int = 0
+    for piece in pieces:
+        words: int = len(piece.split())
+        if current and current_words + words > max_words:
+            chunks.append("\n".join(current))
+            current, current_words = [], 0
+        current.append(piece)
+        current_words += words
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a small corpus, held as a dense document x term matrix.
+    """
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.vocabulary: Dict[str, int] = {}
+        for doc in documents:
+            for token in doc:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        tf: np.ndarray = np.zeros((len(documents), max(1, len(self.vocabulary))), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            for token in doc:
+                tf[row, self.vocabulary[token]] += 1
+
+        doc_len: np.ndarray = tf.sum(axis=1)
+        avg_len: float = float(doc_len.mean()) if len(documents) else 0.0
+        df: np.ndarray = (tf > 0).sum(axis=0)
+        self.idf: np.ndarray = np.log(1.0 + (len(documents) - df + 0.5) / (df + 0.5))
+        norm: np.ndarray = k1 * (1 - b + b * doc_len / max(avg_len, 1e-9))
+        self.weights: np.ndarray = tf * (k1 + 1) / (tf + norm[:, None])
+
+    def scores(self, query: List[str]) -> np.ndarray:
+        cols: List[int] = [self.vocabulary[t] for t in set(query) if t in self.vocabulary]
+        if not cols:
+            return np.zeros(self.weights.shape[0], dtype=np.float32)
+        return self.weights[:, cols] @ self.idf[cols]
+
+
+class HashingVectorizer:
+    """
+    Stateless bag of words (plus bigrams) vectorizer using the hashing trick, so passages can be embedded
+    incrementally without a fitted vocabulary. Vectors are sublinear tf weighted and L2 normalized.
+    """
+
+    def __init__(self, n_features: int = 2 ** 14, ngrams: int = 2):
+        self.n_features: int = n_features
+        self.ngrams: int = ngrams
+
+    def _features(self, tokens: List[str]) -> List[str]:
+        features: List[str] = list(tokens)
+        for n in range(2, self.ngrams + 1):
+            features.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return features
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        vectors: np.ndarray = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(tokenize(text)):
+                # crc32 rather than hash() so vectors are stable across processes
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.n_features] += 1
+        np.log1p(vectors, out=vectors)
+        norms: np.ndarray = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+@dataclass
+class BibleChunk:
+    field: str
+    position: int
+    text: str
+    tokens: int
+
+
+class BibleIndex:
+    """
+    Index over the story bible (the StoryContext fields) used to send only the parts relevant to the page being
+    written instead of the whole bible on every call. Excluded fields (e.g. the core sent elsewhere) are indexed,
+    so storyline_window still works, but never selected.
+    """
+
+    def __init__(self, context: StoryContext, chunk_words: int = 120, always_include: List[str] = None,
+                 exclude: List[str] = None):
+        self.always_include: List[str] = always_include if always_include is not None else ["concept"]
+        self.exclude: List[str] = exclude or []
+        self.chunks: List[BibleChunk] = []
+        for name in BIBLE_FIELDS:
+            value: str | None = getattr(context, name)
+            if not value:
+                continue
+            for position, text in enumerate(chunk_text(value, chunk_words)):
+                self.chunks.append(BibleChunk(name, position, text, estimate_tokens(text)))
+        self.index: BM25Index = BM25Index([tokenize(c.text) for c in self.chunks])
+        logger.info(f"indexed story bible: {len(self.chunks)} chunks, "
+                    f"{sum(c.tokens for c in self.chunks)} tokens")
+
+    def select(self, query: str, token_budget: int) -> str:
+        """
+        Returns the always-included fields plus the best matching chunks that fit in the token budget, grouped
+        by field in bible order.
+        """
+        selected: List[int] = [i for i, c in enumerate(self.chunks)
+                               if c.field in self.always_include and c.field not in self.exclude]
+        used: int = sum(self.chunks[i].tokens for i in selected)
+        scores: np.ndarray = self.index.scores(tokenize(query))
+        for idx in np.argsort(-scores, kind="stable"):
+            if scores[idx] <= 0:
+                break
+            if idx in selected or self.chunks[idx].field in self.exclude or \
+                    used + self.chunks[idx].tokens > token_budget:
+                continue
+            selected.append(int(idx))
+            used += self.chunks[idx].tokens
+
+        sections: List[str] = []
+        for name in BIBLE_FIELDS:
+            texts: List[str] = [self.chunks[i].text for i in sorted(selected) if self.chunks[i].field == name]
+            if texts:
+                sections.append(f"{name.upper()}: " + "\n".join(texts))
+        logger.debug(f"selected {len(selected)}/{len(self.chunks)} bible chunks ({used} tokens)")
+        return "\n".join(sections)
+
+    def storyline_window(self, part: int, total_parts: int) -> str:
+        """
+        Returns the slice of the storyline that corresponds to a part (e.g. chapter) of the narrative; a cheap
+        stand-in for the part's beats.
+        """
+        storyline: List[BibleChunk] = [c for c in self.chunks if c.field == "storyline"]
+        if not storyline:
+            return ""
+        start: int = (part - 1) * len(storyline) // total_parts
+        end: int = max(start + 1, part * len(storyline) // total_parts)
+        return "\n".join(c.text for c in storyline[start:end])
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.json_stream import parse_list
+
+EDIT_OPS: List[str] = ["replace", "insert_after", "delete"]
+
+
+class RevisionError(ValueError):
+    """
+    Raised when a set of edits can't be applied; callers fall back to regenerating the whole text.
+    """
+    pass
+
+
+@dataclass
+class EditOp:
+    """
+    An edit against the numbered (1-based) paragraphs of the original text. insert_after 0 inserts at the start.
+    """
+    op: str
+    paragraph: int
+    text: str | None = None
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Splits on blank lines; text without blank lines (e.g. a list of characters) is split into lines.
+    """
+    paragraphs: List[str] = [p.strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
+    if len(paragraphs) == 1:
+        paragraphs = [line.strip() for line in paragraphs[0].splitlines() if line.strip()] or paragraphs
+    return paragraphs
+
+
+def number_paragraphs(paragraphs: List[str]) -> str:
+    return "\n\n".join(f"[{idx + 1}] {p}" for idx, p in enumerate(paragraphs))
+
+
+def parse_edits(text: str) -> List[EditOp]:
+    """
+    Parses a JSON list of edits (tolerating the usual formatting defects); raises RevisionError if any edit is
+    malformed.
+    """
+    stripped: str = text.strip()
+    if "[" not in stripped:
+        raise RevisionError(f"no list of edits in the response: {stripped[:80]!r}")
+    ops: List[EditOp] = []
+    for item in parse_list(stripped):
+        if not isinstance(item, dict) or item.get("op") not in EDIT_OPS:
+            raise RevisionError(f"invalid edit {item!r}")
+        try:
+            paragraph: int = int(item.get("paragraph"))
+        except (TypeError, ValueError):
+            raise RevisionError(f"invalid paragraph in edit {item!r}")
+        edit_text: str | None = item.get("text")
+        if item["op"] != "delete" and (not isinstance(edit_text, str) or not edit_text.strip()):
+            raise RevisionError(f"edit without text {item!r}")
+        ops.append(EditOp(item["op"], paragraph, edit_text.strip() if edit_text else None))
+    return ops
+
+
+def apply_edits(paragraphs: List[str], ops: List[EditOp]) -> List[str]:
+    """
+    Applies edits that all refer to the original paragraph numbers; raises RevisionError for out of range or
+    conflicting edits, or if nothing would be left.
+    """
+    replaced: Dict[int, str | None] = {}
+    inserted: Dict[int, List[str]] = {}
+    for op in ops:
+        if op.op == "insert_after":
+            if not 0 <= op.paragraph <= len(paragraphs):
+                raise RevisionError(f"insert after paragraph {op.paragraph} of {len(paragraphs)}")
+            inserted.setdefault(op.paragraph, []).append(op.text)
+            continue
+        if not 1 <= op.paragraph <= len(paragraphs):
+            raise RevisionError(f"{op.op} of paragraph {op.paragraph} of {len(paragraphs)}")
+        if op.paragraph in replaced:
+            raise RevisionError(f"conflicting edits for paragraph {op.paragraph}")
+        replaced[op.paragraph] = op.text if op.op == "replace" else None
+
+    revised: List[str] = list(inserted.get(0, []))
+    for number, paragraph in enumerate(paragraphs, start=1):
+        if number in replaced:
+            if replaced[number] is not None:
+                revised.append(replaced[number])
+        else:
+            revised.append(paragraph)
+        revised.extend(inserted.get(number, []))
+    if not revised:
+        raise RevisionError("edits would delete everything")
+    return revised
+
+
+def revise(text: str, edits: str) -> (str, List[EditOp]):
+    """
+    Applies the edits in an LLM response to the text; returns the revised text and the edits.
+    """
+    paragraphs: List[str] = split_paragraphs(text)
+    ops: List[EditOp] = parse_edits(edits)
+    separator: str = "\n\n" if re.search(r"\n\s*\n", text.strip()) or len(paragraphs) <= 1 else "\n"
+    return separator.join(apply_edits(paragraphs, ops)), ops
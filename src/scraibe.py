@@ -1,12 +1,14 @@
 import argparse
+from datetime import datetime
 from pathlib import Path
 
 from src.conductor import Conductor, PaperbackWriter, HistoryPodcaster
+from src.metrics import TextfileExporter
 from src.logutils import create_logger
 
 logger = create_logger("scrAIbe")
 
-VALID_OPERATIONS: list[str] = ["develop", "draft"]
+VALID_OPERATIONS: list[str] = ["develop", "refresh", "draft"]
 
 if __name__ == '__main__':
     """
@@ -23,11 +25,33 @@ if __name__ == '__main__':
     parser.add_argument('working_dir', type=str,
                         help='Path to parent location of working directories')
     parser.add_argument('-e', '--env', type=str, default='local',
-                        help='LLM environment to use [local|bedrock]')
+                        help='LLM environment to use [local|bedrock|fake]')
     parser.add_argument('-o', '--operations', nargs='+', default=['develop'],
                         help=f'Generation steps to execute (default: develop). Valid options: {VALID_OPERATIONS}')
     parser.add_argument('-p', '--project_name', type=str, default=None,
                         help='Name of the project working directory (only needed if drafting without first generating)')
+    parser.add_argument('-d', '--drain_timeout', type=float, default=30.0,
+                        help='Seconds to wait for in-flight LLM calls when stopping (default: 30)')
+    parser.add_argument('-b', '--bible_tokens', type=int, default=1500,
+                        help='Token budget for story bible excerpts sent with each page; 0 sends the whole bible')
+    parser.add_argument('-s', '--store_only', action='store_true',
+                        help='Keep artifacts only in the compressed artifact store (no plain file copies)')
+    parser.add_argument('-m', '--metrics_file', type=str, default=None,
+                        help='Periodically write Prometheus metrics to this file (e.g. for a textfile collector)')
+    parser.add_argument('-r', '--revision_mode', choices=['delta', 'full'], default='delta',
+                        help='Revise concept elements with edits (delta) or by regenerating them (full)')
+    parser.add_argument('-k', '--speculation_budget', type=int, default=2,
+                        help='Ideas to develop speculatively while you choose one (default: 2; 0 disables)')
+    parser.add_argument('--coalesce_sampled', action='store_true',
+                        help='Also share one response between identical calls in flight at temperature > 0')
+    parser.add_argument('--summarizer', choices=['extractive', 'llm', 'none'], default='extractive',
+                        help='How chapter summaries for later chapters are made (default: extractive, no LLM calls)')
+    parser.add_argument('--deadline', type=datetime.fromisoformat, default=None,
+                        help='Finish drafting by this local time (ISO format, e.g. 2024-06-01T18:00); drafting adapts '
+                             'to the observed page times to meet it')
+    parser.add_argument('--best_of', type=int, default=1,
+                        help="Write each chapter's first and last page as this many candidates at once and keep the "
+                             "best (default: 1, off)")
 
     args = parser.parse_args()
 
@@ -39,9 +63,15 @@ if __name__ == '__main__':
     # instantiate conductor
     conductor: Conductor | None = None
     if args.generate == 'longform-fiction':
-        conductor = PaperbackWriter(working_dir=working_dir, env=args.env)
+        conductor = PaperbackWriter(working_dir=working_dir, env=args.env, drain_timeout=args.drain_timeout,
+                                    keep_plain_copies=not args.store_only, revision_mode=args.revision_mode,
+                                    speculation_budget=args.speculation_budget,
+                                    coalesce_sampled=args.coalesce_sampled)
     elif args.generate == 'podcast':
-        conductor = HistoryPodcaster(working_dir=working_dir, env=args.env)
+        conductor = HistoryPodcaster(working_dir=working_dir, env=args.env, drain_timeout=args.drain_timeout,
+                                     keep_plain_copies=not args.store_only, revision_mode=args.revision_mode,
+                                     speculation_budget=args.speculation_budget,
+                                     coalesce_sampled=args.coalesce_sampled)
     else:
         raise ValueError('no valid generation option provided')
 
@@ -52,16 +82,41 @@ if __name__ == '__main__':
         if operation not in VALID_OPERATIONS:
             raise ValueError(f"invalid generation option: {operation}")
 
+    exporter: TextfileExporter | None = None
+    if args.metrics_file:
+        exporter = TextfileExporter(Path(args.metrics_file))
+        exporter.start()
+
     # execute operations
     project_dir: Path | None = None
-    if 'develop' in args.operations:
-        logger.info(f"Developing concept...")
-        project_dir = conductor.develop_concept()
-    if 'draft' in args.operations:
-        logger.info(f"Creating draft...")
-        if not project_dir:
-            project_dir = working_dir / args.project_name
-            assert project_dir.is_dir(), f"{project_dir} does not exist"
-        conductor.draft_narrative(project_dir)
+    try:
+        if 'develop' in args.operations and 'draft' in args.operations and 'refresh' not in args.operations:
+            # one pipelined run: drafting starts as soon as the concept is final
+            logger.info(f"Developing concept and creating draft...")
+            conductor.develop_and_draft(bible_token_budget=args.bible_tokens, summarizer=args.summarizer,
+                                        deadline=args.deadline, best_of=args.best_of)
+        else:
+            if 'develop' in args.operations:
+                logger.info(f"Developing concept...")
+                project_dir = conductor.develop_concept()
+            if 'refresh' in args.operations:
+                logger.info(f"Refreshing concept...")
+                if not project_dir:
+                    project_dir = working_dir / args.project_name
+                    assert project_dir.is_dir(), f"{project_dir} does not exist"
+                conductor.refresh_concept(project_dir)
+            if 'draft' in args.operations:
+                logger.info(f"Creating draft...")
+                if not project_dir:
+                    project_dir = working_dir / args.project_name
+                    assert project_dir.is_dir(), f"{project_dir} does not exist"
+                conductor.draft_narrative(project_dir, bible_token_budget=args.bible_tokens,
+                                           summarizer=args.summarizer, deadline=args.deadline,
+                                           best_of=args.best_of)
+    except KeyboardInterrupt:
+        logger.info("Interrupted; see manifest.json in the project dir for what was completed")
+    finally:
+        if exporter is not None:
+            exporter.stop()
 
     logger.info("Done")
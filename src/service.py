@@ -0,0 +1,450 @@
+import argparse
+import json
+import logging
+import re
+import threading
+import uuid
+from dataclasses import dataclass, field, asdict
+from enum import Enum
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import Logger
+from pathlib import Path
+from typing import Callable, Dict, List
+from urllib.parse import urlparse, parse_qs
+
+from src import metrics
+from src.agents.scheduler import CallScheduler
+from src.agents.singleflight import SingleFlight
+from src.conductor import Conductor, PaperbackWriter, HistoryPodcaster
+from src.utils import utc_as_string, write_atomic
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+CONDUCTORS: Dict[str, Callable[..., Conductor]] = {
+    "longform-fiction": PaperbackWriter,
+    "podcast": HistoryPodcaster,
+}
+VALID_OPERATIONS: list[str] = ["develop", "draft"]
+DEVELOP_PARAMS: list[str] = ["genre", "starter", "num_concepts"]
+SUBMIT_FIELDS: list[str] = ["kind", "operations", "params", "env", "project_dir"]
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class Job:
+    """
+    A queued develop and/or draft request. Jobs are persisted as JSON so a restarted service can resume them.
+    """
+    kind: str
+    operations: List[str]
+    params: Dict[str, str | int] = field(default_factory=dict)
+    env: str = "local"
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.PENDING
+    project_dir: str | None = None
+    completed_operations: List[str] = field(default_factory=list)
+    progress: Dict[str, List[int]] = field(default_factory=dict)
+    error: str | None = None
+    created: str = field(default_factory=lambda: utc_as_string(compact=False))
+    finished: str | None = None
+
+    def validate(self):
+        if self.kind not in CONDUCTORS:
+            raise ValueError(f"invalid job kind: {self.kind}")
+        if not self.operations:
+            raise ValueError("no operations provided")
+        for operation in self.operations:
+            if operation not in VALID_OPERATIONS:
+                raise ValueError(f"invalid operation: {operation}")
+        if "develop" in self.operations:
+            # jobs run unattended so everything the human would normally be prompted for must be provided
+            missing: list = [p for p in DEVELOP_PARAMS if p not in self.params]
+            if missing:
+                raise ValueError(f"develop jobs require params: {missing}")
+        elif self.project_dir is None:
+            raise ValueError("draft-only jobs require a project_dir")
+
+    def to_dict(self) -> dict:
+        job: dict = asdict(self)
+        job["status"] = self.status.value
+        return job
+
+    @classmethod
+    def from_dict(cls, job: dict) -> "Job":
+        job = dict(job)
+        job["status"] = JobStatus(job.get("status", JobStatus.PENDING.value))
+        return Job(**job)
+
+
+class JobQueue:
+    """
+    Thread safe FIFO of jobs backed by a JSON file. Jobs that were running when the service went down are put
+    back in the queue on load.
+    """
+
+    def __init__(self, queue_file_path: Path):
+        self.queue_file_path: Path = queue_file_path
+        self._jobs: Dict[str, Job] = {}
+        self._pending: List[str] = []
+        self._cond: threading.Condition = threading.Condition()
+        self._load()
+
+    def _load(self):
+        if not self.queue_file_path.is_file():
+            return
+        with open(self.queue_file_path, "r") as f:
+            for entry in json.load(f):
+                job: Job = Job.from_dict(entry)
+                if job.status == JobStatus.RUNNING:
+                    logger.info(f"re-queueing interrupted job {job.job_id}")
+                    job.status = JobStatus.PENDING
+                self._jobs[job.job_id] = job
+                if job.status == JobStatus.PENDING:
+                    self._pending.append(job.job_id)
+
+    def _save(self):
+        # caller must hold the lock
+        self.queue_file_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.queue_file_path, json.dumps([job.to_dict() for job in self._jobs.values()], indent=2))
+
+    def submit(self, job: Job) -> Job:
+        job.validate()
+        with self._cond:
+            self._jobs[job.job_id] = job
+            self._pending.append(job.job_id)
+            self._save()
+            self._cond.notify()
+        logger.info(f"queued job {job.job_id} ({job.kind}: {job.operations})")
+        return job
+
+    def next(self, timeout: float = None) -> Job | None:
+        """
+        Blocks until a job is pending (or the timeout expires) and marks it as running.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._pending) > 0, timeout=timeout):
+                return None
+            job: Job = self._jobs[self._pending.pop(0)]
+            job.status = JobStatus.RUNNING
+            self._save()
+            return job
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drops a pending job from the queue; returns False if it isn't pending.
+        """
+        with self._cond:
+            if job_id not in self._pending:
+                return False
+            self._pending.remove(job_id)
+            self._jobs[job_id].status = JobStatus.CANCELLED
+            self._save()
+            return True
+
+    def requeue(self, job_id: str) -> Job:
+        """
+        Puts a cancelled or failed job back in the queue; finished operations and chapters are not redone.
+        """
+        with self._cond:
+            job: Job = self._jobs[job_id]
+            if job.status not in [JobStatus.CANCELLED, JobStatus.FAILED]:
+                raise ValueError(f"job {job_id} is {job.status.value}")
+            job.status = JobStatus.PENDING
+            job.error = None
+            job.finished = None
+            self._pending.append(job_id)
+            self._save()
+            self._cond.notify()
+            return job
+
+    def update(self, job: Job):
+        with self._cond:
+            self._jobs[job.job_id] = job
+            self._save()
+
+    def get(self, job_id: str) -> Job | None:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+
+class JobRunner:
+    """
+    Executes queued jobs on a bounded pool of worker threads, one conductor per job. All conductors share a
+    single call scheduler so LLM calls are prioritized and shared fairly across jobs, and identical calls in
+    flight in different jobs are coalesced.
+    """
+
+    def __init__(self, working_dir_path: Path, queue: JobQueue, max_workers: int = 2,
+                 scheduler: CallScheduler = None):
+        self.working_dir_path: Path = working_dir_path
+        self.queue: JobQueue = queue
+        self.max_workers: int = max_workers
+        self.scheduler: CallScheduler = scheduler or CallScheduler()
+        self.single_flight: SingleFlight = SingleFlight()
+        self._workers: List[threading.Thread] = []
+        self._stopping: threading.Event = threading.Event()
+        self._running: Dict[str, Conductor] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.max_workers):
+            worker: threading.Thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: float = None):
+        """
+        Stops taking new jobs and cancels running ones; they are re-queued (and resumed) on the next start.
+        """
+        self._stopping.set()
+        with self._lock:
+            for conductor in self._running.values():
+                conductor.cancel()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+
+    def cancel(self, job_id: str) -> bool:
+        if self.queue.cancel(job_id):
+            return True
+        with self._lock:
+            conductor: Conductor | None = self._running.get(job_id)
+        if conductor is None:
+            return False
+        conductor.cancel()
+        return True
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job: Job | None = self.queue.next(timeout=0.5)
+            if job is not None:
+                self.run_job(job)
+
+    def run_job(self, job: Job):
+        logger.info(f"running job {job.job_id}")
+
+        def on_progress(stage: str, completed: int, total: int):
+            job.progress[stage] = [completed, total]
+            self.queue.update(job)
+
+        conductor: Conductor | None = None
+        try:
+            conductor = CONDUCTORS[job.kind](working_dir=self.working_dir_path, env=job.env,
+                                             progress_callback=on_progress, scheduler=self.scheduler,
+                                             single_flight=self.single_flight, project=job.job_id)
+            with self._lock:
+                self._running[job.job_id] = conductor
+            if "develop" in job.operations and "develop" not in job.completed_operations:
+                params: dict = dict(job.params)
+                params.setdefault("selection", 1)
+                project_dir: Path | None = conductor.develop_concept(**params)
+                if project_dir is None:
+                    raise RuntimeError("concept development failed")
+                job.project_dir = str(project_dir)
+                job.completed_operations.append("develop")
+                self.queue.update(job)
+            if "draft" in job.operations:
+                # a re-queued job picks up after the last finished chapter
+                if conductor.draft_narrative(self._project_path(job), resume=True) is None:
+                    raise RuntimeError("drafting failed")
+                job.completed_operations.append("draft")
+            job.status = JobStatus.SUCCEEDED
+        except Exception as e:
+            if conductor is not None and conductor.cancelled:
+                # stopped on request; leave it running when the service itself is shutting down so it's resumed
+                logger.info(f"job {job.job_id} cancelled")
+                job.status = JobStatus.RUNNING if self._stopping.is_set() else JobStatus.CANCELLED
+            else:
+                logger.exception(e)
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+        finally:
+            with self._lock:
+                self._running.pop(job.job_id, None)
+            if job.status != JobStatus.RUNNING:
+                job.finished = utc_as_string(compact=False)
+                metrics.JOBS_FINISHED.inc(kind=job.kind, status=job.status.value)
+            self.queue.update(job)
+
+    def _project_path(self, job: Job) -> Path:
+        project_path: Path = Path(job.project_dir)
+        if not project_path.is_absolute():
+            project_path = self.working_dir_path / project_path
+        return project_path
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Minimal JSON API:
+    - POST /jobs - submit a job
+    - POST /jobs/<id>/cancel - cancel a pending or running job
+    - POST /jobs/<id>/requeue - reschedule a cancelled or failed job
+    - GET /jobs - list jobs
+    - GET /jobs/<id> - job status and progress
+    - GET /jobs/<id>/chapters - chapters written so far
+    - GET /jobs/<id>/chapters/<n>?offset=<bytes> - chapter text (from offset) as it is being written
+    - GET /metrics - process metrics in the Prometheus text format
+    """
+    queue: JobQueue = None
+    runner: JobRunner = None
+
+    def do_POST(self):
+        parts: list = [p for p in urlparse(self.path).path.split("/") if p]
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] in ["cancel", "requeue"]:
+            return self._post_job_action(parts[1], parts[2])
+        if parts != ["jobs"]:
+            return self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+        try:
+            length: int = int(self.headers.get("Content-Length", 0))
+            request: dict = json.loads(self.rfile.read(length) or b"{}")
+            job: Job = Job(**{k: v for k, v in request.items() if k in SUBMIT_FIELDS})
+            self.queue.submit(job)
+        except (TypeError, ValueError) as e:
+            return self._send_json({"error": str(e)}, HTTPStatus.BAD_REQUEST)
+        self._send_json(job.to_dict(), HTTPStatus.ACCEPTED)
+
+    def _post_job_action(self, job_id: str, action: str):
+        if self.queue.get(job_id) is None:
+            return self._send_json({"error": f"no such job {job_id}"}, HTTPStatus.NOT_FOUND)
+        try:
+            if action == "cancel" and not self.runner.cancel(job_id):
+                raise ValueError(f"job {job_id} is not pending or running")
+            if action == "requeue":
+                self.queue.requeue(job_id)
+        except ValueError as e:
+            return self._send_json({"error": str(e)}, HTTPStatus.CONFLICT)
+        self._send_json(self.queue.get(job_id).to_dict(), HTTPStatus.ACCEPTED)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts: list = [p for p in url.path.split("/") if p]
+        if parts == ["metrics"]:
+            return self._send_metrics()
+        if parts == ["jobs"]:
+            return self._send_json([job.to_dict() for job in self.queue.list()])
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+        job: Job | None = self.queue.get(parts[1])
+        if job is None:
+            return self._send_json({"error": f"no such job {parts[1]}"}, HTTPStatus.NOT_FOUND)
+        if len(parts) == 2:
+            return self._send_json(job.to_dict())
+        if parts[2] != "chapters" or job.project_dir is None:
+            return self._send_json({"error": "not found"}, HTTPStatus.NOT_FOUND)
+
+        chapters: Dict[int, Path] = self._chapter_files(self.runner._project_path(job))
+        if len(parts) == 3:
+            return self._send_json([{"chapter": n, "bytes": p.stat().st_size} for n, p in sorted(chapters.items())])
+        if not parts[3].isdigit() or int(parts[3]) not in chapters:
+            return self._send_json({"error": "no such chapter"}, HTTPStatus.NOT_FOUND)
+        offset_param: str = parse_qs(url.query).get("offset", ["0"])[0]
+        if not offset_param.isdecimal():
+            return self._send_json({"error": f"invalid offset {offset_param}"}, HTTPStatus.BAD_REQUEST)
+        offset: int = int(offset_param)
+        with open(chapters[int(parts[3])], "rb") as f:
+            f.seek(offset)
+            body: bytes = f.read()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Next-Offset", str(offset + len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _chapter_files(project_path: Path) -> Dict[int, Path]:
+        """
+        Finished chapters and the one being drafted (still in its partial file).
+        """
+        chapters: Dict[int, Path] = {}
+        for path in sorted(project_path.glob("*.txt*")):
+            match = re.fullmatch(r"(?:chapter|segment)_(\d+)\.txt(\.partial)?", path.name)
+            if match and (int(match.group(1)) not in chapters or not match.group(2)):
+                chapters[int(match.group(1))] = path
+        return chapters
+
+    def _send_metrics(self):
+        metrics.JOBS_QUEUED.set(self.queue.depth())
+        body: bytes = metrics.REGISTRY.render().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status: HTTPStatus = HTTPStatus.OK):
+        body: bytes = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def create_server(working_dir_path: Path, host: str = "127.0.0.1", port: int = 8080, max_workers: int = 2,
+                  max_llm_calls: int = 8) -> (ThreadingHTTPServer, JobRunner):
+    queue: JobQueue = JobQueue(working_dir_path / "jobs" / "queue.json")
+    runner: JobRunner = JobRunner(working_dir_path, queue, max_workers=max_workers,
+                                  scheduler=CallScheduler(max_concurrency=max_llm_calls))
+    handler = type("BoundJobRequestHandler", (JobRequestHandler,), {"queue": queue, "runner": runner})
+    server: ThreadingHTTPServer = ThreadingHTTPServer((host, port), handler)
+    return server, runner
+
+
+if __name__ == '__main__':
+    """
+    Local job service
+
+    Invoked by (e.g.)
+    `python -m src.service /path/to/working_dir -p 8080 -w 2`
+
+    """
+    from src.logutils import create_logger
+    create_logger("scrAIbe")
+
+    parser = argparse.ArgumentParser(description='scrAIbe job service')
+    parser.add_argument('working_dir', type=str,
+                        help='Path to parent location of working directories')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('-p', '--port', type=int, default=8080,
+                        help='Port to listen on (default: 8080)')
+    parser.add_argument('-w', '--workers', type=int, default=2,
+                        help='Max number of jobs executed concurrently (default: 2)')
+    parser.add_argument('-c', '--max-llm-calls', type=int, default=8,
+                        help='Max number of concurrent LLM calls across all jobs (default: 8)')
+    args = parser.parse_args()
+
+    working_dir: Path = Path(args.working_dir)
+    assert working_dir.is_dir()
+
+    server, runner = create_server(working_dir, host=args.host, port=args.port, max_workers=args.workers,
+                                   max_llm_calls=args.max_llm_calls)
+    runner.start()
+    logger.info(f"serving on {args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        runner.stop()
+        logger.info("Done")
@@ -0,0 +1,96 @@
+import logging
+import re
+from logging import Logger
+from typing import List
+
+import numpy as np
+
+from src.retrieval import HashingVectorizer, tokenize
+
+logger: Logger = logging.getLogger("scrAIbe")
+
+SUMMARY_METHODS: List[str] = ["textrank", "centroid"]
+# length of each chapter summary, and of all of them together as the running summary of the book
+CHAPTER_SUMMARY_WORDS: int = 120
+BOOK_SUMMARY_WORDS: int = 600
+# sentences with fewer content words than this (e.g. short lines of dialogue) are left out of summaries
+MIN_SENTENCE_TOKENS: int = 4
+# TextRank: damping factor and power iteration limits
+DAMPING: float = 0.85
+MAX_ITERATIONS: int = 50
+TOLERANCE: float = 1e-6
+
+# sentence ends, including inside closing quotes (dialogue)
+_SENTENCE_BREAK: re.Pattern = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"'”’)])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [" ".join(s.split()) for s in _SENTENCE_BREAK.split(text) if s.strip()]
+
+
+def sentence_scores(sentences: List[str], method: str = "textrank") -> np.ndarray:
+    """
+    Salience of each sentence: its TextRank (PageRank over the sentence similarity graph) or its cosine similarity
+    to the centroid of all sentences.
+    """
+    if method not in SUMMARY_METHODS:
+        raise ValueError(f"invalid summary method {method}")
+    vectors: np.ndarray = HashingVectorizer(n_features=2 ** 12, ngrams=1).transform(sentences)
+    if method == "centroid":
+        centroid: np.ndarray = vectors.mean(axis=0)
+        return vectors @ (centroid / max(float(np.linalg.norm(centroid)), 1e-9))
+
+    similarity: np.ndarray = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight: np.ndarray = similarity.sum(axis=1, keepdims=True)
+    # a sentence sharing no words with any other only gets the base rank
+    transition: np.ndarray = np.divide(similarity, out_weight, out=np.zeros_like(similarity),
+                                       where=out_weight > 0)
+    count: int = len(sentences)
+    rank: np.ndarray = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(MAX_ITERATIONS):
+        updated: np.ndarray = (1.0 - DAMPING) / count + DAMPING * (transition.T @ rank)
+        converged: bool = float(np.abs(updated - rank).sum()) < TOLERANCE
+        rank = updated
+        if converged:
+            break
+    return rank
+
+
+def extractive_summary(text: str, max_words: int = CHAPTER_SUMMARY_WORDS, method: str = "textrank") -> str:
+    """
+    Summarizes text locally by picking its most salient sentences (see sentence_scores) that fit in max_words,
+    in their original order. Text that already fits is returned as is (whitespace normalized).
+    """
+    sentences: List[str] = split_sentences(text)
+    if sum(len(s.split()) for s in sentences) <= max_words:
+        return " ".join(sentences)
+
+    scores: np.ndarray = sentence_scores(sentences, method)
+    # the most salient sentences with some substance (fragments out of context are noise)
+    candidates: List[int] = [idx for idx, s in enumerate(sentences) if len(tokenize(s)) >= MIN_SENTENCE_TOKENS]
+    order: List[int] = sorted(candidates or range(len(sentences)), key=lambda idx: -float(scores[idx]))
+    selected: List[int] = []
+    words: int = 0
+    for idx in order:
+        length: int = len(sentences[idx].split())
+        if words + length <= max_words:
+            selected.append(idx)
+            words += length
+    if not selected:
+        # every sentence is longer than the budget
+        return " ".join(sentences[order[0]].split()[:max_words])
+    return " ".join(sentences[idx] for idx in sorted(selected))
+
+
+def running_summary(chapter_summaries: List[str], max_words: int = BOOK_SUMMARY_WORDS,
+                    method: str = "textrank") -> List[str]:
+    """
+    Keeps the summaries of all chapters so far within max_words: once they no longer fit, each is compressed to
+    an equal share of the budget, so the context sent with each page stops growing with the book.
+    """
+    if sum(len(s.split()) for s in chapter_summaries) <= max_words:
+        return list(chapter_summaries)
+    share: int = max(MIN_SENTENCE_TOKENS * 4, max_words // len(chapter_summaries))
+    logger.debug(f"compressing {len(chapter_summaries)} chapter summaries to {share} words each")
+    return [extractive_summary(summary, share, method) for summary in chapter_summaries]
@@ -0,0 +1,67 @@
+"""
+Compares chapter summarizers on speed and on the size of the running book summary sent with every page, e.g.
+
+python -m src.summarizer_benchmark -c 12 -l 0.8
+
+The LLM summarizer runs against the offline fake model with a simulated latency (-l seconds per call plus the
+time to stream the summary), so the numbers show the extra round trip per chapter rather than a real model's.
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage
+
+from src.agents.actor import CreativeMode
+from src.agents.author import Author
+from src import logutils
+from src.agents.fake_llm import FakeChatModel
+from src.prompt_manager import PromptManager
+from src.summarizer import CHAPTER_SUMMARY_WORDS, extractive_summary, running_summary
+from src.utils import StoryContext, estimate_tokens
+
+CONTEXT: StoryContext = StoryContext(concept="A lighthouse keeper finds a letter that was never sent.")
+
+
+def chapters(count: int, words: int) -> list[str]:
+    llm: FakeChatModel = FakeChatModel(seed=7)
+    return [llm.invoke([HumanMessage(content=f"Write chapter {n} in {words} words")]).content
+            for n in range(1, count + 1)]
+
+
+def run(name: str, summarize, texts: list[str], full_tokens: int):
+    start: float = time.perf_counter()
+    summaries: list[str] = [summarize(text, number) for number, text in enumerate(texts, start=1)]
+    per_chapter: float = (time.perf_counter() - start) / len(texts) * 1e3
+    book_summary: str = "".join(f"Chapter {idx + 1}: {s}\n" for idx, s in enumerate(running_summary(summaries)))
+    tokens: int = estimate_tokens(book_summary)
+    print(f"{name:<24} {per_chapter:10.2f}ms/chapter {tokens:8} tokens/page ({tokens / full_tokens:.1%} of the "
+          f"chapters in full)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark chapter summarizers')
+    parser.add_argument('-c', '--chapters', type=int, default=12, help='Chapters to summarize')
+    parser.add_argument('-w', '--words', type=int, default=5000, help='Words per chapter')
+    parser.add_argument('-l', '--latency', type=float, default=0.8, help='Simulated LLM latency per call (s)')
+    args = parser.parse_args()
+
+    # measure the summarizers, not the terminal
+    logutils.wrapper_logger.setLevel(logging.INFO)
+
+    texts: list[str] = chapters(args.chapters, args.words)
+    full_tokens: int = sum(estimate_tokens(text) for text in texts)
+    print(f"{args.chapters} chapters of {args.words} words ({full_tokens} tokens)")
+
+    run("extractive (textrank)", lambda text, n: extractive_summary(text, CHAPTER_SUMMARY_WORDS), texts, full_tokens)
+    run("extractive (centroid)", lambda text, n: extractive_summary(text, CHAPTER_SUMMARY_WORDS, "centroid"), texts,
+        full_tokens)
+
+    author: Author = Author(
+        llm=FakeChatModel(seed=1, base_latency=args.latency, seconds_per_output_token=0.005),
+        prompt_manager=PromptManager(Path(__file__).parent / "prompts" / "prompts.toml"),
+        creative_mode=CreativeMode.AUTHOR_MODE,
+    )
+    run("llm", lambda text, n: author.summarize_chapter(CONTEXT, text, n, CHAPTER_SUMMARY_WORDS), texts,
+        full_tokens)
@@ -1,6 +1,27 @@
+import hashlib
 import json
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# the inputs each story element (and the derived summary) is produced from, in the order they're developed
+FIELD_INPUTS: Dict[str, List[str]] = {
+    "plot": ["concept"],
+    "themes": ["concept", "plot"],
+    "characters": ["concept", "plot", "themes"],
+    "world": ["concept", "plot"],
+    "storyline": ["concept", "plot", "themes", "characters", "world"],
+    "summary": ["concept", "plot", "themes", "characters", "world", "storyline"],
+}
+STORY_FIELDS: List[str] = ["concept", "plot", "themes", "characters", "world", "storyline"]
+
+
+def content_hash(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
 
 
 @dataclass
@@ -11,6 +32,8 @@ class StoryContext:
     storyline: str = None
     world: str = None
     themes: str = None
+    # field (or derived artifact) -> {"hash": hash of its content, "inputs": {input field: hash when produced}}
+    provenance: Dict[str, dict] = field(default_factory=dict)
 
     def __str__(self):
         return (
@@ -23,6 +46,49 @@ class StoryContext:
             f"\tstoryline: {self.storyline}"
         )
 
+    def record(self, name: str, value: str = None):
+        """
+        Records the content hash of a field (or of a derived artifact such as the summary, passed as value) along
+        with the hashes of the inputs it was produced from.
+        """
+        if value is None:
+            value = getattr(self, name)
+        self.provenance[name] = {
+            "hash": content_hash(value),
+            "inputs": {i: content_hash(getattr(self, i)) for i in FIELD_INPUTS.get(name, [])}
+        }
+
+    def record_all(self):
+        """
+        Marks the current state of all fields as mutually consistent.
+        """
+        for name in STORY_FIELDS:
+            if getattr(self, name) is not None:
+                self.record(name)
+
+    def edited_fields(self) -> List[str]:
+        """
+        Fields changed (e.g. by hand in context.json) since their provenance was recorded.
+        """
+        return [name for name in STORY_FIELDS
+                if name in self.provenance and self.provenance[name]["hash"] != content_hash(getattr(self, name))]
+
+    def stale_fields(self) -> List[str]:
+        """
+        Fields (and derived artifacts) whose inputs changed since they were produced, including everything
+        downstream of them, in the order they need to be recomputed. Edited fields are never stale: a hand edit
+        is kept even if its inputs were edited too, and is an input like any other for what's downstream of it.
+        """
+        edited: List[str] = self.edited_fields()
+        stale: List[str] = []
+        for name, inputs in FIELD_INPUTS.items():
+            if name not in self.provenance or name in edited:
+                continue
+            recorded: dict = self.provenance[name]["inputs"]
+            if any(i in stale or recorded.get(i) != content_hash(getattr(self, i)) for i in inputs):
+                stale.append(name)
+        return stale
+
     def marshall(self) -> str:
         return json.dumps(self, default=lambda o: o.__dict__)
 
@@ -35,11 +101,14 @@ class StoryContext:
             characters=context["characters"],
             storyline=context["storyline"],
             world=context["world"],
-            themes=context["themes"]
+            themes=context["themes"],
+            provenance=context.get("provenance", {})
         )
 
 
-def utc_as_string(dt: datetime = datetime.now(), compact: bool = True, sub_second: bool = False) -> str:
+def utc_as_string(dt: datetime = None, compact: bool = True, sub_second: bool = False) -> str:
+    # evaluate now() per call; a default argument would freeze the time at import
+    dt = dt or datetime.now()
     if compact:
         if sub_second:
             return dt.strftime('%Y%m%d_%H%M%S.%f')
@@ -50,3 +119,20 @@ def utc_as_string(dt: datetime = datetime.now(), compact: bool = True, sub_secon
             return dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
         else:
             return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def write_atomic(path: Path, content: str):
+    """
+    Writes to a temp file in the same dir and swaps it in, so readers (and crashes) never see a truncated file.
+    """
+    tmp_path: Path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token for English prose) for budgeting prompts without a tokenizer.
+    """
+    return (len(text) + 3) // 4 if text else 0
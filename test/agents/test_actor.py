@@ -0,0 +1,172 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_ollama import ChatOllama
+
+from src import metrics
+from src.agents.actor import ActorStoppedError, CreativeMode, LLMActor, max_tokens_for_words
+from src.agents.scheduler import CallScheduler, CallPriority
+from src.prompt_manager import PromptManager
+
+
+class TestLLMActor(unittest.TestCase):
+    def setUp(self):
+        self.mock_llm = Mock(spec=ChatOllama)
+        self.mock_llm.invoke.return_value = AIMessage(content="response")
+        self.actor = LLMActor(llm=self.mock_llm, prompt_manager=Mock(spec=PromptManager),
+                              creative_mode=CreativeMode.AUTHOR_MODE)
+
+    def test_stop_and_start(self):
+        self.actor.stop()
+        self.assertTrue(self.actor.stopped)
+        with self.assertRaises(ActorStoppedError):
+            self.actor._invoke("prompt")
+        self.mock_llm.invoke.assert_not_called()
+
+        self.actor.start()
+        self.assertEqual(self.actor._invoke("prompt").content, "response")
+
+    def test_fork_stops_on_its_own(self):
+        fork = self.actor.fork()
+        self.assertIs(fork.llm, self.mock_llm)
+        fork.stop()
+        self.assertTrue(fork.stopped)
+        self.assertFalse(self.actor.stopped)
+        self.assertEqual(self.actor._invoke("prompt").content, "response")
+
+        # stopping the actor stops its forks
+        other = self.actor.fork()
+        self.actor.stop()
+        self.assertTrue(other.stopped)
+        self.assertTrue(self.actor.fork().stopped)
+
+    def test_call_metrics(self):
+        calls = metrics.LLM_CALLS.value(actor="LLMActor", priority="CONCEPT", outcome="ok")
+        tokens = metrics.LLM_TOKENS.value(actor="LLMActor", direction="output")
+        latency = metrics.LLM_LATENCY.count(actor="LLMActor", priority="CONCEPT")
+        self.mock_llm.invoke.return_value = AIMessage(content="response", usage_metadata={
+            "input_tokens": 10, "output_tokens": 3, "total_tokens": 13})
+
+        self.actor._invoke("prompt", CallPriority.CONCEPT)
+
+        self.assertEqual(metrics.LLM_CALLS.value(actor="LLMActor", priority="CONCEPT", outcome="ok"), calls + 1)
+        self.assertEqual(metrics.LLM_TOKENS.value(actor="LLMActor", direction="output"), tokens + 3)
+        self.assertEqual(metrics.LLM_LATENCY.count(actor="LLMActor", priority="CONCEPT"), latency + 1)
+
+    def test_sizes_output_and_continues_truncated_output(self):
+        retries = metrics.LLM_RETRIES.value(actor="LLMActor", reason="continuation")
+        self.mock_llm.invoke.side_effect = [
+            AIMessage(content="The storm broke over the", response_metadata={"done_reason": "length"}),
+            AIMessage(content="harbor at dawn.", response_metadata={"done_reason": "stop"}),
+        ]
+
+        result = self.actor._invoke("Write 100 words", max_words=100)
+
+        self.assertEqual(result.content, "The storm broke over the harbor at dawn.")
+        first, second = self.mock_llm.invoke.call_args_list
+        self.assertEqual(first.kwargs["options"]["num_predict"], max_tokens_for_words(100))
+        # the continuation carries the partial output and only asks for the rest
+        self.assertEqual(second.args[0][1].content, "The storm broke over the")
+        self.assertLess(second.kwargs["options"]["num_predict"], first.kwargs["options"]["num_predict"])
+        self.assertEqual(metrics.LLM_RETRIES.value(actor="LLMActor", reason="continuation"), retries + 1)
+
+    def test_continuations_are_bounded(self):
+        self.mock_llm.invoke.return_value = AIMessage(content="more", response_metadata={"stop_reason": "max_tokens"})
+
+        result = self.actor._invoke("prompt")
+
+        self.assertEqual(result.content, "more more more")
+        self.assertEqual(self.mock_llm.invoke.call_count, 3)
+        self.assertNotIn("options", self.mock_llm.invoke.call_args.kwargs)
+
+    def test_guard_stops_degenerating_stream_and_continues(self):
+        self.actor.streaming = True
+        sent: list = []
+        loop = ["He looked out over the dark sea again. "] * 50
+
+        def stream(prompt, **kwargs):
+            chunks = ["The storm broke. "] + loop if not sent else ["Then the light went out."]
+            for text in chunks:
+                sent.append(text)
+                yield AIMessageChunk(content=text)
+
+        self.mock_llm.stream.side_effect = stream
+
+        result = self.actor._invoke("prompt", max_words=100, guard=True)
+
+        self.assertEqual(result.content, "The storm broke. He looked out over the dark sea again. "
+                                         "Then the light went out.")
+        # the loop was abandoned after a few repeats
+        self.assertLess(len(sent), 10)
+
+    def test_format_packs_prompt_into_context_window(self):
+        self.mock_llm.num_ctx = 512
+        actor = LLMActor(llm=self.mock_llm, prompt_manager=Mock(spec=PromptManager),
+                         creative_mode=CreativeMode.AUTHOR_MODE)
+        dropped = metrics.PROMPT_SLOTS_PACKED.value(slot="themes", action="dropped")
+        tplt = ChatPromptTemplate.from_messages([("system", "IDEA: {concept}\nSTORYLINE: {storyline}\n"
+                                                            "THEMES: {themes}")])
+        storyline = "Mara climbs the lighthouse and finds the letter. " * 20
+
+        prompt = actor._format(tplt, max_words=100, concept="A letter never sent.", storyline=storyline,
+                               themes="Grief and the sea. " * 40)
+
+        self.assertIn("IDEA: A letter never sent.", prompt)
+        self.assertIn(storyline.strip(), prompt)
+        self.assertTrue(prompt.rstrip().endswith("THEMES:"))
+        self.assertEqual(metrics.PROMPT_SLOTS_PACKED.value(slot="themes", action="dropped"), dropped + 1)
+        # a model with an unknown window isn't packed
+        self.assertIn("Grief", LLMActor(llm=Mock(), prompt_manager=Mock(spec=PromptManager),
+                                        creative_mode=CreativeMode.AUTHOR_MODE)._format(
+            tplt, concept="", storyline=storyline, themes="Grief and the sea. " * 40))
+
+    def test_streaming_call(self):
+        self.actor.streaming = True
+        self.mock_llm.stream.return_value = iter([AIMessageChunk(content="one "), AIMessageChunk(content="two")])
+
+        self.assertEqual(self.actor._invoke("prompt").content, "one two")
+        self.mock_llm.invoke.assert_not_called()
+
+    def test_stop_aborts_streaming_call(self):
+        self.actor.streaming = True
+        received: list = []
+
+        def stream(prompt):
+            for word in ["one ", "two ", "three"]:
+                received.append(word)
+                if len(received) == 2:
+                    self.actor.stop()
+                yield AIMessageChunk(content=word)
+
+        self.mock_llm.stream.side_effect = stream
+        with self.assertRaises(ActorStoppedError):
+            self.actor._invoke("prompt")
+        self.assertEqual(received, ["one ", "two "])
+
+    def test_stop_aborts_queued_call(self):
+        scheduler = CallScheduler(max_concurrency=1)
+        self.actor.scheduler = scheduler
+        blocker = scheduler.acquire(CallPriority.INTERACTIVE)
+        errors: list = []
+
+        def call():
+            try:
+                self.actor._invoke("prompt")
+            except ActorStoppedError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        while scheduler.depth() < 1:
+            time.sleep(0.001)
+        self.actor.stop()
+        thread.join(timeout=5)
+        scheduler.release(blocker)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(scheduler.depth(), 0)
+        self.mock_llm.invoke.assert_not_called()
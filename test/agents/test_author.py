@@ -46,6 +46,61 @@ class TestAuthor(unittest.TestCase):
         self.mock_prompt_manager.get_prompt.assert_called_with([self.author.creative_mode, "IDEATE"])
         self.mock_llm.invoke.assert_called_once()
 
+    def test_ideate_many_requests_only_missing_items(self):
+        """Test ideate_many repairs the list and re-requests only what is missing"""
+        self.mock_llm.invoke.side_effect = [
+            AIMessage(content='Here you go:\n["idea one", "idea "two"",  "idea thr'),
+            AIMessage(content='["idea three"]'),
+        ]
+        self.mock_prompt_manager.get_prompt.return_value = "{count} {exclude}"
+        streamed = []
+
+        result = self.author.ideate_many("fantasy", "magical library", 3, on_item=streamed.append)
+
+        self.assertEqual(result, ["idea one", 'idea "two"', "idea three"])
+        self.assertEqual(streamed, result)
+        self.assertEqual(self.mock_llm.invoke.call_count, 2)
+        second_prompt = self.mock_llm.invoke.call_args.args[0]
+        self.assertIn("1 - idea one", second_prompt)
+
+    def test_json_list_output_parser(self):
+        parser = Author.JsonListOutputParser()
+        self.assertEqual(parser.parse('```json\n["a", "b",]\n```'), ["a", "b"])
+        with self.assertRaises(ValueError):
+            parser.parse("no list here")
+
+    def test_plan_segments(self):
+        """Test plan_segments returns at most the requested segments"""
+        self.mock_llm.invoke.return_value = AIMessage(content='["the rise", "the war", "the fall"]')
+        self.mock_prompt_manager.get_prompt.return_value = "{count} segments of {storyline}"
+
+        result = self.author.plan_segments(self.test_context, 2)
+
+        self.assertEqual(result, ["the rise", "the war"])
+        self.mock_prompt_manager.get_prompt.assert_called_with([self.author.creative_mode, "PLAN", "SEGMENTS"])
+        self.assertIn("2 segments of Sarah discovers", self.mock_llm.invoke.call_args[0][0])
+
+    def test_write_transition(self):
+        """Test write_transition sends both sides of the join"""
+        self.mock_llm.invoke.return_value = AIMessage(content="Meanwhile...")
+        self.mock_prompt_manager.get_prompt.return_value = "{ending} | {next_section_number}: {opening}"
+
+        result = self.author.write_transition(self.test_context, "the end", "the start", 1, 60)
+
+        self.assertEqual(result, "Meanwhile...")
+        self.assertIn("the end | 2: the start", self.mock_llm.invoke.call_args[0][0])
+
+    def test_summarize_chapter(self):
+        """Test summarize_chapter sends the chapter and the length"""
+        self.mock_llm.invoke.return_value = AIMessage(content="Mara found the key.")
+        self.mock_prompt_manager.get_prompt.return_value = "{chapter_number}: {chapter} in {num_words} words"
+
+        result = self.author.summarize_chapter(self.test_context, "the chapter", 3, 120)
+
+        self.assertEqual(result, "Mara found the key.")
+        self.mock_prompt_manager.get_prompt.assert_called_with([self.author.creative_mode, "SUMMARIZE_CHAPTER"])
+        self.assertIn("3: the chapter in 120 words", self.mock_llm.invoke.call_args[0][0])
+
     def test_develop_plot_without_critique(self):
         """Test develop_plot method without critique"""
         # Setup mock response
@@ -77,6 +132,35 @@ class TestAuthor(unittest.TestCase):
         self.mock_prompt_manager.get_prompt.assert_any_call(
             [self.author.creative_mode, "DEVELOP_PLOT", "WITH_FEEDBACK"])
 
+    def test_revise_field_applies_edits(self):
+        """Test revise_field asks for edits to the numbered paragraphs and applies them"""
+        self.test_context.plot = "The library wakes.\n\nSarah hides.\n\nThe books win."
+        self.mock_llm.invoke.return_value = AIMessage(
+            content='[{"op": "replace", "paragraph": 2, "text": "Sarah fights back."}]')
+        self.mock_prompt_manager.get_prompt.return_value = "{numbered}"
+
+        result = self.author.revise_field("plot", self.test_context, critique="Sarah is too passive")
+
+        self.assertEqual(result, "The library wakes.\n\nSarah fights back.\n\nThe books win.")
+        self.assertIn("[2] Sarah hides.", self.mock_llm.invoke.call_args[0][0])
+        self.mock_prompt_manager.get_prompt.assert_any_call([self.author.creative_mode, "DEVELOP_PLOT", "BASE"])
+        self.mock_prompt_manager.get_prompt.assert_any_call([self.author.creative_mode, "REVISE", "EDITS"])
+
+    def test_revise_field_falls_back_to_regenerating(self):
+        """Test revise_field regenerates the field when the edits can't be applied"""
+        self.test_context.plot = "The library wakes.\n\nSarah hides."
+        self.mock_llm.invoke.side_effect = [
+            AIMessage(content='[{"op": "replace", "paragraph": 7, "text": "Out of range."}]'),
+            AIMessage(content="A whole new plot"),
+        ]
+        self.mock_prompt_manager.get_prompt.return_value = "test prompt"
+
+        result = self.author.revise_field("plot", self.test_context, critique="Need more conflict")
+
+        self.assertEqual(result, "A whole new plot")
+        self.mock_prompt_manager.get_prompt.assert_any_call(
+            [self.author.creative_mode, "DEVELOP_PLOT", "WITH_FEEDBACK"])
+
     def test_develop_themes(self):
         """Test develop_themes method"""
         # Setup mock response
@@ -172,5 +256,45 @@ class TestAuthor(unittest.TestCase):
 
         # Verify results
         self.assertEqual(result, mock_section)
-        self.mock_prompt_manager.get_prompt.assert_called_with([self.author.creative_mode, "DRAFT", "SECTION"])
+        self.mock_prompt_manager.get_prompt.assert_any_call([self.author.creative_mode, "DRAFT", "SECTION", "PREFIX"])
+        self.mock_prompt_manager.get_prompt.assert_called_with([self.author.creative_mode, "DRAFT", "SECTION", "SUFFIX"])
+
+    def test_write_section_prefix_is_stable(self):
+        """Test the story bible goes in a cacheable system prefix that is identical across pages"""
+        self.mock_llm.invoke.return_value = AIMessage(content="page")
+        self.mock_prompt_manager.get_prompt.side_effect = lambda path: {
+            "PREFIX": "WORLD: {world}", "SUFFIX": "SO FAR: {preceding_sections}"}[path[-1]]
+        self.author.prompt_caching = True
+
+        prompts = []
+        for page in range(2):
+            self.author.write_section(self.test_context, 250, page + 1, 2, f"page {page}", "")
+            prompts.append(self.mock_llm.invoke.call_args[0][0])
+
+        system, human = prompts[0]
+        self.assertEqual(system.content[0]["text"], "You are a helpful bot.\nWORLD: Modern day with magical elements")
+        self.assertEqual(system.content[0]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(human.content, "SO FAR: page 0")
+        self.assertEqual(prompts[1][0], system)
+
+
+    def test_write_section_with_bible(self):
+        """Test write_section only sends the provided bible excerpts"""
+        self.mock_llm.invoke.return_value = AIMessage(content="Written section content...")
+        self.mock_prompt_manager.get_prompt.return_value = "BIBLE: {bible}"
+
+        self.author.write_section(
+            context=self.test_context,
+            num_words=250,
+            section_number=1,
+            total_sections=3,
+            preceding_sections="",
+            extended_context="",
+            bible="CHARACTERS: Librarian Sarah"
+        )
 
+        self.mock_prompt_manager.get_prompt.assert_called_with(
+            [self.author.creative_mode, "DRAFT", "SECTION_RETRIEVED", "SUFFIX"])
+        prompt = "".join(m.content for m in self.mock_llm.invoke.call_args[0][0])
+        self.assertIn("BIBLE: CHARACTERS: Librarian Sarah", prompt)
+        self.assertNotIn(self.test_context.world, prompt)
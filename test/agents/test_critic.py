@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import Mock
+
+from langchain_core.messages import AIMessage
+from langchain_ollama import ChatOllama
+
+from src.agents.actor import CreativeMode
+from src.agents.critic import Critic, merge_critiques
+from src.agents.scheduler import CallPriority
+from src.prompt_manager import PromptManager
+from src.utils import StoryContext
+
+
+class TestCritic(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures"""
+        self.mock_llm = Mock(spec=ChatOllama)
+        self.mock_prompt_manager = Mock(spec=PromptManager)
+        self.critic = Critic(llm=self.mock_llm, prompt_manager=self.mock_prompt_manager,
+                             creative_mode=CreativeMode.AUTHOR_MODE)
+        self.test_context = StoryContext(
+            concept="A story about a magical library",
+            plot="The library contains books that come to life",
+            themes="Magic, Knowledge, Adventure",
+            characters="Librarian Sarah, Living Books",
+            world="Modern day with magical elements",
+            storyline="Sarah discovers the library's secret"
+        )
+
+    def test_critique_aspect(self):
+        """Test an aspect critic sends only its own prompt"""
+        self.mock_llm.invoke.return_value = AIMessage(content="Sarah needs a flaw")
+        self.mock_prompt_manager.get_prompt.return_value = "CHARACTERS: {characters}"
+
+        result = self.critic.critique_characters(self.test_context)
+
+        self.assertEqual(result, "Sarah needs a flaw")
+        self.mock_prompt_manager.get_prompt.assert_called_once_with(
+            [self.critic.creative_mode, "CRITIQUE", "CHARACTERS"])
+        self.assertIn("CHARACTERS: Librarian Sarah, Living Books", self.mock_llm.invoke.call_args[0][0])
+
+    def test_critique_writing(self):
+        """Test the writing critic gets the passage"""
+        self.mock_llm.invoke.return_value = AIMessage(content="too many adverbs")
+        self.mock_prompt_manager.get_prompt.return_value = "PASSAGE: {text}"
+
+        result = self.critic.critique_writing(self.test_context, "She quickly and quietly left.")
+
+        self.assertEqual(result, "too many adverbs")
+        self.assertIn("PASSAGE: She quickly and quietly left.", self.mock_llm.invoke.call_args[0][0])
+
+    def test_critique_priorities(self):
+        """Test concept critiques jump the drafting queue and writing review stays in the background"""
+        self.mock_llm.invoke.return_value = AIMessage(content="fine")
+        self.mock_prompt_manager.get_prompt.return_value = "{plot}"
+        self.critic._invoke = Mock(wraps=self.critic._invoke)
+
+        self.critic.critique_concept(self.test_context)
+        self.critic.critique_plot(self.test_context)
+        self.critic.critique_writing(self.test_context, "text")
+
+        self.assertEqual([c.args[1] for c in self.critic._invoke.call_args_list],
+                         [CallPriority.INTERACTIVE, CallPriority.INTERACTIVE, CallPriority.REVIEW])
+
+    def test_merge_critiques(self):
+        """Test aspect critiques are routed to their fields and approvals are dropped"""
+        merged = merge_critiques({
+            "plot": "raise the stakes",
+            "themes": "lean into loss",
+            "characters": "No changes needed.",
+            "storyline": "",
+        })
+
+        self.assertEqual(merged, {"plot": "On the plot:\nraise the stakes\n\nOn the themes:\nlean into loss"})
+
+    def test_merge_critiques_with_the_marker_in_a_critique(self):
+        critique = ("The opening works, no changes needed there. But the midpoint reversal is unearned: seed the "
+                    "betrayal in act one.")
+        merged = merge_critiques({"plot": critique, "world": '"**NO CHANGES NEEDED.**"'})
+
+        self.assertEqual(merged, {"plot": f"On the plot:\n{critique}"})
@@ -0,0 +1,58 @@
+import json
+import unittest
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.agents.fake_llm import FakeChatModel
+
+
+class TestFakeChatModel(unittest.TestCase):
+    def setUp(self):
+        self.llm = FakeChatModel(min_cacheable_tokens=10)
+        self.prefix = "You are a fiction writer. WORLD: a lighthouse on a cliff. " * 10
+
+    def messages(self, suffix: str, marked: bool = True):
+        system = SystemMessage(content=[{"type": "text", "text": self.prefix, "cache_control": {"type": "ephemeral"}}]
+                               if marked else self.prefix)
+        return [system, HumanMessage(content=suffix)]
+
+    def test_word_target(self):
+        result = self.llm.invoke(self.messages("Write approximately 40 words."))
+        self.assertEqual(len(result.content.split()), 40)
+
+    def test_max_tokens_cuts_off(self):
+        result = self.llm.invoke(self.messages("Write approximately 200 words."), max_tokens=50)
+        self.assertEqual(result.response_metadata["stop_reason"], "max_tokens")
+        self.assertLessEqual(self.llm.stats["output_tokens"], 50)
+        result = self.llm.invoke(self.messages("Write approximately 20 words."), max_tokens=50)
+        self.assertEqual(result.response_metadata["stop_reason"], "end_turn")
+
+    def test_json_list(self):
+        result = self.llm.invoke([HumanMessage(content="Create 4 distinct ideas. Respond with a JSON list.")])
+        self.assertEqual(len(json.loads(result.content)), 4)
+
+    def test_prefix_cache_pricing(self):
+        first = self.llm.invoke(self.messages("page 1, approximately 10 words"))
+        cost_after_first = self.llm.stats["cost"]
+        second = self.llm.invoke(self.messages("page 2, approximately 10 words"))
+
+        self.assertGreater(first.usage_metadata["input_token_details"]["cache_creation"], 0)
+        self.assertEqual(first.usage_metadata["input_token_details"]["cache_read"], 0)
+        self.assertEqual(second.usage_metadata["input_token_details"]["cache_read"],
+                         first.usage_metadata["input_token_details"]["cache_creation"])
+        self.assertLess(self.llm.stats["cost"] - cost_after_first, cost_after_first)
+
+    def test_unmarked_prompt_is_not_cached(self):
+        self.llm.invoke(self.messages("page 1", marked=False))
+        result = self.llm.invoke(self.messages("page 2", marked=False))
+        self.assertEqual(result.usage_metadata["input_token_details"]["cache_read"], 0)
+        self.assertEqual(self.llm.stats["cache_creation_tokens"], 0)
+
+    def test_stream(self):
+        chunks = list(self.llm.stream(self.messages("approximately 20 words")))
+        self.assertEqual(len("".join(c.content for c in chunks).split()), 20)
+        self.assertIsNotNone(chunks[-1].usage_metadata)
+
+
+if __name__ == '__main__':
+    unittest.main()
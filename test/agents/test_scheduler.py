@@ -0,0 +1,161 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock, MagicMock
+
+from langchain_core.messages import AIMessage
+from langchain_ollama import ChatOllama
+
+from src.agents.actor import CreativeMode
+from src.agents.author import Author
+from src.agents.scheduler import CallScheduler, CallPriority, SchedulerAbortedError, _Ticket
+from src.prompt_manager import PromptManager
+from src.utils import StoryContext
+
+
+class TestCallScheduler(unittest.TestCase):
+
+    def _run_queued(self, scheduler: CallScheduler, calls: list) -> list:
+        """
+        Occupies the only slot, queues the (label, priority, project) calls in order and returns the order in
+        which they were admitted once the slot is released.
+        """
+        order: list = []
+        blocker = scheduler.acquire(CallPriority.INTERACTIVE)
+
+        def call(label, priority, project):
+            with scheduler.slot(priority, project):
+                order.append(label)
+
+        threads: list = []
+        for idx, (label, priority, project) in enumerate(calls):
+            thread = threading.Thread(target=call, args=(label, priority, project))
+            thread.start()
+            threads.append(thread)
+            while scheduler.depth() < idx + 1:
+                time.sleep(0.001)
+
+        scheduler.release(blocker)
+        for thread in threads:
+            thread.join(timeout=5)
+        return order
+
+    def test_priority_classes(self):
+        scheduler = CallScheduler(max_concurrency=1, starvation_timeout=60)
+        order = self._run_queued(scheduler, [
+            ("review", CallPriority.REVIEW, "a"),
+            ("draft", CallPriority.DRAFT, "a"),
+            ("concept", CallPriority.CONCEPT, "a"),
+            ("interactive", CallPriority.INTERACTIVE, "a"),
+        ])
+        self.assertEqual(order, ["interactive", "concept", "draft", "review"])
+
+    def test_fair_queuing_between_projects(self):
+        scheduler = CallScheduler(max_concurrency=1, starvation_timeout=60)
+        order = self._run_queued(scheduler, [
+            ("a1", CallPriority.DRAFT, "a"),
+            ("a2", CallPriority.DRAFT, "a"),
+            ("a3", CallPriority.DRAFT, "a"),
+            ("b1", CallPriority.DRAFT, "b"),
+            ("b2", CallPriority.DRAFT, "b"),
+        ])
+        self.assertEqual(order, ["a1", "b1", "a2", "b2", "a3"])
+
+    def test_project_weights(self):
+        scheduler = CallScheduler(max_concurrency=1, starvation_timeout=60, project_weights={"a": 2.0})
+        order = self._run_queued(scheduler, [
+            ("a1", CallPriority.DRAFT, "a"),
+            ("a2", CallPriority.DRAFT, "a"),
+            ("a3", CallPriority.DRAFT, "a"),
+            ("a4", CallPriority.DRAFT, "a"),
+            ("b1", CallPriority.DRAFT, "b"),
+            ("b2", CallPriority.DRAFT, "b"),
+        ])
+        self.assertEqual(order, ["a1", "a2", "b1", "a3", "a4", "b2"])
+
+    def test_starvation_protection(self):
+        scheduler = CallScheduler(max_concurrency=1, starvation_timeout=0.05)
+        blocker = scheduler.acquire(CallPriority.INTERACTIVE)
+        order: list = []
+
+        def call(label, priority):
+            with scheduler.slot(priority):
+                order.append(label)
+
+        review = threading.Thread(target=call, args=("review", CallPriority.REVIEW))
+        review.start()
+        while scheduler.depth() < 1:
+            time.sleep(0.001)
+        # waited long enough to be promoted past a fresh draft call
+        time.sleep(0.2)
+        draft = threading.Thread(target=call, args=("draft", CallPriority.DRAFT))
+        draft.start()
+        while scheduler.depth() < 2:
+            time.sleep(0.001)
+
+        scheduler.release(blocker)
+        review.join(timeout=5)
+        draft.join(timeout=5)
+        self.assertEqual(order, ["review", "draft"])
+
+    def test_promoted_calls_rank_by_wait(self):
+        scheduler = CallScheduler(starvation_timeout=10)
+        now = time.monotonic()
+        # promoted from different classes: their finish tags are on different virtual clocks
+        review = _Ticket(CallPriority.REVIEW, "a", finish_tag=1.0, enqueued=now - 25, seq=2)
+        draft = _Ticket(CallPriority.DRAFT, "b", finish_tag=50.0, enqueued=now - 35, seq=1)
+        concept = _Ticket(CallPriority.CONCEPT, "c", finish_tag=0.5, enqueued=now, seq=3)
+        ranked = sorted([review, draft, concept], key=lambda t: scheduler._rank(t, now))
+        self.assertEqual(ranked, [draft, review, concept])
+
+    def test_idle_projects_are_forgotten(self):
+        scheduler = CallScheduler(max_concurrency=1, starvation_timeout=60)
+        self._run_queued(scheduler, [
+            ("a1", CallPriority.DRAFT, "a"),
+            ("b1", CallPriority.REVIEW, "b"),
+        ])
+        ticket = scheduler.acquire(CallPriority.DRAFT, "c")
+        self.assertEqual(list(scheduler._last_finish), [(CallPriority.DRAFT, "c")])
+        scheduler.release(ticket)
+        self.assertEqual(scheduler._last_finish, {})
+
+        aborted = threading.Event()
+        aborted.set()
+        blocker = scheduler.acquire(CallPriority.DRAFT, "c")
+        with self.assertRaises(SchedulerAbortedError):
+            scheduler.acquire(CallPriority.DRAFT, "d", abort=aborted)
+        self.assertNotIn((CallPriority.DRAFT, "d"), scheduler._last_finish)
+        scheduler.release(blocker)
+
+    def test_bounded_concurrency(self):
+        scheduler = CallScheduler(max_concurrency=2)
+        lock = threading.Lock()
+        active: list = [0, 0]
+
+        def call():
+            with scheduler.slot(CallPriority.DRAFT):
+                with lock:
+                    active[0] += 1
+                    active[1] = max(active[1], active[0])
+                time.sleep(0.01)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertEqual(active[1], 2)
+
+    def test_actor_calls_go_through_scheduler(self):
+        mock_llm = Mock(spec=ChatOllama)
+        mock_llm.invoke.return_value = AIMessage(content="plot")
+        mock_prompt_manager = Mock(spec=PromptManager)
+        mock_prompt_manager.get_prompt.return_value = "test prompt"
+        scheduler = MagicMock(spec=CallScheduler)
+        author = Author(llm=mock_llm, prompt_manager=mock_prompt_manager, creative_mode=CreativeMode.AUTHOR_MODE,
+                        scheduler=scheduler, project="p1")
+
+        self.assertEqual(author.develop_plot(StoryContext(concept="idea")), "plot")
+        scheduler.slot.assert_called_once_with(CallPriority.CONCEPT, "p1", abort=author._stop_event)
@@ -0,0 +1,157 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from langchain_core.messages import AIMessage
+from langchain_ollama import ChatOllama
+
+from src import metrics
+from src.agents.actor import ActorStoppedError, CreativeMode, LLMActor
+from src.agents.singleflight import SingleFlight, SingleFlightAbortedError
+from src.prompt_manager import PromptManager
+
+
+class TestSingleFlight(unittest.TestCase):
+    def _concurrently(self, flight: SingleFlight, key: str, call, count: int, abort: threading.Event = None) -> list:
+        results: list = [None] * count
+
+        def run(idx):
+            try:
+                results[idx] = flight.do(key, call, abort=abort)
+            except Exception as e:
+                results[idx] = e
+
+        threads = [threading.Thread(target=run, args=(idx,)) for idx in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        return results
+
+    def test_identical_calls_share_one_result(self):
+        flight = SingleFlight()
+        calls: list = []
+
+        def call():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+
+        results = self._concurrently(flight, "key", call, 4)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("result", False)] + [("result", True)] * 3)
+        self.assertEqual(flight.in_flight(), 0)
+        # nothing is kept once the call is done
+        self.assertEqual(flight.do("key", lambda: "again"), ("again", False))
+
+    def test_waiters_share_the_exception(self):
+        flight = SingleFlight()
+
+        def call():
+            time.sleep(0.1)
+            raise ValueError("failed")
+
+        results = self._concurrently(flight, "key", call, 3)
+
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_abort_waiting(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=flight.do, args=("key", lambda: release.wait(5)))
+        leader.start()
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        abort = threading.Event()
+        abort.set()
+
+        with self.assertRaises(SingleFlightAbortedError):
+            flight.do("key", lambda: "unused", abort=abort)
+        release.set()
+        leader.join(timeout=5)
+
+
+class TestCoalescedCalls(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+
+    def _actor(self, temperature: float, coalesce_sampled: bool = False) -> LLMActor:
+        llm = Mock(spec=ChatOllama)
+        llm.temperature = temperature
+        llm.model = "llama3.2"
+
+        def invoke(prompt, **kwargs):
+            time.sleep(0.1)
+            return AIMessage(content=f"response {time.monotonic()}")
+
+        llm.invoke.side_effect = invoke
+        return LLMActor(llm=llm, prompt_manager=Mock(spec=PromptManager), creative_mode=CreativeMode.AUTHOR_MODE,
+                        single_flight=self.flight, coalesce_sampled=coalesce_sampled, prompt_packing=False)
+
+    def _invoke_concurrently(self, actors: list, prompt: str = "prompt") -> list:
+        results: list = [None] * len(actors)
+        threads = [threading.Thread(target=lambda i=idx: results.__setitem__(i, actors[i]._invoke(prompt).content))
+                   for idx in range(len(actors))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        return results
+
+    def test_deterministic_calls_are_coalesced_across_actors(self):
+        hits = metrics.LLM_CACHE_HITS.value(actor="LLMActor", cache="singleflight")
+        actors = [self._actor(0.0), self._actor(0.0)]
+
+        results = self._invoke_concurrently(actors)
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(sum(actor.llm.invoke.call_count for actor in actors), 1)
+        self.assertEqual(metrics.LLM_CACHE_HITS.value(actor="LLMActor", cache="singleflight"), hits + 1)
+
+    def test_sampled_calls_only_coalesced_when_opted_in(self):
+        actors = [self._actor(0.8), self._actor(0.8)]
+        self._invoke_concurrently(actors)
+        self.assertEqual(sum(actor.llm.invoke.call_count for actor in actors), 2)
+
+        actors = [self._actor(0.8, coalesce_sampled=True), self._actor(0.8, coalesce_sampled=True)]
+        self._invoke_concurrently(actors)
+        self.assertEqual(sum(actor.llm.invoke.call_count for actor in actors), 1)
+
+    def test_different_settings_are_not_coalesced(self):
+        actors = [self._actor(0.0), self._actor(0.0)]
+        actors[1].llm.num_ctx = 4096
+        self._invoke_concurrently(actors)
+        self.assertEqual(sum(actor.llm.invoke.call_count for actor in actors), 2)
+
+    def test_waiter_calls_itself_when_the_shared_call_is_stopped(self):
+        leader, waiter = self._actor(0.0), self._actor(0.0)
+
+        def stopped(prompt, **kwargs):
+            time.sleep(0.1)
+            raise ActorStoppedError("stopped")
+
+        leader.llm.invoke.side_effect = stopped
+        results = [None, None]
+
+        def run(idx, actor):
+            try:
+                results[idx] = actor._invoke("prompt").content
+            except ActorStoppedError as e:
+                results[idx] = e
+
+        threads = [threading.Thread(target=run, args=(0, leader))]
+        threads[0].start()
+        while self.flight.in_flight() == 0:
+            time.sleep(0.001)
+        threads.append(threading.Thread(target=run, args=(1, waiter)))
+        threads[1].start()
+        leader.stop()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertIsInstance(results[0], ActorStoppedError)
+        self.assertTrue(results[1].startswith("response"))
+        self.assertEqual(waiter.llm.invoke.call_count, 1)
@@ -0,0 +1,88 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.artifact_store import ArtifactStore
+
+
+class TestArtifactStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project_dir = Path(self.tmp.name)
+        self.store = ArtifactStore(self.project_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        self.assertEqual(self.store.put("summary.md", "first"), 1)
+        self.assertEqual(self.store.put("summary.md", "second"), 2)
+        self.assertEqual(self.store.get("summary.md"), "second")
+        self.assertEqual(self.store.get("summary.md", version=1), "first")
+        self.assertEqual((self.project_dir / "summary.md").read_text(), "second")
+        self.assertEqual([v["version"] for v in self.store.history("summary.md")], [1, 2])
+
+    def test_unchanged_content_is_not_a_new_version(self):
+        self.store.put("context.json", "{}")
+        self.assertEqual(self.store.put("context.json", "{}"), 1)
+        self.assertEqual(len(self.store.history("context.json")), 1)
+
+    def test_blobs_are_deduplicated(self):
+        self.store.put("concept.json", "same content")
+        self.store.put("context.json", "same content")
+        self.assertEqual(len([p for p in self.store.blob_dir.rglob("*") if p.is_file()]), 1)
+
+    def test_shared_blob_dir_deduplicates_across_projects(self):
+        shared = self.project_dir / "blobs"
+        first = ArtifactStore(self.project_dir / "first", blob_dir=shared)
+        second = ArtifactStore(self.project_dir / "second", blob_dir=shared)
+        first.put("chapter_1.txt", "same content")
+        second.put("chapter_1.txt", "same content")
+
+        self.assertEqual(len([p for p in shared.rglob("*") if p.is_file()]), 1)
+        self.assertFalse((self.project_dir / "second" / ".artifacts" / "blobs").exists())
+        self.assertEqual(second.get("chapter_1.txt"), "same content")
+        self.assertEqual(first.names(), ["chapter_1.txt"])
+
+    def test_reads_project_blobs_with_a_shared_blob_dir(self):
+        self.store.put("summary.md", "kept in the project")
+        store = ArtifactStore(self.project_dir, blob_dir=self.project_dir / "shared")
+        self.assertEqual(store.get("summary.md"), "kept in the project")
+
+    def test_composite_references_parts(self):
+        self.store.put("chapter_1.txt", "one")
+        self.store.put("chapter_2.txt", "two")
+        blobs = len([p for p in self.store.blob_dir.rglob("*") if p.is_file()])
+        self.store.put_composite("full_narrative.txt", ["chapter_1.txt", "chapter_2.txt"])
+        self.assertEqual(self.store.get("full_narrative.txt"), "one\n\ntwo")
+        self.assertEqual((self.project_dir / "full_narrative.txt").read_text(), "one\n\ntwo")
+        self.assertEqual(len([p for p in self.store.blob_dir.rglob("*") if p.is_file()]), blobs)
+        self.assertEqual(self.store.history("full_narrative.txt")[-1]["size"], len("one\n\ntwo"))
+
+    def test_store_only(self):
+        store = ArtifactStore(self.project_dir, materialize=False)
+        store.put("chapter_1.txt", "text")
+        self.assertFalse((self.project_dir / "chapter_1.txt").exists())
+        self.assertEqual(store.get("chapter_1.txt"), "text")
+        self.assertEqual(store.names(), ["chapter_1.txt"])
+
+    def test_gzip_fallback(self):
+        with patch("src.artifact_store.zstandard", None):
+            self.store.put("summary.md", "compressed " * 100)
+            blob = next(p for p in self.store.blob_dir.rglob("*") if p.is_file())
+            self.assertEqual(blob.suffix, ".gz")
+            self.assertLess(blob.stat().st_size, len("compressed " * 100))
+            self.assertEqual(gzip.decompress(blob.read_bytes()).decode("utf-8"), "compressed " * 100)
+            self.assertEqual(self.store.get("summary.md"), "compressed " * 100)
+
+    def test_missing_artifact(self):
+        self.assertFalse(self.store.exists("nope.txt"))
+        self.assertEqual(self.store.history("nope.txt"), [])
+        with self.assertRaises(KeyError):
+            self.store.get("nope.txt")
+
+
+if __name__ == '__main__':
+    unittest.main()
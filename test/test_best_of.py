@@ -0,0 +1,105 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from src import metrics
+from src.agents.actor import Actor, ActorStoppedError
+from src.best_of import BestOfSampler, score_page
+
+PAGE = ("Mara climbed the lighthouse stairs with the brass key in her pocket. The storm had cut the village off from "
+        "the harbor road. She thought about her sister, who had left for the city years ago.")
+
+
+class FakeActor(Actor):
+    pass
+
+
+class TestScorePage(unittest.TestCase):
+    def test_good_page_scores_high(self):
+        self.assertGreater(score_page(PAGE, len(PAGE.split())), 0.95)
+        self.assertEqual(score_page("", 100), 0.0)
+
+    def test_short_unfinished_and_repetitive_pages_score_lower(self):
+        good = score_page(PAGE, 35)
+        self.assertLess(score_page(PAGE, 70), good)
+        self.assertLess(score_page(PAGE.rstrip("."), 35), good)
+        loop = " ".join(["The storm broke over the harbor again."] * 5)
+        self.assertLess(score_page(loop, 35), 0.5)
+        self.assertLess(score_page("Sure! Here is the next section:\n" + PAGE, 41), good)
+
+
+class TestBestOfSampler(unittest.TestCase):
+    def setUp(self):
+        self.actor = FakeActor(Mock(), Mock())
+
+    def test_keeps_the_best_candidate(self):
+        pages = iter([PAGE[:60], PAGE, PAGE[:120]])
+        lock = threading.Lock()
+
+        def write(actor):
+            with lock:
+                return next(pages)
+
+        sampler = BestOfSampler(candidates=3, threshold=1.1)
+        self.assertEqual(sampler.sample(self.actor, write, 35), PAGE)
+        self.assertEqual(sampler.stats.pages, 1)
+        self.assertEqual(sampler.stats.candidates, 3)
+        self.assertEqual(sampler.stats.cancelled, 0)
+        self.assertEqual(sampler.stats.accepted_early, 0)
+
+    def test_cancels_the_rest_once_a_candidate_is_good_enough(self):
+        cancelled = metrics.BEST_OF_CANDIDATES.value(outcome="cancelled")
+        started = threading.Barrier(3)
+        forks = []
+
+        def write(actor):
+            forks.append(actor)
+            started.wait(1)
+            if len(forks) == 3 and actor is forks[0]:
+                return PAGE
+            # a slow candidate: streams until it is stopped
+            while not actor.stopped:
+                threading.Event().wait(0.01)
+            raise ActorStoppedError("stopped")
+
+        sampler = BestOfSampler(candidates=3)
+        self.assertEqual(sampler.sample(self.actor, write, 35), PAGE)
+        self.assertEqual(sampler.stats.accepted_early, 1)
+        self.assertEqual(sampler.stats.cancelled, 2)
+        self.assertTrue(all(fork.stopped for fork in forks))
+        self.assertFalse(self.actor.stopped)
+        self.assertEqual(metrics.BEST_OF_CANDIDATES.value(outcome="cancelled"), cancelled + 2)
+
+    def test_failed_candidates(self):
+        calls = []
+
+        def write(actor):
+            calls.append(actor)
+            if len(calls) > 1:
+                raise ValueError("model error")
+            return PAGE
+
+        sampler = BestOfSampler(candidates=3, threshold=1.1)
+        self.assertEqual(sampler.sample(self.actor, write, 35), PAGE)
+        self.assertEqual(sampler.stats.failed, 2)
+
+        def fail(actor):
+            raise ValueError("model error")
+
+        with self.assertRaises(ValueError):
+            sampler.sample(self.actor, fail, 35)
+
+    def test_stopped_actor(self):
+        self.actor.stop()
+
+        def write(actor):
+            if actor.stopped:
+                raise ActorStoppedError("stopped")
+            return PAGE
+
+        with self.assertRaises(ActorStoppedError):
+            BestOfSampler().sample(self.actor, write, 35)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,8 @@
+import shutil
 import tempfile
+from datetime import datetime, timedelta
+import threading
+from concurrent.futures import CancelledError
 import unittest
 from unittest.mock import Mock, patch, MagicMock, DEFAULT
 from pathlib import Path
@@ -7,12 +11,15 @@ import json
 from langchain_aws import ChatBedrock
 from langchain_ollama import ChatOllama
 
-from src.agents.actor import CreativeMode
+from src.agents.actor import ActorStoppedError, CreativeMode
 from src.agents.author import Author
 from src.agents.critic import Critic
 from src.agents.editor import Editor
 from src.agents.human import Human
-from src.conductor import PaperbackWriter, Conductor
+from src.conductor import HistoryPodcaster, PaperbackWriter, Conductor, RunManifest
+from src.continuity import ContinuityIndex
+from src.narrative import NarrativeWriter
+from src.retrieval import BIBLE_CORE_FIELDS, BibleIndex
 from src.utils import StoryContext
 
 
@@ -39,11 +46,7 @@ class TestConductor(unittest.TestCase):
 
     def tearDown(self):
         # Clean up test directory
-        if self.test_dir.exists():
-            for file in self.test_dir.glob("**/*"):
-                if file.is_file():
-                    file.unlink()
-            self.test_dir.rmdir()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
 
     @patch('src.prompt_manager.PromptManager')
     def test_conductor_initialization(self, mock_prompt_manager):
@@ -78,6 +81,120 @@ class TestConductor(unittest.TestCase):
         conductor.author.stop.assert_called_once()
         conductor.author.stop.assert_called_once()
 
+    def test_develop_concepts_in_the_same_second(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        conductor = FauxConductor(working_dir=temp_dir.name)
+
+        with patch("src.conductor.utc_as_string", return_value="20240101_120000"):
+            first = conductor.develop_concept()
+            second = conductor.develop_concept()
+
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.name.startswith("20240101_120000_"))
+        self.assertTrue(second.is_dir())
+
+    def test_run_writes_manifest(self):
+        """Test that a run always records a manifest, including for a cancelled run"""
+
+        conductor = FauxConductor(
+            working_dir=self.test_dir,
+        )
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        out_dir = Path(temp_dir.name)
+        (out_dir / "concept.json").write_text("{}")
+
+        def cancelled():
+            conductor._checkpoint(context=StoryContext(concept="half done"), ideas=["idea"])
+            raise ActorStoppedError("stopped")
+
+        self.assertIsNone(conductor._run("develop", out_dir, cancelled))
+        manifest = json.loads((out_dir / "manifest.json").read_text())
+        self.assertEqual(manifest["status"], "cancelled")
+        self.assertEqual(manifest["artifacts"], ["concept.json"])
+        self.assertEqual(manifest["context"]["concept"], "half done")
+        self.assertEqual(manifest["ideas"], ["idea"])
+        conductor.author.start.assert_called_once()
+        conductor.author.stop.assert_called_once()
+
+        self.assertEqual(conductor._run("develop", out_dir, lambda: None), out_dir)
+        manifest = json.loads((out_dir / "manifest.json").read_text())
+        self.assertEqual(manifest["status"], "completed")
+        self.assertIsNone(manifest["context"])
+
+    def test_cancel_between_operations_is_kept(self):
+        conductor = FauxConductor(working_dir=self.test_dir)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        out_dir = Path(temp_dir.name)
+        operation = MagicMock()
+
+        # e.g. a job cancelled between its develop and draft stages
+        conductor.cancel()
+
+        self.assertIsNone(conductor._run("draft", out_dir, operation))
+        operation.assert_not_called()
+        self.assertEqual(json.loads((out_dir / "manifest.json").read_text())["status"], "cancelled")
+        self.assertTrue(conductor.cancelled)
+
+    def test_generate_ideas_replaces_duplicates(self):
+        """Test that only near-duplicate ideas are re-requested"""
+
+        conductor = FauxConductor(
+            working_dir=self.test_dir,
+        )
+        conductor.author.ideate_many.side_effect = [
+            ["A wizard finds a living library under the castle.",
+             "A wizard finds a living library under the castle!",
+             "A detective solves a murder on an arctic cruise."],
+            ["Two bakers fall in love at the village fair."],
+        ]
+
+        ideas = conductor._generate_ideas("fantasy", "wizards", 3)
+
+        self.assertEqual(conductor.author.ideate_many.call_count, 2)
+        count, exclude = conductor.author.ideate_many.call_args.args[2:4]
+        self.assertEqual(count, 1)
+        self.assertEqual(len(exclude), 2)
+        self.assertEqual(ideas, ["A wizard finds a living library under the castle.",
+                                 "A detective solves a murder on an arctic cruise.",
+                                 "Two bakers fall in love at the village fair."])
+
+    def test_cancel_keeps_streamed_ideas(self):
+        """Test that ideas streamed before a cancel are checkpointed and no further calls are made"""
+
+        conductor = FauxConductor(
+            working_dir=self.test_dir,
+        )
+        conductor._start()
+        conductor._manifest = RunManifest(operation="develop")
+        started = threading.Event()
+        release = threading.Event()
+
+        def ideate_many(genre, starter, count, exclude, on_item):
+            on_item("finished idea")
+            started.set()
+            release.wait(timeout=5)
+            return ["finished idea"]
+
+        conductor.author.ideate_many.side_effect = ideate_many
+        def generate_ideas():
+            with self.assertRaises(ActorStoppedError):
+                conductor._generate_ideas("fantasy", "wizards", 3)
+
+        thread = threading.Thread(target=generate_ideas)
+        thread.start()
+        started.wait(timeout=5)
+        self.assertEqual(conductor._manifest.ideas, ["finished idea"])
+        threading.Timer(0.05, release.set).start()
+        conductor.cancel()
+        conductor._stop(cancel=True)
+        thread.join(timeout=5)
+
+        self.assertEqual(conductor.author.ideate_many.call_count, 1)
+        self.assertEqual(conductor._manifest.ideas, ["finished idea"])
+
 
 class TestPaperbackWriter(unittest.TestCase):
     def setUp(self):
@@ -122,15 +239,279 @@ class TestPaperbackWriter(unittest.TestCase):
             context = StoryContext()
             context.concept = "Test concept"
 
-            chapter = writer._write_chapter(
+            narrative = NarrativeWriter(Path(working_dir))
+            section = writer._write_chapter(
                 context,
+                narrative,
                 pages_per_chapter=2,
                 words_per_page=100,
                 previous_chapter_summaries=["Chapter 1 summary"]
             )
 
-            self.assertEqual("Test page content Test page content", chapter)
+            self.assertEqual("Test page content Test page content", narrative.read(1))
+            self.assertEqual("Test page content Test page content", (Path(working_dir) / "chapter_1.txt").read_text())
+            self.assertEqual(len(section["pages"]), 2)
             self.assertEqual(mock_author_instance.write_section.call_count, 2)
+            # the chapter so far is read back from disk for the second page
+            self.assertEqual(mock_author_instance.write_section.call_args.args[4], "Test page content\n")
+
+    def test_write_chapter_with_bible_index(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "Test page content"
+            writer.author = mock_author_instance
+
+            context = StoryContext(concept="Test concept", world="A castle on a hill.",
+                                   storyline="The siege of the castle.")
+            writer._write_chapter(context, NarrativeWriter(Path(working_dir)), pages_per_chapter=1, words_per_page=100, previous_chapter_summaries=[],
+                                  bible_index=BibleIndex(context), chapter_num=1, num_chapters=1,
+                                  bible_token_budget=100)
+
+            bible = mock_author_instance.write_section.call_args.kwargs["bible"]
+            self.assertIn("CONCEPT: Test concept", bible)
+            self.assertIn("STORYLINE: The siege of the castle.", bible)
+
+    def test_write_chapter_selects_bible_once_per_chapter(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.side_effect = ["The castle walls.", "The garden."]
+            writer.author = mock_author_instance
+            context = StoryContext(concept="Test concept", world="A castle on a hill. A garden by the river.",
+                                   characters="The Warden.", storyline="The siege of the castle.")
+            bible_index = BibleIndex(context, chunk_words=5, always_include=[], exclude=BIBLE_CORE_FIELDS)
+
+            writer._write_chapter(context, NarrativeWriter(Path(working_dir)), pages_per_chapter=2,
+                                  words_per_page=100, previous_chapter_summaries=[], bible_index=bible_index,
+                                  bible_token_budget=100)
+
+            # the same excerpts (and so the same prompt prefix) for every page; the core isn't repeated
+            first, second = [c.kwargs["bible"] for c in mock_author_instance.write_section.call_args_list]
+            self.assertEqual(first, second)
+            self.assertIn("WORLD: A castle on a hill.", first)
+            self.assertNotIn("STORYLINE", first)
+            self.assertNotIn("CONCEPT", first)
+
+    def test_run_reports_simulated_usage(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir, env="fake")
+            writer.author.llm.invoke("Write 20 words")
+            with self.assertLogs("scrAIbe", level="INFO") as logs:
+                writer._run("draft", Path(working_dir), lambda: None)
+            self.assertTrue(any("simulated usage" in line and "1 calls" in line for line in logs.output))
+
+    def test_write_chapter_with_continuity(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "The brass key turned in the lock."
+            writer.author = mock_author_instance
+            continuity = ContinuityIndex()
+            continuity.add_page(1, 3, "Mara hid the brass key in the lighthouse.")
+
+            writer._write_chapter(StoryContext(concept="Test concept"), NarrativeWriter(Path(working_dir)),
+                                  pages_per_chapter=2, words_per_page=100,
+                                  previous_chapter_summaries=[], chapter_num=2, num_chapters=2,
+                                  continuity=continuity)
+
+            extended_context = mock_author_instance.write_section.call_args.args[5]
+            self.assertIn("(Chapter 1) Mara hid the brass key", extended_context)
+            self.assertEqual([p.chapter for p in continuity.passages], [1, 2, 2])
+
+    def test_do_refresh_concept(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.develop_storyline.return_value = "new storyline"
+            mock_author_instance.summarize_concept.return_value = "new summary"
+            writer.author = mock_author_instance
+
+            context = StoryContext(concept="concept", plot="plot", themes="themes", characters="characters",
+                                   world="world", storyline="storyline")
+            context.record_all()
+            context.record("summary", "summary")
+            context.world = "edited world"
+            (concept_dir / "context.json").write_text(context.marshall())
+
+            writer._do_refresh_concept(concept_dir)
+
+            mock_author_instance.develop_storyline.assert_called_once()
+            mock_author_instance.summarize_concept.assert_called_once()
+            mock_author_instance.develop_plot.assert_not_called()
+            mock_author_instance.develop_characters.assert_not_called()
+            refreshed = StoryContext.unmarshall((concept_dir / "context.json").read_text())
+            self.assertEqual(refreshed.world, "edited world")
+            self.assertEqual(refreshed.storyline, "new storyline")
+            self.assertEqual(refreshed.stale_fields(), [])
+            self.assertEqual(refreshed.edited_fields(), [])
+            self.assertEqual((concept_dir / "summary.md").read_text(), "new summary")
+
+    def test_do_refresh_concept_keeps_dependent_edits(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.develop_themes.return_value = "new themes"
+            mock_author_instance.develop_world.return_value = "new world"
+            mock_author_instance.develop_storyline.return_value = "new storyline"
+            mock_author_instance.summarize_concept.return_value = "new summary"
+            writer.author = mock_author_instance
+
+            context = StoryContext(concept="concept", plot="plot", themes="themes", characters="characters",
+                                   world="world", storyline="storyline")
+            context.record_all()
+            context.record("summary", "summary")
+            # the characters depend on the plot
+            context.plot = "edited plot"
+            context.characters = "edited characters"
+            (concept_dir / "context.json").write_text(context.marshall())
+
+            writer._do_refresh_concept(concept_dir)
+
+            mock_author_instance.develop_characters.assert_not_called()
+            mock_author_instance.develop_themes.assert_called_once()
+            mock_author_instance.develop_world.assert_called_once()
+            mock_author_instance.develop_storyline.assert_called_once()
+            refreshed = StoryContext.unmarshall((concept_dir / "context.json").read_text())
+            self.assertEqual(refreshed.plot, "edited plot")
+            self.assertEqual(refreshed.characters, "edited characters")
+            self.assertEqual(refreshed.storyline, "new storyline")
+            self.assertEqual(refreshed.stale_fields(), [])
+            self.assertEqual(refreshed.edited_fields(), [])
+
+    def test_do_draft_narrative_resume_uses_artifact_store(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "page"
+            writer.author = mock_author_instance
+            context = StoryContext(concept="concept", storyline="storyline")
+            writer._save_artifact(concept_dir, "context.json", context.marshall())
+            (concept_dir / "chapter_1.txt").write_text("old chapter 1")
+
+            writer._do_draft_narrative(concept_dir, resume=True, bible_token_budget=0)
+
+            self.assertEqual(mock_author_instance.write_section.call_count, 11 * 20)
+            store = writer._artifact_store(concept_dir)
+            narrative = store.get("full_narrative.txt")
+            self.assertTrue(narrative.startswith("old chapter 1\n\npage page"))
+            self.assertEqual(narrative.count("\n\n"), 11)
+            self.assertEqual((concept_dir / "full_narrative.txt").read_text(), narrative)
+            self.assertIn("parts", store.history("full_narrative.txt")[-1])
+
+    def test_do_draft_narrative_resume_redrafts_interrupted_chapter(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            # interrupted on page 5 of chapter 2
+            mock_author_instance.write_section.side_effect = ["page"] * 24 + [ActorStoppedError("cancelled")]
+            writer.author = mock_author_instance
+            writer._save_artifact(concept_dir, "context.json", StoryContext(concept="concept").marshall())
+            with self.assertRaises(ActorStoppedError):
+                writer._do_draft_narrative(concept_dir, bible_token_budget=0)
+            self.assertFalse((concept_dir / "chapter_2.txt").exists())
+
+            mock_author_instance.write_section.side_effect = None
+            mock_author_instance.write_section.return_value = "page"
+            writer._do_draft_narrative(concept_dir, resume=True, bible_token_budget=0)
+
+            # chapter 2 is drafted again in full rather than kept at 4 pages
+            self.assertEqual(mock_author_instance.write_section.call_count, 25 + 11 * 20)
+            narrative = NarrativeWriter(concept_dir, resume=True)
+            for chapter in range(1, 13):
+                self.assertEqual(narrative.read(chapter), " ".join(["page"] * 20))
+            self.assertEqual((concept_dir / "chapter_2.txt").read_text(), " ".join(["page"] * 20))
+            self.assertFalse((concept_dir / "chapter_2.txt.partial").exists())
+
+    def test_do_draft_narrative_summarizes_chapters(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "page"
+            writer.author = mock_author_instance
+            writer._save_artifact(concept_dir, "context.json", StoryContext(concept="concept").marshall())
+            (concept_dir / "chapter_1.txt").write_text("Mara found the key.")
+
+            writer._do_draft_narrative(concept_dir, resume=True, bible_token_budget=0)
+
+            # chapter summaries are made locally, including for the resumed chapter
+            mock_author_instance.summarize_chapter.assert_not_called()
+            extended_context = mock_author_instance.write_section.call_args.args[5]
+            self.assertTrue(extended_context.startswith("Chapter 1: Mara found the key.\nChapter 2: page page"))
+            self.assertIn("Chapter 11: ", extended_context)
+
+    def test_do_draft_narrative_llm_summarizer(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "page"
+            mock_author_instance.summarize_chapter.return_value = "summary"
+            writer.author = mock_author_instance
+            writer._save_artifact(concept_dir, "context.json", StoryContext(concept="concept").marshall())
+
+            writer._do_draft_narrative(concept_dir, bible_token_budget=0, summarizer="llm")
+
+            self.assertEqual(mock_author_instance.summarize_chapter.call_count, 12)
+            self.assertIn("Chapter 11: summary\n", mock_author_instance.write_section.call_args.args[5])
+            with self.assertRaises(ValueError):
+                writer._do_draft_narrative(concept_dir, summarizer="abstractive")
+
+    def test_do_draft_narrative_deadline(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "page"
+            writer.author = mock_author_instance
+            writer._save_artifact(concept_dir, "context.json", StoryContext(concept="concept").marshall())
+
+            # past due: after the first chapter is timed, the rest are drafted with every adaptation
+            writer._do_draft_narrative(concept_dir, bible_token_budget=0,
+                                       deadline=datetime.now() - timedelta(minutes=1))
+
+            self.assertEqual(mock_author_instance.write_section.call_count, 20 + 11 * 5)
+            self.assertEqual(mock_author_instance.write_section.call_args.args[1], 1000)
+            mock_author_instance.use_llm.assert_called_once()
+            self.assertEqual(mock_author_instance.use_llm.call_args.args[0].model, "llama3.2:1b")
+            narrative = (concept_dir / "full_narrative.txt").read_text()
+            self.assertEqual(narrative.count("\n\n"), 11)
+            self.assertEqual(NarrativeWriter(concept_dir, resume=True).read(12), " ".join(["page"] * 5))
+            self.assertFalse((concept_dir / ".drafting").exists())
+
+    def test_do_draft_narrative_best_of(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            mock_author_instance = MagicMock(spec=Author)
+            mock_author_instance.write_section.return_value = "The storm broke over the harbor."
+            mock_author_instance.fork.return_value = mock_author_instance
+            writer.author = mock_author_instance
+            writer._save_artifact(concept_dir, "context.json", StoryContext(concept="concept").marshall())
+
+            writer._do_draft_narrative(concept_dir, bible_token_budget=0, best_of=3)
+
+            # each chapter's first and last page are sampled 3 times (all of them, as the short pages never clear
+            # the threshold)
+            self.assertEqual(mock_author_instance.fork.call_count, 12 * 2 * 3)
+            self.assertEqual(mock_author_instance.write_section.call_count, 12 * 18 + 12 * 2 * 3)
+            narrative = (concept_dir / "full_narrative.txt").read_text()
+            self.assertEqual(narrative.count("\n\n"), 11)
+
+    def test_load_artifact_records_hand_edits(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            writer = PaperbackWriter(working_dir=working_dir)
+            writer._save_artifact(concept_dir, "context.json", "original")
+            (concept_dir / "context.json").write_text("edited")
+
+            self.assertEqual(writer._load_artifact(concept_dir, "context.json"), "edited")
+            self.assertEqual(len(writer._artifact_store(concept_dir).history("context.json")), 2)
 
     def test_do_develop_concept(self):
         with tempfile.TemporaryDirectory() as working_dir:
@@ -148,23 +529,195 @@ class TestPaperbackWriter(unittest.TestCase):
 
             mock_human_instance.prompt_user.side_effect = ["fantasy", "wizard story", "3"]
             mock_human_instance.prompt_user_select.return_value = (0, "selected idea")
-            mock_author_instance.ideate.return_value = "test idea"
+            mock_author_instance.ideate_many.return_value = ["a wizard idea", "a dragon idea", "a knight idea"]
             mock_author_instance.develop_plot.return_value = "test plot"
             mock_author_instance.develop_themes.return_value = "test themes"
             mock_author_instance.develop_characters.return_value = "test characters"
             mock_author_instance.develop_world.return_value = "test world"
             mock_author_instance.develop_storyline.return_value = "test storyline"
+            mock_author_instance.revise_field.side_effect = lambda name, context, critique: f"revised {name}"
             mock_author_instance.summarize_concept.return_value = "summary of concept"
-            mock_critic_instance.critique_concept.return_value = "test critique"
+            mock_critic_instance.critique_plot.return_value = "more twists"
+            mock_critic_instance.critique_themes.return_value = "lean into loss"
+            mock_critic_instance.critique_characters.return_value = "deeper villain"
+            mock_critic_instance.critique_world.return_value = "NO CHANGES NEEDED"
+            mock_critic_instance.critique_storyline.return_value = "faster middle"
 
             concept_dir = work_dir_path / "concepts" / "test_time"
             concept_dir.mkdir(parents=True)
             writer._do_develop_concept(concept_dir)
 
-            mock_author_instance.ideate.assert_called()
+            # each element is revised with only its own feedback; the world needed no changes
+            feedback = {c.args[0]: c.args[2] for c in mock_author_instance.revise_field.call_args_list}
+            self.assertEqual(list(feedback), ["plot", "characters", "storyline"])
+            self.assertIn("more twists", feedback["plot"])
+            self.assertIn("lean into loss", feedback["plot"])
+            self.assertNotIn("deeper villain", feedback["plot"])
+            self.assertEqual(feedback["storyline"], "On the storyline:\nfaster middle")
+            context = StoryContext.unmarshall((concept_dir / "context.json").read_text())
+            self.assertEqual(context.plot, "revised plot")
+            self.assertEqual(context.world, "test world")
+
+            mock_author_instance.ideate_many.assert_called_once()
             mock_author_instance.develop_plot.assert_called()
             mock_author_instance.develop_themes.assert_called()
             mock_author_instance.develop_characters.assert_called()
             mock_author_instance.develop_world.assert_called()
             mock_author_instance.develop_storyline.assert_called()
-            mock_critic_instance.critique_concept.assert_called()
+            mock_critic_instance.critique_world.assert_called_once()
+
+    def test_revise_full_mode_regenerates(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir, revision_mode="full")
+            writer.author = MagicMock(spec=Author)
+            writer.author.develop_plot.return_value = "new plot"
+            writer.author.develop_world.return_value = "new world"
+            context = StoryContext(concept="idea", plot="old plot", world="old world")
+
+            writer._revise(context, {"plot": "more dragons", "world": "more dragons"}, ["plot", "world"])
+
+            writer.author.revise_field.assert_not_called()
+            writer.author.develop_plot.assert_called_once_with(context, critique="more dragons")
+            self.assertEqual(context.plot, "new plot")
+            self.assertEqual(context.world, "new world")
+
+
+    def test_speculative_development_while_selecting(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir, speculation_budget=2)
+            writer.author = MagicMock(spec=Author)
+            writer.human = MagicMock(spec=Human)
+            ideas = ["a wizard idea", "a dragon idea", "a knight idea"]
+            both_started = threading.Event()
+            started = []
+
+            def develop_plot(context):
+                started.append(context.concept)
+                if len(started) == 2:
+                    both_started.set()
+                return f"plot of {context.concept}"
+
+            def select(options):
+                # the human takes a while; both leading ideas are being developed meanwhile
+                self.assertTrue(both_started.wait(5))
+                return 2, options[1]
+
+            writer.author.develop_plot.side_effect = develop_plot
+            writer.author.develop_themes.side_effect = lambda context: f"themes of {context.concept}"
+            writer.author.fork.return_value = writer.author
+            writer.human.prompt_user_select.side_effect = select
+
+            writer._start()
+            idx, context = writer._select_and_start(ideas)
+            writer._stop()
+
+            self.assertEqual(idx, 2)
+            self.assertEqual(context.plot, "plot of a dragon idea")
+            self.assertEqual(context.themes, "themes of a dragon idea")
+            # the winner was not developed again
+            self.assertEqual(sorted(started), ["a dragon idea", "a wizard idea"])
+
+    def test_speculation_losers_are_stopped(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir, speculation_budget=2)
+            writer.author = MagicMock(spec=Author)
+            writer.human = MagicMock(spec=Human)
+            forks = [MagicMock(spec=Author), MagicMock(spec=Author)]
+            writer.author.fork.side_effect = forks
+            loser_stopped = threading.Event()
+            forks[0].stop.side_effect = loser_stopped.set
+
+            def stream_until_stopped(context):
+                # an in-flight call that only ends when its actor is stopped
+                if not loser_stopped.wait(5):
+                    raise AssertionError("the losing speculation was not stopped")
+                raise ActorStoppedError("stopped")
+
+            forks[0].develop_plot.side_effect = stream_until_stopped
+            forks[1].develop_plot.return_value = "plot"
+            forks[1].develop_themes.return_value = "themes"
+            writer.human.prompt_user_select.return_value = (2, "two")
+
+            writer._start()
+            idx, context = writer._select_and_start(["one", "two", "three"])
+            writer._stop()
+
+            self.assertEqual((context.plot, context.themes), ("plot", "themes"))
+            forks[0].stop.assert_called_once()
+            forks[1].stop.assert_not_called()
+            writer.author.develop_plot.assert_not_called()
+
+    def test_no_speculation_with_selection(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir)
+            writer.author = MagicMock(spec=Author)
+            writer.author.develop_plot.return_value = "plot"
+
+            idx, context = writer._select_and_start(["one", "two"], selection=2)
+
+            self.assertEqual((idx, context.concept), (2, "two"))
+            writer.author.develop_plot.assert_called_once()
+
+    def test_develop_and_draft_overlaps_summary_with_drafting(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            writer = PaperbackWriter(working_dir=working_dir)
+            writer.author = MagicMock(spec=Author)
+            context = StoryContext(concept="idea", plot="plot")
+            drafting = threading.Event()
+
+            def summarize(context):
+                # only returns once drafting has started, so a sequential pipeline would fail here
+                self.assertTrue(drafting.wait(5))
+                return "summary of concept"
+
+            writer.author.summarize_concept.side_effect = summarize
+            with patch.object(writer, "_do_develop_concept", return_value=context) as develop, \
+                    patch.object(writer, "_do_draft_narrative", side_effect=lambda *a, **kw: drafting.set()) as draft:
+                concept_dir = writer.develop_and_draft(selection=1)
+
+            self.assertIsNotNone(concept_dir)
+            develop.assert_called_once_with(concept_dir, summarize=False, selection=1)
+            self.assertIs(draft.call_args.kwargs["context"], context)
+            self.assertEqual((concept_dir / "summary.md").read_text(), "summary of concept")
+            self.assertEqual(json.loads((concept_dir / "manifest.json").read_text())["operation"], "develop_draft")
+
+class TestHistoryPodcaster(unittest.TestCase):
+
+    def _podcaster(self, working_dir: str) -> HistoryPodcaster:
+        podcaster = HistoryPodcaster(working_dir=working_dir)
+        podcaster.author = MagicMock(spec=Author)
+        podcaster.author.plan_segments.return_value = ["the rise", "the war", "the fall"]
+        podcaster.author.write_section.side_effect = \
+            lambda context, num_words, number, total, preceding, plan: f"segment {number} script"
+        podcaster.author.write_transition.side_effect = \
+            lambda context, ending, opening, number, num_words: f"bridge {number}"
+        return podcaster
+
+    def test_draft_segments_concurrently_with_transitions(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            podcaster = self._podcaster(working_dir)
+            podcaster._save_artifact(concept_dir, "context.json", StoryContext(concept="Rome").marshall())
+
+            podcaster._do_draft_narrative(concept_dir)
+
+            # every segment sees the whole plan and its own topic
+            plans = [c.args[5] for c in podcaster.author.write_section.call_args_list]
+            self.assertEqual(len(plans), 3)
+            self.assertTrue(all("Segment 3: the fall" in plan for plan in plans))
+            self.assertTrue(any("You're writing segment 2: the war" in plan for plan in plans))
+            self.assertEqual(podcaster.author.write_transition.call_count, 2)
+            self.assertEqual((concept_dir / "podcast.txt").read_text(),
+                             "segment 1 script\n\nbridge 1 segment 2 script\n\nbridge 2 segment 3 script")
+
+    def test_draft_segments_in_order(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            concept_dir = Path(working_dir)
+            podcaster = self._podcaster(working_dir)
+            podcaster._save_artifact(concept_dir, "context.json", StoryContext(concept="Rome").marshall())
+
+            podcaster._do_draft_narrative(concept_dir, concurrent_segments=False)
+
+            last_plan = podcaster.author.write_section.call_args_list[-1].args[5]
+            self.assertIn("The previous segment ended with:\nsegment 2 script", last_plan)
+            podcaster.author.write_transition.assert_not_called()
@@ -0,0 +1,46 @@
+import unittest
+
+from src.continuity import ContinuityIndex, extract_entities
+
+
+class TestContinuityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ContinuityIndex(passage_words=30)
+        self.index.add_page(1, 1, "Mara found a brass key hidden under the lighthouse stairs. It was cold and green "
+                                  "with age.")
+        self.index.add_page(1, 2, "Tobias sailed in from Port Ennis with flour, coffee and news of the storm.")
+        self.index.add_page(2, 1, "The Warden searched the harbor for smugglers all night.")
+
+    def test_extract_entities(self):
+        self.assertEqual(extract_entities("The Warden met Mara in Port Ennis. She smiled."),
+                         {"Warden", "Mara", "Port Ennis"})
+
+    def test_query_recalls_earlier_fact(self):
+        passages = self.index.query("Mara reached for the brass key", k=1)
+        self.assertEqual(len(passages), 1)
+        self.assertEqual((passages[0].chapter, passages[0].page), (1, 1))
+
+    def test_query_before_chapter(self):
+        passages = self.index.query("The Warden and the smugglers", k=3, before_chapter=2)
+        self.assertTrue(all(p.chapter < 2 for p in passages))
+        self.assertEqual(self.index.query("anything", before_chapter=1), [])
+
+    def test_query_results_in_narrative_order(self):
+        passages = self.index.query("Tobias Mara Warden storm key", k=3)
+        self.assertEqual([(p.chapter, p.page) for p in passages], [(1, 1), (1, 2), (2, 1)])
+
+    def test_facts(self):
+        self.assertEqual([p.page for p in self.index.facts("Tobias")], [2])
+        self.assertEqual(self.index.facts("Nobody"), [])
+
+    def test_grows_incrementally(self):
+        for page in range(200):
+            self.index.add_page(3, page, f"Page {page} of the long middle where nothing much happens.")
+        self.index.add_page(4, 1, "The lighthouse lamp finally went dark.")
+        passages = self.index.query("lighthouse lamp dark", k=1)
+        self.assertEqual(passages[0].chapter, 4)
+        self.assertEqual(len(self.index.passages), 204)
+
+    def test_format(self):
+        passages = self.index.query("Tobias", k=1)
+        self.assertTrue(ContinuityIndex.format(passages).startswith("(Chapter 1) Tobias sailed"))
@@ -0,0 +1,80 @@
+import time
+import unittest
+
+from src.deadline import DeadlinePlanner, DraftPlan
+
+
+class TestDeadlinePlanner(unittest.TestCase):
+    def test_page_seconds_fits_overhead_and_per_word_cost(self):
+        planner = DeadlinePlanner(time.time() + 3600)
+        self.assertIsNone(planner.page_seconds(250))
+        for words in [100, 200, 300]:
+            planner.observe(words, 2.0 + 0.01 * words)
+        self.assertAlmostEqual(planner.page_seconds(500), 7.0)
+
+    def test_page_seconds_with_equal_page_lengths(self):
+        planner = DeadlinePlanner(time.time() + 3600)
+        for _ in range(3):
+            planner.observe(250, 10.0)
+        self.assertAlmostEqual(planner.page_seconds(250), 10.0)
+        # only the per word share scales with longer pages
+        self.assertAlmostEqual(planner.page_seconds(500), 17.0)
+
+    def test_forecast(self):
+        planner = DeadlinePlanner(time.time() + 3600)
+        plan = DraftPlan(words_per_page=250, pages_per_chapter=20)
+        self.assertIsNone(planner.forecast(plan, 10))
+        for _ in range(3):
+            planner.observe(250, 10.0)
+        self.assertAlmostEqual(planner.forecast(plan, 10), 2000.0)
+        self.assertAlmostEqual(planner.forecast(DraftPlan(250, 20, concurrency=4), 10), 600.0)
+        self.assertAlmostEqual(planner.forecast(DraftPlan(250, 20, fast_model=True), 10), 1000.0)
+
+    def test_adapt_keeps_plan_on_track(self):
+        planner = DeadlinePlanner(time.time() + 3600)
+        plan = DraftPlan(words_per_page=250, pages_per_chapter=20)
+        self.assertIs(planner.adapt(plan, 10), plan)
+        for _ in range(3):
+            planner.observe(250, 1.0)
+        self.assertIs(planner.adapt(plan, 10), plan)
+        self.assertEqual(planner.decisions, [])
+
+    def test_adapt_lengthens_pages_first(self):
+        planner = DeadlinePlanner(time.time() + 1800)
+        for _ in range(3):
+            planner.observe(250, 10.0)
+        # 2000s forecast; 10 pages of 500 words take 1700s
+        adapted = planner.adapt(DraftPlan(words_per_page=250, pages_per_chapter=20), 10)
+        self.assertEqual(adapted, DraftPlan(words_per_page=500, pages_per_chapter=10))
+        self.assertEqual(len(planner.decisions), 1)
+        self.assertIn("switching to 10 pages of 500 words", planner.decisions[0])
+
+    def test_adapt_escalates_to_concurrency_and_fast_model(self):
+        planner = DeadlinePlanner(time.time() + 600, fast_model_available=True)
+        for _ in range(3):
+            planner.observe(250, 10.0)
+        adapted = planner.adapt(DraftPlan(words_per_page=250, pages_per_chapter=20), 10)
+        self.assertEqual(adapted, DraftPlan(words_per_page=1000, pages_per_chapter=5, concurrency=4))
+
+        # past due: everything, and the fast model's pages are timed afresh
+        planner = DeadlinePlanner(time.time() - 60, fast_model_available=True)
+        for _ in range(3):
+            planner.observe(250, 10.0)
+        adapted = planner.adapt(DraftPlan(words_per_page=250, pages_per_chapter=20), 10)
+        self.assertEqual(adapted, DraftPlan(1000, 5, concurrency=4, fast_model=True))
+        self.assertIsNone(planner.page_seconds(1000))
+        self.assertIs(planner.adapt(adapted, 9), adapted)
+
+    def test_adapt_without_fast_model(self):
+        planner = DeadlinePlanner(time.time() - 60, max_words_per_page=500, max_concurrency=2)
+        for _ in range(3):
+            planner.observe(250, 10.0)
+        adapted = planner.adapt(DraftPlan(words_per_page=250, pages_per_chapter=20), 10)
+        self.assertEqual(adapted, DraftPlan(500, 10, concurrency=2))
+        # nothing left to adapt
+        self.assertIs(planner.adapt(adapted, 9), adapted)
+        self.assertEqual(len(planner.decisions), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from src.dedup import dedupe, similarity_matrix
+
+
+class TestDedup(unittest.TestCase):
+    def setUp(self):
+        self.ideas = [
+            "A young wizard discovers a hidden library beneath the castle where the books are alive.",
+            "A young wizard discovers a secret library beneath the castle where the books are alive!",
+            "A retired detective solves one last murder on a cruise ship in the arctic.",
+            "Two rival bakers fall in love during a village pie contest.",
+        ]
+
+    def test_similarity_matrix(self):
+        sim = similarity_matrix(self.ideas)
+        self.assertEqual(sim.shape, (4, 4))
+        self.assertAlmostEqual(float(sim[0, 0]), 1.0, places=5)
+        self.assertGreater(sim[0, 1], 0.7)
+        self.assertLess(sim[0, 2], 0.2)
+
+    def test_dedupe_drops_near_duplicates(self):
+        self.assertEqual(dedupe(self.ideas, threshold=0.7), [0, 2, 3])
+
+    def test_dedupe_keeps_most_diverse(self):
+        ideas = self.ideas + ["A retired detective solves one last murder on a cruise ship in the tropics."]
+        kept = dedupe(ideas, threshold=0.95, max_keep=3)
+        self.assertEqual(len(kept), 3)
+        self.assertIn(3, kept)
+        self.assertFalse({2, 4} <= set(kept))
+
+    def test_dedupe_empty(self):
+        self.assertEqual(dedupe([]), [])
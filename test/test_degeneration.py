@@ -0,0 +1,54 @@
+import unittest
+
+from src.degeneration import DegenerationGuard
+
+
+def feed_in_chunks(guard: DegenerationGuard, text: str, size: int = 7) -> int:
+    """Feeds the text in chunks like a stream; returns how much was fed before the guard tripped."""
+    for start in range(0, len(text), size):
+        if guard.feed(text[start:start + size]):
+            return start + size
+    return len(text)
+
+
+class TestDegenerationGuard(unittest.TestCase):
+
+    def test_clean_output(self):
+        guard = DegenerationGuard()
+        text = "The storm broke over the harbor. Maria ran to the lighthouse.\n\nHer brother was not there."
+        feed_in_chunks(guard, text)
+        self.assertIsNone(guard.reason)
+        self.assertEqual(guard.good_text(), text)
+
+    def test_repetition_loop_is_cut_at_last_good_sentence(self):
+        guard = DegenerationGuard()
+        good = "The storm broke. Maria ran to the lighthouse, calling for her brother. "
+        loop = "He climbed the stairs and looked out over the dark sea. " * 20
+        fed = feed_in_chunks(guard, good + loop)
+
+        self.assertEqual(guard.reason, "repetition")
+        # stopped early rather than after the whole loop
+        self.assertLess(fed, len(good + loop) // 3)
+        self.assertEqual(guard.good_text(), good + "He climbed the stairs and looked out over the dark sea.")
+
+    def test_runaway_list(self):
+        guard = DegenerationGuard(max_list_items=5)
+        feed_in_chunks(guard, "She packed:\n" + "".join(f"- item {i}\n" for i in range(20)))
+
+        self.assertEqual(guard.reason, "runaway_list")
+        self.assertEqual(guard.good_text(), "She packed:\n" + "".join(f"- item {i}\n" for i in range(5)).strip())
+
+    def test_preamble_is_dropped(self):
+        guard = DegenerationGuard()
+        feed_in_chunks(guard, "Sure! Here is the next tranche of the section:\nThe storm broke.")
+        self.assertIsNone(guard.reason)
+        self.assertEqual(guard.good_text(), "The storm broke.")
+
+    def test_prose_that_looks_like_a_preamble_is_kept(self):
+        guard = DegenerationGuard()
+        feed_in_chunks(guard, "Sure enough, the storm broke.\nMaria ran.")
+        self.assertEqual(guard.good_text(), "Sure enough, the storm broke.\nMaria ran.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import unittest
+
+from src.json_stream import JsonListStreamParser, parse_list, repair_json_list
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_valid_list(self):
+        self.assertEqual(parse_list('["a", "b\\n", 3, {"k": [1]}]'), ["a", "b\n", 3, {"k": [1]}])
+
+    def test_repairs(self):
+        cases = {
+            'Sure! Here are the ideas:\n```json\n["a", "b",]\n```': ["a", "b"],
+            'See [1] below: ["a"]': ["a"],
+            '["He said "hi" to me", "b"]': ['He said "hi" to me', "b"],
+            '[\n  "a"\n  "b"\n]': ["a", "b"],
+            '["raw\nnewline", "bad \\q escape"]': ["raw\nnewline", "bad \\q escape"],
+            '["a", "b"': ["a", "b"],
+            '[{"k": 1,},]': [{"k": 1}],
+        }
+        for text, expected in cases.items():
+            self.assertEqual(parse_list(text), expected, text)
+
+    def test_truncated_item_is_dropped(self):
+        self.assertEqual(parse_list('["a", "b", "cut o'), ["a", "b"])
+
+    def test_bulleted_fallback(self):
+        self.assertEqual(parse_list("1. first idea\n2) second idea\n- third idea"),
+                         ["first idea", "second idea", "third idea"])
+        self.assertEqual(parse_list("no list here"), [])
+
+    def test_streaming(self):
+        parser = JsonListStreamParser()
+        emitted = [parser.feed(chunk) for chunk in ['["on', 'e", "tw', 'o"', ', "thr', 'ee"]', ' trailing']]
+        self.assertEqual(emitted, [[], ["one"], [], ["two"], ["three"], []])
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.close(), [])
+
+    def test_repair_json_list(self):
+        self.assertEqual(json.loads(repair_json_list('["a", "b",]')), ["a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import dataclasses
+import logging
+import unittest
+from unittest.mock import patch
+
+from src import logutils
+from src.logutils import CappedRepr, logio
+from src.utils import StoryContext
+
+
+class Exploding:
+    def __repr__(self):
+        raise AssertionError("repr should not be called")
+
+
+class TestLogio(unittest.TestCase):
+    def setUp(self):
+        self.level = logutils.wrapper_logger.level
+        self.records = []
+        handler = logging.Handler()
+        handler.emit = lambda record: self.records.append(record.getMessage())
+        logutils.wrapper_logger.addHandler(handler)
+        self.addCleanup(logutils.wrapper_logger.removeHandler, handler)
+
+    def tearDown(self):
+        logutils.wrapper_logger.setLevel(self.level)
+
+    def test_logs_args_and_result(self):
+        logutils.wrapper_logger.setLevel(logging.DEBUG)
+
+        @logio()
+        def add(a, b=2):
+            return a + b
+
+        self.assertEqual(add(1, b=3), 4)
+        self.assertEqual(self.records, [">>> add(a=1, b=3)", "<<< add: 4"])
+
+    def test_signature_resolved_once(self):
+        with patch("src.logutils.inspect.signature", wraps=logutils.inspect.signature) as signature:
+            @logio()
+            def identity(x):
+                return x
+
+            for i in range(3):
+                identity(i)
+        signature.assert_called_once()
+
+    def test_disabled_logger_skips_formatting(self):
+        logutils.wrapper_logger.setLevel(logging.INFO)
+
+        @logio()
+        def identity(x):
+            return x
+
+        obj = Exploding()
+        self.assertIs(identity(obj), obj)
+        self.assertEqual(self.records, [])
+
+    def test_sampling(self):
+        logutils.wrapper_logger.setLevel(logging.DEBUG)
+
+        @logio(sample_rate=0.0)
+        def identity(x):
+            return x
+
+        identity(Exploding())
+        self.assertEqual(self.records, [])
+
+    def test_capped_repr(self):
+        self.assertEqual(str(CappedRepr("x" * 10_000, 10)), "'xxxxxx...")
+        self.assertEqual(str(CappedRepr("short", 100)), "'short'")
+        self.assertEqual(str(CappedRepr("x" * 200, -1)), repr("x" * 200))
+        self.assertLessEqual(len(str(CappedRepr(list(range(1000)), 50))), 50)
+
+    def test_capped_repr_of_dataclasses_is_built_by_field(self):
+        @dataclasses.dataclass(repr=False)
+        class Holder:
+            text: str
+            nested: object
+
+            def __repr__(self):
+                raise AssertionError("the full repr should not be built")
+
+        context = StoryContext(concept="x" * 100_000, plot="y" * 100_000)
+        rep = str(CappedRepr(context, 60))
+        self.assertTrue(rep.startswith("StoryContext(concept='xxx"))
+        self.assertLessEqual(len(rep), 60)
+        rep = str(CappedRepr(Holder("x" * 100_000, context), 60))
+        self.assertTrue(rep.startswith("Holder(text='xxx"))
+        self.assertLessEqual(len(rep), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
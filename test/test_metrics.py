@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        calls = self.registry.counter("calls_total", "Calls", ["actor"])
+        calls.inc(actor="Author")
+        calls.inc(2, actor="Author")
+        calls.inc(actor="Critic")
+        self.assertEqual(calls.value(actor="Author"), 3)
+        self.assertEqual(self.registry.render(), '# HELP calls_total Calls\n'
+                                                 '# TYPE calls_total counter\n'
+                                                 'calls_total{actor="Author"} 3\n'
+                                                 'calls_total{actor="Critic"} 1\n')
+        with self.assertRaises(ValueError):
+            calls.inc(project="x")
+
+    def test_gauge(self):
+        depth = self.registry.gauge("depth", "Depth")
+        depth.set(4)
+        depth.dec()
+        self.assertIn("depth 3\n", self.registry.render())
+
+    def test_histogram(self):
+        latency = self.registry.histogram("latency_seconds", "Latency", ["priority"], buckets=(1.0, 5.0))
+        for value in [0.5, 2.0, 10.0]:
+            latency.observe(value, priority="DRAFT")
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{priority="DRAFT",le="1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{priority="DRAFT",le="5"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{priority="DRAFT",le="+Inf"} 3\n', text)
+        self.assertIn('latency_seconds_sum{priority="DRAFT"} 12.5\n', text)
+        self.assertIn('latency_seconds_count{priority="DRAFT"} 3\n', text)
+        self.assertEqual(latency.count(priority="DRAFT"), 3)
+
+    def test_label_escaping(self):
+        self.registry.counter("c", "C", ["v"]).inc(v='a "b"\n')
+        self.assertIn('c{v="a \\"b\\"\\n"} 1', self.registry.render())
+
+    def test_write_textfile(self):
+        self.registry.counter("pages_total", "Pages").inc(5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "scraibe.prom"
+            self.registry.write_textfile(path)
+            self.assertIn("pages_total 5\n", path.read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.narrative import NarrativeWriter
+
+
+class TestNarrativeWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_chapter(self, narrative, number, pages):
+        narrative.begin(number)
+        for page in pages:
+            narrative.write_page(page)
+        return narrative.end()
+
+    def test_streams_pages_and_chapters(self):
+        narrative = NarrativeWriter(self.dir)
+        narrative.begin(1)
+        narrative.write_page("one")
+        # pages are on disk before the chapter is finished, but only in its partial file
+        self.assertEqual((self.dir / "chapter_1.txt.partial").read_text(), "one")
+        self.assertFalse((self.dir / "chapter_1.txt").exists())
+        narrative.write_page("two")
+        self.assertEqual(narrative.read_pages(), ["one", "two"])
+        narrative.end()
+        self.assertEqual((self.dir / "chapter_1.txt").read_text(), "one two")
+        self.assertFalse((self.dir / "chapter_1.txt.partial").exists())
+        self.write_chapter(narrative, 2, ["three"])
+
+        self.assertEqual((self.dir / "full_narrative.txt").read_text(), "one two\n\nthree")
+        self.assertEqual(narrative.read(1), "one two")
+        self.assertEqual(narrative.read_pages(2), ["three"])
+        self.assertTrue(narrative.is_complete(2))
+
+    def test_offset_index(self):
+        narrative = NarrativeWriter(self.dir)
+        self.write_chapter(narrative, 1, ["één", "two"])
+        self.write_chapter(narrative, 2, ["three"])
+        index = json.loads((self.dir / "full_narrative.index.json").read_text())
+        data = (self.dir / "full_narrative.txt").read_bytes()
+        chapter = index["sections"][1]
+        self.assertEqual(data[chapter["offset"]:chapter["offset"] + chapter["length"]].decode("utf-8"), "three")
+        page = index["sections"][0]["pages"][1]
+        self.assertEqual(data[page["offset"]:page["offset"] + page["length"]].decode("utf-8"), "two")
+
+    def test_resume_drops_unfinished_chapter(self):
+        narrative = NarrativeWriter(self.dir)
+        self.write_chapter(narrative, 1, ["one"])
+        narrative.begin(2)
+        narrative.write_page("partial")
+        narrative.close()
+        with open(self.dir / "full_narrative.txt", "a") as f:
+            f.write("\n\ngarbage from a crash")
+
+        resumed = NarrativeWriter(self.dir, resume=True)
+        self.assertTrue(resumed.is_complete(1))
+        self.assertFalse(resumed.is_complete(2))
+        self.assertFalse((self.dir / "chapter_2.txt").exists())
+        self.write_chapter(resumed, 2, ["two"])
+        self.assertEqual((self.dir / "full_narrative.txt").read_text(), "one\n\ntwo")
+
+    def test_fresh_run_starts_over(self):
+        self.write_chapter(NarrativeWriter(self.dir), 1, ["old"])
+        narrative = NarrativeWriter(self.dir)
+        self.assertFalse(narrative.is_complete(1))
+        self.assertEqual((self.dir / "full_narrative.txt").read_text(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
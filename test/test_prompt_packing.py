@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import Mock
+
+from langchain_aws import ChatBedrock
+from langchain_ollama import ChatOllama
+
+from src.prompt_packing import (OLLAMA_DEFAULT_NUM_CTX, PromptPacker, TokenCounter, context_window,
+                                model_family)
+
+STORYLINE = " ".join(f"In chapter {n} Mara searches the lighthouse for the letter her sister hid." for n in range(40))
+
+
+class TestPromptPacking(unittest.TestCase):
+    def test_token_counter(self):
+        self.assertEqual(TokenCounter("llama").count("The quick brown fox jumps."), 6)
+        self.assertEqual(TokenCounter().count(""), 0)
+        # denser tokenizers need fewer tokens for long words
+        text = "Extraordinarily unbelievable circumstances"
+        self.assertLess(TokenCounter("llama").count(text), TokenCounter("default").count(text))
+        counter = TokenCounter()
+        self.assertEqual(counter.head("one two three four", 2), "one two")
+        self.assertEqual(counter.tail("one two three four", 2), "three four")
+
+    def test_model_family_and_context_window(self):
+        ollama = ChatOllama(model="llama3.2", num_ctx=8192)
+        self.assertEqual(model_family(ollama), "llama")
+        self.assertEqual(context_window(ollama), 8192)
+        self.assertEqual(context_window(ChatOllama(model="llama3.2")), OLLAMA_DEFAULT_NUM_CTX)
+        bedrock = Mock(spec=ChatBedrock)
+        bedrock.model_id = "anthropic.claude-3-haiku-20240307-v1:0"
+        self.assertEqual(model_family(bedrock), "claude")
+        self.assertEqual(context_window(bedrock), 200_000)
+        self.assertIsNone(context_window(Mock()))
+        self.assertIsNone(PromptPacker.for_model(Mock()))
+
+    def test_pack_fits_unchanged(self):
+        packer = PromptPacker(8192)
+        values = {"concept": "idea", "storyline": STORYLINE, "num_words": 250}
+        packed, decisions = packer.pack(values, budget=5000)
+        self.assertEqual(packed, values)
+        self.assertEqual(decisions, [])
+
+    def test_pack_by_priority(self):
+        packer = PromptPacker(8192)
+        storyline_tokens = packer.counter.count(STORYLINE)
+        values = {"concept": "idea", "storyline": STORYLINE, "world": STORYLINE, "themes": STORYLINE,
+                  "feedback": None, "num_words": 250}
+
+        packed, decisions = packer.pack(values, budget=storyline_tokens + 200)
+
+        # the storyline is kept, the world is summarized into what's left and the themes are dropped
+        self.assertEqual(packed["storyline"], STORYLINE)
+        self.assertEqual(packed["concept"], "idea")
+        self.assertEqual(packed["num_words"], 250)
+        self.assertEqual(packed["themes"], "")
+        self.assertEqual([(d.slot, d.action) for d in decisions], [("world", "summarized"), ("themes", "dropped")])
+        self.assertLessEqual(sum(packer.counter.count(v) for v in packed.values() if isinstance(v, str)),
+                             storyline_tokens + 200)
+
+    def test_pack_keeps_end_of_preceding_sections(self):
+        packer = PromptPacker(8192)
+        packed, decisions = packer.pack({"preceding_sections": STORYLINE + " The end."}, budget=50)
+        self.assertTrue(packed["preceding_sections"].endswith("The end."))
+        self.assertLessEqual(packer.counter.count(packed["preceding_sections"]), 50)
+        self.assertEqual(decisions[0].action, "trimmed")
@@ -0,0 +1,69 @@
+import unittest
+
+from src.retrieval import BIBLE_CORE_FIELDS, BM25Index, BibleIndex, chunk_text, tokenize
+from src.utils import StoryContext
+
+
+class TestRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.context = StoryContext(
+            concept="A lighthouse keeper discovers the sea is alive.",
+            plot="Mara keeps the lighthouse on Gull Rock. The sea begins to speak to her.",
+            themes="Isolation and belonging.",
+            characters="##Mara\nThe lighthouse keeper, stubborn and kind.\n\n"
+                       "##Tobias\nA fisherman who brings Mara supplies and gossip from the harbor town.\n\n"
+                       "##The Warden\nA customs officer obsessed with smugglers.",
+            world="Gull Rock is a bare island with a lighthouse.\n\n"
+                  "The harbor town of Port Ennis has a fish market, a chapel and a customs house.",
+            storyline="Mara hears the sea whisper during a storm.\n\n"
+                      "Tobias brings news that the Warden suspects Mara of smuggling.\n\n"
+                      "Mara and the sea save the fishing fleet from a storm."
+        )
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Sea is ALIVE, isn't it?"), ["sea", "alive", "isn't"])
+
+    def test_chunk_text(self):
+        text = "First paragraph here.\n\nSecond paragraph. " + "Long sentence with words. " * 30
+        chunks = chunk_text(text, max_words=20)
+        self.assertTrue(chunks[0].startswith("First paragraph here.\nSecond paragraph."))
+        self.assertTrue(all(len(c.split()) <= 20 for c in chunks))
+        self.assertEqual(" ".join(" ".join(chunks).split()), " ".join(text.split()))
+
+    def test_bm25_ranks_matching_document_first(self):
+        index = BM25Index([tokenize("the fish market"), tokenize("the customs house and officer"),
+                           tokenize("a bare island")])
+        scores = index.scores(tokenize("customs officer"))
+        self.assertEqual(int(scores.argmax()), 1)
+        self.assertEqual(index.scores(tokenize("unrelated words")).max(), 0)
+
+    def test_select_within_budget(self):
+        index = BibleIndex(self.context, chunk_words=20)
+        bible = index.select("Tobias and the Warden at the customs house", token_budget=60)
+
+        self.assertIn("CONCEPT: A lighthouse keeper", bible)
+        self.assertIn("The Warden", bible)
+        self.assertNotIn("Isolation", bible)
+        self.assertLess(len(bible), sum(len(getattr(self.context, f)) for f in
+                                        ["concept", "plot", "themes", "characters", "world", "storyline"]))
+
+    def test_select_orders_by_field(self):
+        index = BibleIndex(self.context, chunk_words=20)
+        bible = index.select("Tobias harbor", token_budget=1000)
+        self.assertLess(bible.index("CONCEPT:"), bible.index("CHARACTERS:"))
+        self.assertLess(bible.index("CHARACTERS:"), bible.index("STORYLINE:"))
+
+    def test_select_skips_excluded_fields(self):
+        index = BibleIndex(self.context, chunk_words=20, always_include=[], exclude=BIBLE_CORE_FIELDS)
+        bible = index.select("Tobias and the Warden at the customs house", token_budget=1000)
+        self.assertNotIn("CONCEPT:", bible)
+        self.assertNotIn("CHARACTERS:", bible)
+        self.assertNotIn("STORYLINE:", bible)
+        # excluded fields are still indexed for the storyline window
+        self.assertTrue(index.storyline_window(1, 1))
+
+    def test_storyline_window(self):
+        index = BibleIndex(self.context, chunk_words=10)
+        self.assertIn("whisper", index.storyline_window(1, 3))
+        self.assertIn("fishing fleet", index.storyline_window(3, 3))
+        self.assertEqual(BibleIndex(StoryContext(concept="idea")).storyline_window(1, 3), "")
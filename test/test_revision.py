@@ -0,0 +1,49 @@
+import unittest
+
+from src.revision import EditOp, RevisionError, apply_edits, number_paragraphs, parse_edits, revise, \
+    split_paragraphs
+
+
+class TestRevision(unittest.TestCase):
+
+    def test_split_paragraphs(self):
+        self.assertEqual(split_paragraphs("One.\n\n  Two.\nStill two.\n\n\nThree."),
+                         ["One.", "Two.\nStill two.", "Three."])
+        # a list without blank lines is split into lines
+        self.assertEqual(split_paragraphs("- Sarah\n- Tom\n"), ["- Sarah", "- Tom"])
+
+    def test_number_paragraphs(self):
+        self.assertEqual(number_paragraphs(["One.", "Two."]), "[1] One.\n\n[2] Two.")
+
+    def test_parse_edits(self):
+        edits = parse_edits('Here are the edits:\n[{"op": "replace", "paragraph": "2", "text": " New. "},\n'
+                            '{"op": "delete", "paragraph": 3},]')
+        self.assertEqual(edits, [EditOp("replace", 2, "New."), EditOp("delete", 3)])
+        self.assertEqual(parse_edits("[]"), [])
+
+    def test_parse_edits_rejects_malformed(self):
+        for text in ["No changes needed.", '["just a string"]', '[{"op": "rewrite", "paragraph": 1}]',
+                     '[{"op": "replace", "paragraph": 1}]', '[{"op": "delete", "paragraph": "first"}]']:
+            with self.subTest(text=text):
+                with self.assertRaises(RevisionError):
+                    parse_edits(text)
+
+    def test_apply_edits_uses_original_numbers(self):
+        paragraphs = ["A", "B", "C"]
+        edits = [EditOp("delete", 1), EditOp("insert_after", 0, "start"), EditOp("replace", 3, "C2"),
+                 EditOp("insert_after", 2, "after B")]
+        self.assertEqual(apply_edits(paragraphs, edits), ["start", "B", "after B", "C2"])
+
+    def test_apply_edits_rejects_invalid(self):
+        for edits in [[EditOp("replace", 4, "x")], [EditOp("insert_after", -1, "x")],
+                      [EditOp("replace", 1, "x"), EditOp("delete", 1)], [EditOp("delete", 1), EditOp("delete", 2)]]:
+            with self.subTest(edits=edits):
+                with self.assertRaises(RevisionError):
+                    apply_edits(["A", "B"], edits)
+
+    def test_revise_keeps_separator(self):
+        revised, edits = revise("- Sarah\n- Tom", '[{"op": "insert_after", "paragraph": 2, "text": "- Ann"}]')
+        self.assertEqual(revised, "- Sarah\n- Tom\n- Ann")
+        self.assertEqual(len(edits), 1)
+        revised, edits = revise("One.\n\nTwo.", "[]")
+        self.assertEqual(revised, "One.\n\nTwo.")
@@ -0,0 +1,169 @@
+import json
+import tempfile
+import threading
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.service import Job, JobQueue, JobRunner, JobStatus, create_server
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.queue_file_path = Path(self.temp_dir.name) / "jobs" / "queue.json"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_validate(self):
+        with self.assertRaises(ValueError):
+            Job(kind="poetry", operations=["develop"]).validate()
+        with self.assertRaises(ValueError):
+            Job(kind="podcast", operations=["publish"]).validate()
+        with self.assertRaises(ValueError):
+            Job(kind="podcast", operations=["develop"], params={"genre": "history"}).validate()
+        with self.assertRaises(ValueError):
+            Job(kind="podcast", operations=["draft"]).validate()
+        Job(kind="podcast", operations=["draft"], project_dir="concepts/x").validate()
+
+    def test_submit_and_next(self):
+        queue = JobQueue(self.queue_file_path)
+        job = queue.submit(Job(kind="longform-fiction", operations=["draft"], project_dir="concepts/x"))
+
+        self.assertEqual(queue.depth(), 1)
+        running = queue.next(timeout=0)
+        self.assertEqual(running.job_id, job.job_id)
+        self.assertEqual(running.status, JobStatus.RUNNING)
+        self.assertIsNone(queue.next(timeout=0))
+
+    def test_cancel_and_requeue(self):
+        queue = JobQueue(self.queue_file_path)
+        job = queue.submit(Job(kind="longform-fiction", operations=["draft"], project_dir="concepts/x"))
+
+        self.assertTrue(queue.cancel(job.job_id))
+        self.assertEqual(queue.get(job.job_id).status, JobStatus.CANCELLED)
+        self.assertEqual(queue.depth(), 0)
+        self.assertFalse(queue.cancel(job.job_id))
+
+        queue.requeue(job.job_id)
+        self.assertEqual(queue.depth(), 1)
+        with self.assertRaises(ValueError):
+            queue.requeue(job.job_id)
+
+    def test_restart_requeues_running_jobs(self):
+        queue = JobQueue(self.queue_file_path)
+        job = queue.submit(Job(kind="longform-fiction", operations=["draft"], project_dir="concepts/x"))
+        done = queue.submit(Job(kind="longform-fiction", operations=["draft"], project_dir="concepts/y"))
+        queue.next(timeout=0)
+        queue.next(timeout=0)
+        done.status = JobStatus.SUCCEEDED
+        queue.update(done)
+
+        restarted = JobQueue(self.queue_file_path)
+        self.assertEqual(restarted.depth(), 1)
+        self.assertEqual(restarted.next(timeout=0).job_id, job.job_id)
+        self.assertEqual(restarted.get(done.job_id).status, JobStatus.SUCCEEDED)
+
+
+class TestJobRunner(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.working_dir_path = Path(self.temp_dir.name)
+        self.queue = JobQueue(self.working_dir_path / "jobs" / "queue.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_run_job_develop_and_draft(self):
+        conductor = MagicMock()
+        conductor.cancelled = False
+        conductor.develop_concept.return_value = self.working_dir_path / "concepts" / "x"
+        conductor.draft_narrative.return_value = self.working_dir_path / "concepts" / "x"
+        job = self.queue.submit(Job(kind="longform-fiction", operations=["develop", "draft"],
+                                    params={"genre": "fantasy", "starter": "wizards", "num_concepts": 2}))
+
+        with patch.dict("src.service.CONDUCTORS", {"longform-fiction": MagicMock(return_value=conductor)}):
+            JobRunner(self.working_dir_path, self.queue).run_job(self.queue.next(timeout=0))
+
+        conductor.develop_concept.assert_called_once_with(genre="fantasy", starter="wizards", num_concepts=2,
+                                                          selection=1)
+        conductor.draft_narrative.assert_called_once_with(self.working_dir_path / "concepts" / "x", resume=True)
+        self.assertEqual(self.queue.get(job.job_id).status, JobStatus.SUCCEEDED)
+        self.assertEqual(self.queue.get(job.job_id).completed_operations, ["develop", "draft"])
+
+    def test_run_job_failure(self):
+        conductor = MagicMock()
+        conductor.cancelled = False
+        conductor.draft_narrative.return_value = None
+        job = self.queue.submit(Job(kind="podcast", operations=["draft"], project_dir="concepts/x"))
+
+        with patch.dict("src.service.CONDUCTORS", {"podcast": MagicMock(return_value=conductor)}):
+            JobRunner(self.working_dir_path, self.queue).run_job(self.queue.next(timeout=0))
+
+        self.assertEqual(self.queue.get(job.job_id).status, JobStatus.FAILED)
+        self.assertEqual(self.queue.get(job.job_id).error, "drafting failed")
+
+
+class TestJobService(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.working_dir_path = Path(self.temp_dir.name)
+        self.server, self.runner = create_server(self.working_dir_path, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def _request(self, path: str, payload: dict = None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        with urllib.request.urlopen(urllib.request.Request(self.base_url + path, data=data)) as res:
+            return res.status, res.read(), res.headers
+
+    def test_submit_status_and_chapters(self):
+        project_dir = self.working_dir_path / "concepts" / "x"
+        project_dir.mkdir(parents=True)
+        (project_dir / "chapter_1.txt").write_text("It was a dark and stormy night.")
+
+        status, body, _ = self._request("/jobs", {"kind": "longform-fiction", "operations": ["draft"],
+                                                  "project_dir": "concepts/x", "status": "succeeded"})
+        job = json.loads(body)
+        self.assertEqual(status, 202)
+        self.assertEqual(job["status"], "pending")
+
+        status, body, _ = self._request(f"/jobs/{job['job_id']}")
+        self.assertEqual(json.loads(body)["project_dir"], "concepts/x")
+
+        status, body, _ = self._request(f"/jobs/{job['job_id']}/chapters")
+        self.assertEqual(json.loads(body), [{"chapter": 1, "bytes": 31}])
+
+        status, body, headers = self._request(f"/jobs/{job['job_id']}/chapters/1?offset=9")
+        self.assertEqual(body, b"dark and stormy night.")
+        self.assertEqual(headers["X-Next-Offset"], "31")
+
+        # the chapter being drafted is served from its partial file until it's finished
+        (project_dir / "chapter_2.txt.partial").write_text("Page one.")
+        status, body, _ = self._request(f"/jobs/{job['job_id']}/chapters/2")
+        self.assertEqual(body, b"Page one.")
+
+        for offset in ["abc", "-1"]:
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                self._request(f"/jobs/{job['job_id']}/chapters/1?offset={offset}")
+            self.assertEqual(ctx.exception.code, 400)
+
+    def test_metrics(self):
+        status, body, headers = self._request("/metrics")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn("# TYPE scraibe_llm_calls_total counter", body.decode("utf-8"))
+        self.assertIn("scraibe_jobs_queued 0", body.decode("utf-8"))
+
+    def test_invalid_submission(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self._request("/jobs", {"kind": "longform-fiction", "operations": ["develop"]})
+        self.assertEqual(ctx.exception.code, 400)
@@ -0,0 +1,46 @@
+import unittest
+
+from src.summarizer import extractive_summary, running_summary, sentence_scores, split_sentences
+
+CHAPTER = """Mara climbed the lighthouse stairs with the brass key in her pocket. The storm had cut the village off
+from the harbor road. She thought about her sister, who had left for the city years ago. "No." The brass key opened
+the old door at the top of the lighthouse. Behind the door Mara found the letter her sister never sent. The gulls
+were loud that morning. She read the letter by the lantern while the storm broke over the harbor."""
+
+
+class TestSummarizer(unittest.TestCase):
+    def test_sentence_scores(self):
+        sentences = ["The brass key opened the lighthouse door.", "Mara hid the brass key in the lighthouse.",
+                     "The lighthouse door was old.", "Gulls were loud."]
+        for method in ["textrank", "centroid"]:
+            scores = sentence_scores(sentences, method)
+            self.assertEqual(scores.shape, (4,))
+            # the sentence sharing nothing with the others is the least salient
+            self.assertEqual(int(scores.argmin()), 3)
+        with self.assertRaises(ValueError):
+            sentence_scores(sentences, "lexrank")
+
+    def test_split_sentences(self):
+        self.assertEqual(split_sentences('He said "No." Then\nhe left! Did she?'),
+                         ['He said "No."', "Then he left!", "Did she?"])
+
+    def test_extractive_summary_within_budget_in_order(self):
+        for method in ["textrank", "centroid"]:
+            summary = extractive_summary(CHAPTER, max_words=40, method=method)
+            self.assertLessEqual(len(summary.split()), 40)
+            self.assertNotIn("gulls", summary.lower())
+            self.assertNotIn('"No."', summary)
+            sentences = [s for s in summary.split(". ") if s]
+            positions = [CHAPTER.replace("\n", " ").find(s) for s in sentences]
+            self.assertEqual(positions, sorted(positions))
+
+    def test_extractive_summary_short_text(self):
+        self.assertEqual(extractive_summary("Mara found\nthe key.", max_words=40), "Mara found the key.")
+        self.assertEqual(extractive_summary("one two three four five six.", max_words=3), "one two three")
+
+    def test_running_summary(self):
+        summaries = [CHAPTER] * 4
+        self.assertEqual(running_summary(summaries[:1], max_words=200), [CHAPTER])
+        compressed = running_summary(summaries, max_words=120)
+        self.assertEqual(len(compressed), 4)
+        self.assertLessEqual(sum(len(s.split()) for s in compressed), 120)
@@ -1,6 +1,6 @@
 import unittest
 import json
-from src.utils import StoryContext
+from src.utils import StoryContext, content_hash
 
 
 class TestStoryContext(unittest.TestCase):
@@ -74,3 +74,29 @@ class TestStoryContext(unittest.TestCase):
         self.assertIsNone(empty_context.storyline)
         self.assertIsNone(empty_context.world)
         self.assertIsNone(empty_context.themes)
+
+    def test_provenance_round_trip(self):
+        self.story_context.record_all()
+        unmarshalled = StoryContext.unmarshall(self.story_context.marshall())
+        self.assertEqual(unmarshalled.provenance, self.story_context.provenance)
+        self.assertEqual(unmarshalled.provenance["world"]["inputs"],
+                         {"concept": content_hash(self.story_context.concept),
+                          "plot": content_hash(self.story_context.plot)})
+
+    def test_stale_fields_after_edit(self):
+        self.story_context.record_all()
+        self.story_context.record("summary", "the summary")
+        self.assertEqual(self.story_context.stale_fields(), [])
+
+        self.story_context.world = "A world where nobody dreams"
+        self.assertEqual(self.story_context.edited_fields(), ["world"])
+        self.assertEqual(self.story_context.stale_fields(), ["storyline", "summary"])
+
+        # the edited world is kept although its plot was edited too
+        self.story_context.plot = "A young girl loses her dreams"
+        self.assertEqual(self.story_context.edited_fields(), ["plot", "world"])
+        self.assertEqual(self.story_context.stale_fields(), ["themes", "characters", "storyline", "summary"])
+
+    def test_stale_fields_without_provenance(self):
+        self.assertEqual(self.story_context.stale_fields(), [])
+        self.assertEqual(self.story_context.edited_fields(), [])